@@ -0,0 +1,107 @@
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+CAUSE_LIMIT = 200
+VOLATILE_PATTERNS = (
+    (re.compile(r'0x[0-9a-fA-F]+'), '0x#'),
+    (re.compile(r'[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}'),
+     '<uuid>'),
+    (re.compile(r'\d{4,}'), '#'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения."""
+    global ALERT_WINDOW
+    ALERT_WINDOW = float(os.getenv('ALERT_WINDOW', 3600))
+
+
+load_settings()
+
+
+def normalize_cause(text: str) -> str:
+    """Текст ошибки без адресов, идентификаторов и времени."""
+    for pattern, replacement in VOLATILE_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text.strip()[:CAUSE_LIMIT]
+
+
+def error_fingerprint(error: Exception) -> str:
+    """Отпечаток ошибки: класс, класс причины и нормализованный текст.
+
+    Одинаковые сбои дают одинаковый отпечаток, даже если в тексте
+    меняются время, порты или адреса объектов.
+    """
+    name = type(error).__name__
+    cause = error.__cause__ or error.__context__
+    if cause is not None:
+        name = f'{name}({type(cause).__name__})'
+    return f'{name}: {normalize_cause(str(error))}'
+
+
+def error_class(fingerprint: str) -> str:
+    """Класс ошибки из отпечатка."""
+    return fingerprint.split(':', 1)[0]
+
+
+@dataclass
+class AlertWindow:
+    """Подавление повторных уведомлений об ошибках одного пользователя.
+
+    Об ошибке с данным отпечатком сообщается не чаще раза за window
+    секунд, повторы только подсчитываются. Через window секунд после
+    первого подавленного повтора digest возвращает сводку по классам
+    ошибок, например «EndpointNotAvailable ×37».
+    """
+
+    window: float = field(default_factory=lambda: ALERT_WINDOW)
+    sent: Dict[str, float] = field(default_factory=dict)
+    suppressed: Dict[str, int] = field(default_factory=dict)
+    digest_started: float = 0.0
+
+    def should_send(self, fingerprint: str, now: float) -> bool:
+        """True, если об ошибке нужно сообщить сейчас."""
+        self.sent = {
+            known: sent_at for known, sent_at in self.sent.items()
+            if now - sent_at < self.window
+        }
+        if fingerprint not in self.sent:
+            self.sent[fingerprint] = now
+            return True
+        if not self.suppressed:
+            self.digest_started = now
+        self.suppressed[fingerprint] = self.suppressed.get(fingerprint, 0) + 1
+        return False
+
+    def digest(self, now: float) -> Optional[str]:
+        """Сводка подавленных повторов, если окно истекло."""
+        if not self.suppressed or now - self.digest_started < self.window:
+            return None
+        counts = Counter()
+        for fingerprint, count in self.suppressed.items():
+            counts[error_class(fingerprint)] += count
+        self.suppressed = {}
+        lines = [
+            f'{name} ×{count}' for name, count in counts.most_common()
+        ]
+        minutes = round((now - self.digest_started) / 60)
+        return (f'Повторы ошибок за последние {minutes} мин:\n'
+                + '\n'.join(lines))
+
+    def snapshot(self) -> dict:
+        """Состояние для StateJournal."""
+        return {
+            'sent': dict(self.sent),
+            'suppressed': dict(self.suppressed),
+            'digest_started': self.digest_started,
+        }
+
+    def restore(self, snapshot: dict) -> None:
+        """Восстанавливает состояние из снимка."""
+        self.sent = dict(snapshot.get('sent', {}))
+        self.suppressed = dict(snapshot.get('suppressed', {}))
+        self.digest_started = snapshot.get('digest_started', 0.0)
@@ -0,0 +1,89 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+from os.path import abspath, dirname, join
+
+import pytest
+
+root_dir = dirname(dirname(abspath(__file__)))
+sys.path.append(root_dir)
+sys.path.append(dirname(abspath(__file__)))
+
+from tests.fixtures.fixture_data import (homeworks_factory,  # noqa: E402,F401
+                                         random_timestamp)
+
+BASELINE_FILE = join(dirname(abspath(__file__)), 'baseline.json')
+LATEST_FILE = join(dirname(abspath(__file__)), 'latest.json')
+TOLERANCE = float(os.getenv('BENCH_TOLERANCE', 3))
+UPDATE_BASELINE = os.getenv('BENCH_UPDATE_BASELINE') == '1'
+MIN_TIME = float(os.getenv('BENCH_MIN_TIME', 0.2))
+MEMORY_SLACK = 4096
+
+
+def measure(func):
+    """Среднее время вызова func и пик выделенной памяти."""
+    func()
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_TIME:
+            break
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds_per_call': elapsed / calls, 'peak_bytes': peak}
+
+
+def load_results(path):
+    """Результаты замеров из path; без файла пустой словарь."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+@pytest.fixture(scope='session')
+def bench_results():
+    """Собирает замеры сессии и пишет их в latest.json."""
+    results = {}
+    yield results
+    paths = [LATEST_FILE] + ([BASELINE_FILE] if UPDATE_BASELINE else [])
+    for path in paths:
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+            file.write('\n')
+
+
+@pytest.fixture
+def benchmark(bench_results):
+    """Замер с проверкой против baseline.json."""
+    baseline = load_results(BASELINE_FILE)
+
+    def run(name, size, func):
+        result = measure(func)
+        bench_results.setdefault(name, {})[str(size)] = result
+        expected = baseline.get(name, {}).get(str(size))
+        if expected is None or UPDATE_BASELINE:
+            return result
+        assert (result['seconds_per_call']
+                <= expected['seconds_per_call'] * TOLERANCE), (
+            f'{name}[{size}] стал медленнее: '
+            f'{result["seconds_per_call"]:.6f} с против '
+            f'{expected["seconds_per_call"]:.6f} с в baseline.json'
+        )
+        assert (result['peak_bytes']
+                <= expected['peak_bytes'] * TOLERANCE + MEMORY_SLACK), (
+            f'{name}[{size}] выделяет больше памяти: '
+            f'{result["peak_bytes"]} байт против '
+            f'{expected["peak_bytes"]} байт в baseline.json'
+        )
+        return result
+
+    return run
@@ -0,0 +1,255 @@
+"""Локальные заменители API Практикума и Telegram Bot API."""
+import json
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+HOMEWORK_PATH = '/api/user_api/homework_statuses/'
+NEXT_STATUS = {
+    'reviewing': ('approved', 'rejected'),
+    'rejected': ('reviewing',),
+    'approved': ('approved',),
+}
+
+
+@dataclass
+class Burst:
+    """Всплеск ошибок, когда сервер отвечает status на каждый запрос.
+
+    Длится с start по start + duration секунд от запуска сервера.
+    """
+
+    start: float
+    duration: float
+    status: int
+    retry_after: int = 1
+
+
+@dataclass
+class FaultProfile:
+    """Задержки и ошибки, которые сервер добавляет к ответам."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    bursts: List[Burst] = field(default_factory=list)
+
+    def active_burst(self, elapsed: float) -> Optional[Burst]:
+        """Всплеск ошибок, идущий в момент elapsed."""
+        for burst in self.bursts:
+            if burst.start <= elapsed < burst.start + burst.duration:
+                return burst
+        return None
+
+
+class FakeServer(ABC):
+    """Общая часть: HTTP-сервер в отдельном потоке на свободном порту."""
+
+    def __init__(self, faults: Optional[FaultProfile] = None,
+                 seed: Optional[int] = None) -> None:
+        """Готовит сервер; слушать он начнёт в start()."""
+        self.faults = faults or FaultProfile()
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.started_at = time.time()
+        self._server = ThreadingHTTPServer(
+            ('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Адрес сервера."""
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeServer':
+        """Запускает сервер."""
+        self.started_at = time.time()
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Останавливает сервер."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def inject_fault(self) -> Optional[Tuple[int, dict]]:
+        """Задержка и, если выпало, ошибочный ответ (код, тело)."""
+        faults = self.faults
+        with self.lock:
+            self.requests += 1
+            delay = faults.latency + faults.jitter * self.random.random()
+            failed = self.random.random() < faults.error_rate
+        if delay:
+            time.sleep(delay)
+        burst = faults.active_burst(time.time() - self.started_at)
+        if burst is not None:
+            return burst.status, self.error_body(burst)
+        if failed:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'fault'}
+        return None
+
+    def error_body(self, burst: Burst) -> dict:
+        """Тело ответа во время всплеска ошибок."""
+        return {'error': 'burst'}
+
+    @abstractmethod
+    def handle(self, handler: BaseHTTPRequestHandler) -> Tuple[int, dict]:
+        """Ответ на запрос: код и JSON-тело."""
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self):
+                length = int(self.headers.get('Content-Length', 0))
+                self.body = self.rfile.read(length)
+                fault = fake.inject_fault()
+                status, body = fault or fake.handle(self)
+                payload = json.dumps(body, ensure_ascii=False).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        Handler.protocol_version = 'HTTP/1.1'
+        return Handler
+
+
+class FakePracticum(FakeServer):
+    """Заменитель API Практикум.Домашки.
+
+    У каждого токена homeworks_per_tenant работ. На каждый запрос с
+    вероятностью change_probability одна из работ меняет статус. Ответ,
+    как у настоящего API, содержит работы, изменённые после from_date.
+    Времена изменений по ключу (токен, работа, статус) копятся в changes
+    для подсчёта задержки доставки.
+    """
+
+    def __init__(self, homeworks_per_tenant: int = 3,
+                 change_probability: float = 0.3, comment_size: int = 100,
+                 **kwargs) -> None:
+        """Задаёт число работ на пользователя и частоту смены статуса."""
+        super().__init__(**kwargs)
+        self.homeworks_per_tenant = homeworks_per_tenant
+        self.change_probability = change_probability
+        self.comment = 'x' * comment_size
+        self.homeworks: Dict[str, List[dict]] = {}
+        self.changes: Dict[Tuple[str, str, str], List[float]] = {}
+
+    @property
+    def endpoint(self) -> str:
+        """Адрес, который нужно подставить в homework.ENDPOINT."""
+        return self.url + HOMEWORK_PATH
+
+    def error_body(self, burst: Burst) -> dict:
+        """Тело ответа во время всплеска ошибок."""
+        return {'code': 'UnknownError', 'message': 'burst'}
+
+    def _homeworks_for(self, token: str) -> List[dict]:
+        homeworks = self.homeworks.get(token)
+        if homeworks is None:
+            homeworks = [
+                {
+                    'id': number,
+                    'homework_name': f'{token}_{number}.zip',
+                    'status': 'reviewing',
+                    'reviewer_comment': self.comment,
+                    'lesson_name': 'Итоговый проект',
+                    'updated': 0,
+                }
+                for number in range(self.homeworks_per_tenant)
+            ]
+            self.homeworks[token] = homeworks
+        return homeworks
+
+    def handle(self, handler: BaseHTTPRequestHandler) -> Tuple[int, dict]:
+        """Ответ API: работы, изменившиеся после from_date."""
+        parts = urlsplit(handler.path)
+        authorization = handler.headers.get('Authorization', '')
+        if parts.path != HOMEWORK_PATH or not authorization.startswith(
+                'OAuth '):
+            return HTTPStatus.UNAUTHORIZED, {'code': 'not_authenticated'}
+        token = authorization[len('OAuth '):]
+        from_date = int(parse_qs(parts.query).get('from_date', ['0'])[0])
+        now = time.time()
+        with self.lock:
+            homeworks = self._homeworks_for(token)
+            if self.random.random() < self.change_probability:
+                homework = self.random.choice(homeworks)
+                homework['status'] = self.random.choice(
+                    NEXT_STATUS[homework['status']])
+                homework['updated'] = int(now)
+                key = (token, homework['homework_name'], homework['status'])
+                self.changes.setdefault(key, []).append(now)
+            changed = [
+                {name: value for name, value in homework.items()
+                 if name != 'updated'}
+                for homework in homeworks
+                if homework['updated'] >= from_date
+            ]
+        return HTTPStatus.OK, {'homeworks': changed, 'current_date': int(now)}
+
+
+class FakeTelegram(FakeServer):
+    """Заменитель Telegram Bot API: принимает sendMessage и запоминает их.
+
+    Во время всплеска с кодом 429 отвечает как Telegram при флуде, и
+    python-telegram-bot поднимает RetryAfter.
+    """
+
+    def __init__(self, **kwargs) -> None:
+        """Создаёт сервер без принятых сообщений."""
+        super().__init__(**kwargs)
+        self.messages: List[Tuple[str, str, float]] = []
+
+    @property
+    def base_url(self) -> str:
+        """Значение base_url для telegram.Bot."""
+        return self.url + '/bot'
+
+    def error_body(self, burst: Burst) -> dict:
+        """Тело ответа во время всплеска ошибок."""
+        if burst.status == HTTPStatus.TOO_MANY_REQUESTS:
+            return {
+                'ok': False, 'error_code': 429,
+                'description': f'Too Many Requests: retry after '
+                               f'{burst.retry_after}',
+                'parameters': {'retry_after': burst.retry_after},
+            }
+        return {'ok': False, 'error_code': burst.status,
+                'description': 'Internal Server Error'}
+
+    def handle(self, handler: BaseHTTPRequestHandler) -> Tuple[int, dict]:
+        """Ответ на sendMessage в формате Bot API."""
+        if not re.match(r'^/bot[^/]+/sendMessage$', handler.path):
+            return HTTPStatus.NOT_FOUND, {
+                'ok': False, 'error_code': 404, 'description': 'Not Found'}
+        data = json.loads(handler.body or b'{}')
+        now = time.time()
+        with self.lock:
+            self.messages.append((str(data['chat_id']), data['text'], now))
+            message_id = len(self.messages)
+        return HTTPStatus.OK, {'ok': True, 'result': {
+            'message_id': message_id,
+            'date': int(now),
+            'chat': {'id': int(data['chat_id']), 'type': 'private'},
+            'text': data['text'],
+        }}
@@ -0,0 +1,202 @@
+"""Нагрузочная симуляция: N пользователей против локальных заменителей API.
+
+Пример:
+    python benchmarks/loadsim.py --tenants 500 --duration 30 --interval 1 \
+        --api-error-rate 0.05 --tg-burst 10:3:429
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import telegram  # noqa: E402
+
+import homework  # noqa: E402
+import transport  # noqa: E402
+from engine import PollingEngine  # noqa: E402
+from fakes import Burst, FakePracticum, FakeTelegram, FaultProfile  # noqa
+from intervals import FixedInterval  # noqa: E402
+from outbound import OutboundQueue  # noqa: E402
+from outbox import Outbox  # noqa: E402
+
+NOTIFICATION = re.compile(r'^Изменился статус проверки работы "(.+)"\. (.+)$')
+STATUS_BY_VERDICT = {
+    verdict: status for status, verdict in homework.HOMEWORK_STATUSES.items()
+}
+
+
+def parse_burst(value: str) -> Burst:
+    """Разбирает всплеск из строки START:DURATION:STATUS."""
+    start, duration, status = value.split(':')
+    return Burst(float(start), float(duration), int(status))
+
+
+def percentile(samples: List[float], share: float) -> float:
+    """Перцентиль share (от 0 до 1) по отсортированной выборке."""
+    if not samples:
+        return 0.0
+    index = max(math.ceil(share * len(samples)) - 1, 0)
+    return samples[index]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 в миллисекундах."""
+    samples = sorted(samples)
+    return {
+        f'p{int(share * 100)}_ms': round(percentile(samples, share) * 1000, 2)
+        for share in (0.5, 0.95, 0.99)
+    }
+
+
+def delivery_lags(practicum: FakePracticum,
+                  telegram_fake: FakeTelegram,
+                  tokens_by_chat: Dict[str, str]) -> List[float]:
+    """Время от изменения статуса на сервере до получения в Telegram."""
+    lags = []
+    for chat_id, text, received_at in telegram_fake.messages:
+        token = tokens_by_chat.get(chat_id)
+        for line in text.split('\n\n'):
+            match = NOTIFICATION.match(line)
+            if token is None or match is None:
+                continue
+            name, verdict = match.groups()
+            key = (token, name, STATUS_BY_VERDICT.get(verdict))
+            changed = practicum.changes.get(key)
+            if changed:
+                lags.append(received_at - changed.pop(0))
+    return lags
+
+
+async def run_for(engine: PollingEngine, duration: float) -> None:
+    """Крутит движок опроса duration секунд."""
+    try:
+        await asyncio.wait_for(engine.run(), duration)
+    except asyncio.TimeoutError:
+        pass
+
+
+def simulate(options: argparse.Namespace) -> dict:
+    """Прогоняет симуляцию и возвращает отчёт."""
+    practicum = FakePracticum(
+        homeworks_per_tenant=options.homeworks,
+        change_probability=options.change_probability,
+        comment_size=options.comment_size,
+        faults=FaultProfile(
+            options.api_latency, options.api_jitter,
+            options.api_error_rate, options.api_burst),
+        seed=options.seed).start()
+    telegram_fake = FakeTelegram(
+        faults=FaultProfile(
+            options.tg_latency, options.tg_jitter,
+            options.tg_error_rate, options.tg_burst),
+        seed=options.seed).start()
+    endpoint, homework.ENDPOINT = homework.ENDPOINT, practicum.endpoint
+    http = transport.configure_transport(pool_size=options.concurrency)
+    bot = telegram.Bot(
+        token='123456:simulated', base_url=telegram_fake.base_url,
+        request=http.telegram_request())
+    outbound = OutboundQueue(
+        bot, per_chat_rate=options.tg_chat_rate,
+        global_rate=options.tg_global_rate)
+    outbound.start()
+
+    cycle_latencies: List[float] = []
+    failed_cycles = []
+    lock = threading.Lock()
+
+    def timed_poll(sender, tenant):
+        started = time.perf_counter()
+        changes = homework.poll_tenant(sender, tenant)
+        with lock:
+            cycle_latencies.append(time.perf_counter() - started)
+            if changes is None:
+                failed_cycles.append(tenant.chat_id)
+        return changes
+
+    tenants = [
+        homework.Tenant(
+            f'token{number}', str(number + 1),
+            interval_policy=FixedInterval(options.interval))
+        for number in range(options.tenants)
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        outbox = Outbox(os.path.join(directory, 'outbox.jsonl'), outbound)
+        outbox.start()
+        engine = PollingEngine(
+            outbox, tenants, concurrency=options.concurrency, poll=timed_poll)
+        started = time.perf_counter()
+        asyncio.run(run_for(engine, options.duration))
+        elapsed = time.perf_counter() - started
+        drained = outbound.close(timeout=options.drain)
+        outbox.close()
+    practicum.stop()
+    telegram_fake.stop()
+    homework.ENDPOINT = endpoint
+
+    lags = delivery_lags(
+        practicum, telegram_fake,
+        {tenant.chat_id: tenant.token for tenant in tenants})
+    return {
+        'tenants': options.tenants,
+        'duration_s': round(elapsed, 2),
+        'cycles': len(cycle_latencies),
+        'failed_cycles': len(failed_cycles),
+        'throughput_cycles_per_s': round(len(cycle_latencies) / elapsed, 1),
+        'cycle_latency': latency_summary(cycle_latencies),
+        'api_requests': practicum.requests,
+        'telegram_requests': telegram_fake.requests,
+        'messages_delivered': len(telegram_fake.messages),
+        'notifications_matched': len(lags),
+        'delivery_lag': latency_summary(lags),
+        'outbound_drained': drained,
+    }
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Параметры симуляции из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--interval', type=float, default=1)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--homeworks', type=int, default=3)
+    parser.add_argument('--change-probability', type=float, default=0.3)
+    parser.add_argument('--comment-size', type=int, default=100)
+    parser.add_argument('--api-latency', type=float, default=0.01)
+    parser.add_argument('--api-jitter', type=float, default=0.02)
+    parser.add_argument('--api-error-rate', type=float, default=0.0)
+    parser.add_argument('--api-burst', type=parse_burst, action='append',
+                        default=[], help='START:DURATION:STATUS')
+    parser.add_argument('--tg-latency', type=float, default=0.01)
+    parser.add_argument('--tg-jitter', type=float, default=0.02)
+    parser.add_argument('--tg-error-rate', type=float, default=0.0)
+    parser.add_argument('--tg-burst', type=parse_burst, action='append',
+                        default=[], help='START:DURATION:STATUS')
+    parser.add_argument('--tg-chat-rate', type=float, default=1)
+    parser.add_argument('--tg-global-rate', type=float, default=30)
+    parser.add_argument('--drain', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--log-level', default='CRITICAL')
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> None:
+    """Запускает симуляцию и печатает отчёт в JSON."""
+    options = parse_args(argv)
+    logging.getLogger().setLevel(options.log_level)
+    print(json.dumps(simulate(options), indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,17 @@
+import loadsim
+
+
+def test_simulation_delivers_notifications():
+    """Короткая симуляция доставляет уведомления без сбоев."""
+    options = loadsim.parse_args([
+        '--tenants', '20', '--duration', '2', '--interval', '0.2',
+        '--change-probability', '1', '--tg-global-rate', '1000',
+        '--tg-chat-rate', '100', '--seed', '1',
+    ])
+
+    report = loadsim.simulate(options)
+
+    assert report['cycles'] >= 20
+    assert report['failed_cycles'] == 0
+    assert report['notifications_matched'] > 0
+    assert report['outbound_drained']
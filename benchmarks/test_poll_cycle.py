@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+import homework
+from streaming import HomeworkStream
+
+SIZES = [1, 100, 10000]
+
+
+class NullBot:
+    """Бот, который ничего не отправляет."""
+
+    def send_message(self, chat_id, text):
+        """Отбрасывает сообщение."""
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_check_response(benchmark, homeworks_factory, size):
+    """Проверка ответа API на size работах."""
+    response = {'homeworks': homeworks_factory(size), 'current_date': 1}
+
+    benchmark('check_response', size,
+              lambda: homework.check_response(response))
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_parse_status(benchmark, homeworks_factory, size):
+    """Разбор статусов size работ."""
+    homeworks = homeworks_factory(size)
+
+    def parse_all():
+        for item in homeworks:
+            homework.parse_status(item)
+
+    benchmark('parse_status', size, parse_all)
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_build_messages(benchmark, homeworks_factory, monkeypatch, size):
+    """Цикл опроса одного пользователя с size работами."""
+    response = {'homeworks': homeworks_factory(size), 'current_date': 1}
+    monkeypatch.setattr(
+        homework, 'fetch_homework_statuses',
+        lambda timestamp, headers: response)
+    monkeypatch.setattr(homework.logging, 'info', lambda *args: None)
+    bot = NullBot()
+
+    def cycle():
+        homework.process_response(bot, homework.Tenant('token', '1'))
+
+    benchmark('build_messages', size, cycle)
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_stream_parse(benchmark, homeworks_factory, size):
+    """Потоковый разбор ответа с size работами."""
+    body = json.dumps(
+        {'homeworks': homeworks_factory(size), 'current_date': 1}).encode()
+    chunk = homework.STREAM_CHUNK_SIZE
+    chunks = [body[start:start + chunk]
+              for start in range(0, len(body), chunk)]
+
+    benchmark('stream_parse', size,
+              lambda: sum(1 for _ in HomeworkStream(chunks)))
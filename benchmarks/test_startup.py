@@ -0,0 +1,49 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import root_dir
+
+IMPORT_BUDGET = float(os.getenv('BENCH_IMPORT_BUDGET', 0.3))
+IMPORT_RUNS = 5
+HEAVY_MODULES = ('telegram', 'requests', 'dotenv')
+MEASURE_IMPORT = (
+    'import json, sys, time\n'
+    'started = time.perf_counter()\n'
+    'import {module}\n'
+    'elapsed = time.perf_counter() - started\n'
+    'print(json.dumps([elapsed, sorted(sys.modules)]))\n'
+)
+
+
+def import_in_subprocess(module):
+    """Время импорта module в чистом процессе и загруженные модули."""
+    output = subprocess.run(
+        [sys.executable, '-c', MEASURE_IMPORT.format(module=module)],
+        cwd=root_dir, check=True, capture_output=True, text=True,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1'),
+    ).stdout
+    return json.loads(output)
+
+
+@pytest.mark.parametrize('module', ['homework', 'engine'])
+def test_import_time(bench_results, module):
+    """Импорт не тянет тяжёлые зависимости и укладывается в бюджет."""
+    runs = [import_in_subprocess(module) for _ in range(IMPORT_RUNS)]
+    elapsed = min(seconds for seconds, _ in runs)
+    loaded = set(runs[0][1])
+    bench_results.setdefault('import', {})[module] = {
+        'seconds_per_call': elapsed}
+
+    assert not loaded.intersection(HEAVY_MODULES), (
+        f'import {module} загружает '
+        f'{sorted(loaded.intersection(HEAVY_MODULES))}, они нужны только '
+        'при запуске бота'
+    )
+    assert elapsed <= IMPORT_BUDGET, (
+        f'import {module} занимает {elapsed:.3f} с, '
+        f'бюджет {IMPORT_BUDGET} с'
+    )
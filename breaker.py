@@ -0,0 +1,132 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения."""
+    global BREAKER_FAILURE_THRESHOLD, BREAKER_RECOVERY_TIMEOUT
+    global BREAKER_MAX_RECOVERY_TIMEOUT
+    BREAKER_FAILURE_THRESHOLD = int(
+        os.getenv('BREAKER_FAILURE_THRESHOLD', 5))
+    BREAKER_RECOVERY_TIMEOUT = float(
+        os.getenv('BREAKER_RECOVERY_TIMEOUT', 60))
+    BREAKER_MAX_RECOVERY_TIMEOUT = float(
+        os.getenv('BREAKER_MAX_RECOVERY_TIMEOUT', 600))
+
+
+load_settings()
+
+
+class CircuitBreaker:
+    """Предохранитель для запросов к одному сервису.
+
+    В закрытом состоянии запросы проходят, а подряд идущие сбои
+    считаются. После failure_threshold сбоев предохранитель открывается
+    и allow возвращает False без обращения к сети. Через
+    recovery_timeout секунд он становится полуоткрытым и пропускает
+    ровно один пробный запрос: успех закрывает предохранитель, сбой
+    снова открывает его с удвоенным, но не больше max_recovery_timeout,
+    временем ожидания.
+    """
+
+    def __init__(self, failure_threshold: Optional[int] = None,
+                 recovery_timeout: Optional[float] = None,
+                 max_recovery_timeout: Optional[float] = None,
+                 name: str = 'api',
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Создаёт замкнутый предохранитель."""
+        if failure_threshold is None:
+            failure_threshold = BREAKER_FAILURE_THRESHOLD
+        if recovery_timeout is None:
+            recovery_timeout = BREAKER_RECOVERY_TIMEOUT
+        if max_recovery_timeout is None:
+            max_recovery_timeout = BREAKER_MAX_RECOVERY_TIMEOUT
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max_recovery_timeout
+        self.name = name
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._timeout = recovery_timeout
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние: closed, half_open или open."""
+        with self._lock:
+            if self._state == OPEN and self._recovery_due():
+                return HALF_OPEN
+            return self._state
+
+    def state_code(self) -> int:
+        """Состояние числом для метрик: 0, 1 или 2."""
+        return STATE_CODES[self.state]
+
+    def retry_in(self) -> float:
+        """Через сколько секунд будет разрешён пробный запрос."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(self._opened_at + self._timeout - self._clock(), 0.0)
+
+    def allow(self) -> bool:
+        """Можно ли сейчас делать запрос."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            now = self._clock()
+            if self._state == OPEN:
+                if not self._recovery_due():
+                    return False
+                self._state = HALF_OPEN
+                logging.info('Предохранитель %s полуоткрыт, пробный запрос',
+                             self.name)
+            elif (self._probe_started is not None
+                    and now - self._probe_started < self._timeout):
+                return False
+            self._probe_started = now
+            return True
+
+    def record_success(self) -> None:
+        """Отмечает успешный запрос."""
+        with self._lock:
+            if self._state != CLOSED:
+                logging.info('Предохранитель %s закрыт', self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._timeout = self.recovery_timeout
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        """Отмечает сбой запроса."""
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN:
+                self._timeout = min(
+                    self._timeout * 2, self.max_recovery_timeout)
+                self._open()
+            elif (self._state == CLOSED
+                    and self._failures >= self.failure_threshold):
+                self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._probe_started = None
+        logging.warning(
+            'Предохранитель %s открыт после %d сбоев подряд на %.0f с',
+            self.name, self._failures, self._timeout)
+
+    def _recovery_due(self) -> bool:
+        return self._clock() - self._opened_at >= self._timeout
@@ -0,0 +1,77 @@
+import threading
+import time
+from typing import Callable, Optional
+
+
+class Clock:
+    """Системные часы: настоящее время и настоящее ожидание.
+
+    Всё, что цикл опроса знает о времени, он берёт отсюда: time для
+    курсора API и отметок в сообщениях, monotonic для сроков, wait для
+    ожидания следующего цикла. Подменив часы на VirtualClock, можно
+    прогнать сутки опроса за доли секунды.
+    """
+
+    def time(self) -> float:
+        """Текущее время в секундах эпохи Unix."""
+        return time.time()
+
+    def monotonic(self) -> float:
+        """Монотонные секунды для сроков и интервалов."""
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        """Ждёт seconds секунд."""
+        time.sleep(seconds)
+
+    def wait(self, condition: threading.Condition,
+             predicate: Callable[[], bool],
+             timeout: Optional[float]) -> bool:
+        """Ждёт predicate на захваченном condition не дольше timeout."""
+        return condition.wait_for(predicate, timeout)
+
+
+class VirtualClock(Clock):
+    """Часы, время на которых идёт только тогда, когда его ждут.
+
+    sleep и wait не блокируют поток, а сразу переводят часы вперёд на
+    время ожидания, так что цикл с интервалом в десять минут проходит
+    тысячи раз в секунду. wait, как и настоящий, возвращается сразу,
+    если predicate уже выполнен.
+    """
+
+    def __init__(self, start: float = 0.0, epoch: float = 0.0) -> None:
+        """Запускает часы с момента start от эпохи epoch."""
+        self._lock = threading.Lock()
+        self._now = start
+        self._epoch = epoch
+
+    def time(self) -> float:
+        """Виртуальное время Unix: epoch плюс прошедшие секунды."""
+        return self._epoch + self._now
+
+    def monotonic(self) -> float:
+        """Виртуальные секунды с запуска часов."""
+        return self._now
+
+    def advance(self, seconds: float) -> None:
+        """Переводит часы на seconds секунд вперёд."""
+        with self._lock:
+            self._now += max(seconds, 0.0)
+
+    def sleep(self, seconds: float) -> None:
+        """Переводит часы вперёд вместо ожидания."""
+        self.advance(seconds)
+
+    def wait(self, condition: threading.Condition,
+             predicate: Callable[[], bool],
+             timeout: Optional[float]) -> bool:
+        """Переводит часы на timeout, если predicate ещё не выполнен."""
+        if predicate():
+            return True
+        if timeout is not None:
+            self.advance(timeout)
+        return predicate()
+
+
+SYSTEM_CLOCK = Clock()
@@ -0,0 +1,270 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import (TYPE_CHECKING, Callable, Deque, Dict, Iterable, List,
+                    Optional, Tuple)
+
+from diff import homework_key
+
+if TYPE_CHECKING:
+    from telegram.ext import Updater
+
+TIME_FORMAT = '%d.%m %H:%M'
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения."""
+    global STATUS_MAX_AGE, STATUS_REVALIDATE_INTERVAL, HISTORY_SIZE
+    STATUS_MAX_AGE = float(os.getenv('STATUS_MAX_AGE', 900))
+    STATUS_REVALIDATE_INTERVAL = float(
+        os.getenv('STATUS_REVALIDATE_INTERVAL', 60))
+    HISTORY_SIZE = int(os.getenv('HISTORY_SIZE', 20))
+
+
+load_settings()
+
+
+def format_time(timestamp: float) -> str:
+    """Дата и время для ответа пользователю."""
+    return time.strftime(TIME_FORMAT, time.localtime(timestamp))
+
+
+@dataclass
+class CachedStatuses:
+    """Известные статусы работ одного чата и последние изменения."""
+
+    homeworks: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+    history: Deque[Tuple[float, str, str]] = field(
+        default_factory=lambda: deque(maxlen=HISTORY_SIZE))
+    updated_at: Optional[float] = None
+
+
+class StatusCache:
+    """Статусы работ по чатам, которые заполняет цикл опроса.
+
+    Команды бота читают только этот кэш и никогда не ходят в API сами.
+    """
+
+    def __init__(self, history_size: Optional[int] = None,
+                 clock: Callable[[], float] = time.time) -> None:
+        """Создаёт пустой кэш статусов."""
+        self.history_size = (
+            HISTORY_SIZE if history_size is None else history_size)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._chats: Dict[str, CachedStatuses] = {}
+
+    def record(self, chat_id: str, homeworks: Iterable[dict],
+               complete: bool = False) -> None:
+        """Запоминает полученные работы.
+
+        complete означает полный список работ, а не только изменения:
+        он заменяет кэш, а в историю попадают лишь расхождения с ним.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._chats.get(chat_id)
+            if entry is None:
+                entry = CachedStatuses(
+                    history=deque(maxlen=self.history_size))
+                self._chats[chat_id] = entry
+            known = entry.homeworks
+            if complete:
+                entry.homeworks = {}
+            for homework in homeworks:
+                key = homework_key(homework)
+                name, status = homework.get('homework_name'), homework.get(
+                    'status')
+                previous = known.get(key)
+                if previous is None and not complete or (
+                        previous is not None and previous[1] != status):
+                    entry.history.append((now, name, status))
+                entry.homeworks[key] = (name, status)
+            if complete or entry.homeworks:
+                entry.updated_at = now
+
+    def seed(self, chat_id: str, statuses: Dict[str, str],
+             updated_at: float) -> None:
+        """Заполняет пустой кэш чата статусами, восстановленными из журнала.
+
+        Названий работ в журнале нет, поэтому до первого обновления
+        вместо них показываются ключи.
+        """
+        if not statuses:
+            return
+        with self._lock:
+            if chat_id in self._chats:
+                return
+            self._chats[chat_id] = CachedStatuses(
+                {key: (key, status) for key, status in statuses.items()},
+                deque(maxlen=self.history_size), updated_at)
+
+    def get(self, chat_id: str) -> Optional[CachedStatuses]:
+        """Копия кэша чата или None, если данных ещё нет."""
+        with self._lock:
+            entry = self._chats.get(chat_id)
+            if entry is None:
+                return None
+            return CachedStatuses(
+                dict(entry.homeworks), deque(entry.history),
+                entry.updated_at)
+
+    def age(self, chat_id: str) -> float:
+        """Сколько секунд назад обновлялись данные чата."""
+        with self._lock:
+            entry = self._chats.get(chat_id)
+            if entry is None or entry.updated_at is None:
+                return float('inf')
+            return self._clock() - entry.updated_at
+
+
+class Revalidator:
+    """Фоновое обновление кэша, не больше одного запроса на чат.
+
+    Пока обновление чата идёт или прошло меньше min_interval секунд с
+    прошлого, новые просьбы игнорируются, так что поток команд не
+    превращается в поток запросов к API.
+    """
+
+    def __init__(self, cache: StatusCache, fetch: Callable[..., List[dict]],
+                 min_interval: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Создаёт обновление кэша cache через fetch."""
+        self.cache = cache
+        self.fetch = fetch
+        self.min_interval = (
+            STATUS_REVALIDATE_INTERVAL if min_interval is None
+            else min_interval)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._requested: Dict[str, float] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='revalidate')
+
+    def request(self, tenant) -> bool:
+        """Просит обновить кэш чата; True, если запрос поставлен."""
+        now = self._clock()
+        chat_id = tenant.chat_id
+        with self._lock:
+            last = self._requested.get(chat_id)
+            if chat_id in self._in_flight or (
+                    last is not None and now - last < self.min_interval):
+                return False
+            self._in_flight.add(chat_id)
+            self._requested[chat_id] = now
+        self._executor.submit(self._revalidate, tenant)
+        return True
+
+    def _revalidate(self, tenant) -> None:
+        try:
+            self.cache.record(
+                tenant.chat_id, self.fetch(tenant), complete=True)
+        except Exception as error:
+            logging.warning('Не удалось обновить статусы чата %s: %s',
+                            tenant.chat_id, error)
+        finally:
+            with self._lock:
+                self._in_flight.discard(tenant.chat_id)
+
+    def close(self) -> None:
+        """Дожидается текущих обновлений."""
+        self._executor.shutdown(wait=True)
+
+
+class CommandService:
+    """Ответы на /status и /history из кэша с обновлением в фоне.
+
+    Свежие данные отдаются как есть. Устаревшие (старше max_age) тоже
+    отдаются сразу, но параллельно ставится обновление через
+    Revalidator. Ответы уходят через sender, как и уведомления.
+    """
+
+    def __init__(self, cache: StatusCache, tenants: Iterable, sender,
+                 revalidator: Revalidator,
+                 statuses: Dict[str, str],
+                 max_age: Optional[float] = None) -> None:
+        """Связывает кэш, пользователей и отправку ответов."""
+        self.cache = cache
+        self.tenants = {}
+        for tenant in tenants:
+            self.add_tenant(tenant)
+        self.sender = sender
+        self.revalidator = revalidator
+        self.statuses = statuses
+        self.max_age = STATUS_MAX_AGE if max_age is None else max_age
+
+    def add_tenant(self, tenant) -> None:
+        """Подключает чат к командам, заполняя кэш его статусами.
+
+        Статусы, восстановленные из журнала, отдаются сразу, до первого
+        опроса после перезапуска.
+        """
+        self.tenants[tenant.chat_id] = tenant
+        self.cache.seed(
+            tenant.chat_id, tenant.statuses, tenant.current_timestamp)
+
+    def remove_tenant(self, chat_id: str) -> None:
+        """Отключает чат от команд."""
+        self.tenants.pop(chat_id, None)
+
+    def status(self, chat_id: str) -> str:
+        """Текст ответа на /status."""
+        entry = self._lookup(chat_id)
+        if entry is None or not entry.homeworks:
+            return 'Данных о работах пока нет, запросил обновление.'
+        lines = [f'Статусы работ на {format_time(entry.updated_at)}:']
+        lines.extend(
+            f'{name}: {self.statuses.get(status, status)}'
+            for name, status in sorted(entry.homeworks.values()))
+        return '\n'.join(lines)
+
+    def history(self, chat_id: str) -> str:
+        """Текст ответа на /history."""
+        entry = self._lookup(chat_id)
+        if entry is None or not entry.history:
+            return 'Изменений статусов пока не было.'
+        lines = ['Последние изменения:']
+        lines.extend(
+            f'{format_time(changed_at)} {name}: '
+            f'{self.statuses.get(status, status)}'
+            for changed_at, name, status in reversed(entry.history))
+        return '\n'.join(lines)
+
+    def reply(self, chat_id: str, command: str) -> None:
+        """Отвечает на команду в чат."""
+        if chat_id not in self.tenants:
+            text = 'Этот чат не подключён к боту.'
+        elif command == 'history':
+            text = self.history(chat_id)
+        else:
+            text = self.status(chat_id)
+        self.sender.send_message(chat_id, text)
+
+    def start(self, bot) -> 'Updater':
+        """Запускает приём команд долгим опросом getUpdates."""
+        from telegram.ext import CommandHandler, Updater
+
+        updater = Updater(bot=bot, use_context=True)
+        for command in ('status', 'history'):
+            updater.dispatcher.add_handler(
+                CommandHandler(command, self._handler(command)))
+        updater.start_polling()
+        logging.info('Бот принимает команды /status и /history')
+        return updater
+
+    def _handler(self, command: str):
+        def handle(update, context):
+            self.reply(str(update.effective_chat.id), command)
+        return handle
+
+    def _lookup(self, chat_id: str) -> Optional[CachedStatuses]:
+        entry = self.cache.get(chat_id)
+        if entry is None or not entry.homeworks or (
+                self.cache.age(chat_id) > self.max_age):
+            self.revalidator.request(self.tenants[chat_id])
+        return entry
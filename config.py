@@ -0,0 +1,81 @@
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения."""
+    global ENV_FILE, CONFIG_CHECK_INTERVAL
+    ENV_FILE = os.getenv('ENV_FILE', '.env')
+    CONFIG_CHECK_INTERVAL = float(os.getenv('CONFIG_CHECK_INTERVAL', 30))
+
+
+load_settings()
+
+
+class WatchedFile:
+    """Файл, изменение которого видно по mtime и размеру, без чтения."""
+
+    def __init__(self, path: str) -> None:
+        """Запоминает путь; файл ещё не проверялся."""
+        self.path = path
+        self._signature = self._stat()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed(self) -> bool:
+        """Изменился ли файл с прошлой проверки."""
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+
+
+def read_env_file(path: str) -> Dict[str, Optional[str]]:
+    """Переменные из env-файла; пустой словарь, если файла нет."""
+    from dotenv import dotenv_values
+
+    return dict(dotenv_values(path))
+
+
+def diff_values(old: Dict[str, Optional[str]],
+                new: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+    """Изменившиеся ключи с новыми значениями, None для удалённых."""
+    return {
+        name: new.get(name) for name in old.keys() | new.keys()
+        if old.get(name) != new.get(name)
+    }
+
+
+class EnvReloader:
+    """Следит за env-файлом и отдаёт только изменившиеся переменные.
+
+    check почти ничего не стоит, пока файл не менялся: это один stat.
+    После изменения файл перечитывается, а наружу отдаются лишь ключи
+    с новыми значениями, так что применять приходится только их.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """Читает env-файл path и начинает следить за ним."""
+        if path is None:
+            path = ENV_FILE
+        self.file = WatchedFile(path)
+        self._values = read_env_file(path)
+
+    def check(self) -> Dict[str, Optional[str]]:
+        """Изменения с прошлой проверки."""
+        if not self.file.changed():
+            return {}
+        values = read_env_file(self.file.path)
+        changes = diff_values(self._values, values)
+        self._values = values
+        if changes:
+            logging.info('В %s изменились переменные: %s',
+                         self.file.path, ', '.join(sorted(changes)))
+        return changes
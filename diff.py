@@ -0,0 +1,126 @@
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+Fingerprint = Tuple[str, Optional[str], Optional[str]]
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения."""
+    global SEEN_INDEX_SIZE
+    SEEN_INDEX_SIZE = int(os.getenv('SEEN_INDEX_SIZE', 256))
+
+
+load_settings()
+
+
+def homework_key(homework: dict) -> str:
+    """Ключ работы: id, если API его прислал, иначе название."""
+    identifier = homework.get('id')
+    if identifier is None:
+        identifier = homework.get('homework_name')
+    return str(identifier)
+
+
+def updated_at(homework: dict, default: float) -> float:
+    """Время изменения работы из date_updated или default."""
+    try:
+        return datetime.strptime(
+            homework['date_updated'], DATE_FORMAT).replace(
+            tzinfo=timezone.utc).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return default
+
+
+class SeenIndex:
+    """Отпечатки последних увиденных записей API, не больше size.
+
+    Запрос с перекрытием окна снова возвращает записи, изменённые
+    незадолго до прошлого курсора; по индексу они узнаются и не
+    уведомляют повторно. Самые давние отпечатки вытесняются.
+    """
+
+    def __init__(self, size: Optional[int] = None) -> None:
+        """Создаёт пустой индекс на size отпечатков."""
+        self.size = SEEN_INDEX_SIZE if size is None else size
+        self._entries: 'OrderedDict[Fingerprint, None]' = OrderedDict()
+
+    def __contains__(self, fingerprint: Fingerprint) -> bool:
+        """Проверяет, виден ли уже отпечаток."""
+        return fingerprint in self._entries
+
+    def __len__(self) -> int:
+        """Число запомненных отпечатков."""
+        return len(self._entries)
+
+    def add(self, fingerprint: Fingerprint) -> None:
+        """Запоминает отпечаток, вытесняя самый давний при переполнении."""
+        if fingerprint in self._entries:
+            self._entries.move_to_end(fingerprint)
+            return
+        self._entries[fingerprint] = None
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def snapshot(self) -> List[list]:
+        """Отпечатки для StateJournal, от давних к свежим."""
+        return [list(fingerprint) for fingerprint in self._entries]
+
+    def restore(self, snapshot: Iterable[list]) -> None:
+        """Восстанавливает отпечатки из снимка."""
+        self._entries = OrderedDict(
+            (tuple(fingerprint), None) for fingerprint in snapshot)
+
+
+def iter_changes(known: Dict[str, str], homeworks: Iterable[dict],
+                 index: Optional[SeenIndex] = None,
+                 since: float = 0) -> Iterator[dict]:
+    """Лениво отдаёт работы, чей статус отличается от известного.
+
+    known отображает ключ работы на последний доставленный статус.
+    Порядок в ответе API не важен; если работа встречается в ответе
+    несколько раз, учитывается первое (самое свежее) вхождение.
+
+    С index отдаются и работы с прежним статусом, если запись новая
+    (см. is_returned_status).
+    """
+    seen = set()
+    for homework in homeworks:
+        key = homework_key(homework)
+        if key in seen:
+            continue
+        seen.add(key)
+        status = homework.get('status')
+        if known.get(key) != status:
+            yield homework
+        elif index is not None and is_returned_status(
+                key, status, homework, index, since):
+            yield homework
+
+
+def is_returned_status(key: str, status: Optional[str], homework: dict,
+                       index: SeenIndex, since: float) -> bool:
+    """Вернулась ли работа в известный статус после прошлого опроса.
+
+    Записи из index уже учтены. Прочие попадают в индекс, но изменением
+    считаются, только если работа менялась после since (прошлого
+    курсора): значит, статус успел смениться и вернуться между опросами.
+    """
+    updated = homework.get('date_updated')
+    fingerprint = (key, status, updated)
+    if updated is None or fingerprint in index:
+        return False
+    if since and updated_at(homework, 0) >= since:
+        return True
+    index.add(fingerprint)
+    return False
+
+
+def diff_homeworks(known: Dict[str, str], homeworks: Iterable[dict],
+                   index: Optional[SeenIndex] = None,
+                   since: float = 0) -> List[dict]:
+    """Все изменившиеся работы списком, за один проход."""
+    return list(iter_changes(known, homeworks, index, since))
@@ -0,0 +1,459 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (TYPE_CHECKING, Callable, Dict, Iterable, List, Optional,
+                    Set, Tuple)
+
+import config
+import homework
+import metrics
+import sharding
+import templates
+import transport
+from config import EnvReloader, WatchedFile
+from homework import (ENDPOINT, INTERVAL_SETTINGS, Tenant, cursor_lag, init,
+                      poll_tenant, refresh_interval_policy, reload_settings,
+                      restore_tenants, save_tenants, shutdown, start_commands,
+                      start_metrics_server, start_profiling)
+from metrics import Health
+from outbound import OutboundQueue
+from outbox import Outbox
+from scheduler import Scheduler
+from sharding import LeaseStore, ShardCoordinator, worker_path
+from state import StateJournal
+
+if TYPE_CHECKING:
+    import telegram
+
+
+def load_settings() -> None:
+    """Читает настройки движка; main вызывает её повторно после init()."""
+    global TENANTS_FILE, MAX_CONCURRENCY, STATE_SAVE_INTERVAL
+    TENANTS_FILE = os.getenv('TENANTS_FILE', 'tenants.json')
+    MAX_CONCURRENCY = int(os.getenv('MAX_CONCURRENCY', 64))
+    STATE_SAVE_INTERVAL = float(os.getenv('STATE_SAVE_INTERVAL', 30))
+
+
+load_settings()
+
+
+def read_tenant_records(path: str) -> Dict[str, dict]:
+    """Записи пользователей из JSON-файла по chat_id."""
+    with open(path, encoding='utf-8') as file:
+        records = json.load(file)
+    return {str(record['chat_id']): record for record in records}
+
+
+def make_tenant(record: dict) -> Tenant:
+    """Пользователь по записи из TENANTS_FILE."""
+    return Tenant(chat_id=str(record['chat_id']), **tenant_overrides(record))
+
+
+def tenant_overrides(record: dict) -> dict:
+    """Настройки пользователя, которые можно менять на лету."""
+    return {
+        'token': record['token'],
+        'locale': record.get('locale', templates.DEFAULT_LOCALE),
+        'destinations': [
+            str(chat_id) for chat_id in record.get('destinations', [])],
+    }
+
+
+def load_tenants(path: str) -> List[Tenant]:
+    """Читает список пользователей из JSON-файла."""
+    return [
+        make_tenant(record) for record in read_tenant_records(path).values()]
+
+
+class PollingEngine:
+    """Опрашивает API для множества пользователей из одного процесса.
+
+    Сроки следующего опроса хранятся в куче, поэтому вместо отдельного
+    спящего цикла на каждого пользователя достаточно одного ожидания
+    ближайшего срока. Интервал до следующего срока задаёт политика
+    пользователя. Сам опрос синхронный и выполняется в пуле потоков.
+
+    С shard процесс опрашивает только пользователей, чьи аренды держит
+    ShardCoordinator, и раз в shard.interval пересчитывает свою долю.
+    Состояние отданных пользователей сохраняется в общий журнал до
+    освобождения аренды, а полученных — читается из него.
+
+    run завершается после scheduler.stop, дождавшись начатых опросов,
+    а scheduler.trigger ставит всех пользователей на опрос немедленно.
+
+    С tenants_file раз в config_interval секунд проверяется, не менялся
+    ли файл пользователей, а с env — env-файл. Применяется только
+    разница: новые пользователи добавляются, удалённые снимаются с
+    опроса, а настройки остальных подменяются между их циклами.
+    """
+
+    def __init__(self, bot: 'telegram.Bot', tenants: Iterable[Tenant] = (),
+                 concurrency: Optional[int] = None,
+                 journal: Optional[StateJournal] = None,
+                 save_interval: Optional[float] = None,
+                 poll: Callable[..., Optional[list]] = poll_tenant,
+                 health: Optional[Health] = None,
+                 shard: Optional[ShardCoordinator] = None,
+                 scheduler: Optional[Scheduler] = None,
+                 tenants_file: Optional[str] = None,
+                 env: Optional[EnvReloader] = None,
+                 config_interval: Optional[float] = None) -> None:
+        """Создаёт движок для бота и начальных пользователей."""
+        self.bot = bot
+        self.shard = shard
+        self.scheduler = scheduler or Scheduler()
+        self.poll = poll
+        self.health = health
+        self.concurrency = (
+            MAX_CONCURRENCY if concurrency is None else concurrency)
+        self.journal = journal
+        self.save_interval = (
+            STATE_SAVE_INTERVAL if save_interval is None else save_interval)
+        self.tenants: List[Tenant] = []
+        self._heap: List[Tuple[float, int, Tenant]] = []
+        self._active: Dict[str, int] = {}
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self.env = env
+        self.config_interval = (
+            config.CONFIG_CHECK_INTERVAL if config_interval is None
+            else config_interval)
+        self._tenants_file: Optional[WatchedFile] = None
+        self._records: Dict[str, dict] = {}
+        if tenants_file is not None:
+            self._tenants_file = WatchedFile(tenants_file)
+            self._records = read_tenant_records(tenants_file)
+        self._polling: Dict[str, threading.Event] = {}
+        self._overrides: Dict[str, dict] = {}
+        now = time.monotonic()
+        for tenant in tenants:
+            self.add_tenant(tenant, now)
+
+    def __len__(self) -> int:
+        """Число пользователей в движке."""
+        return len(self._active)
+
+    def add_tenant(self, tenant: Tenant, due: float) -> None:
+        """Добавляет пользователя и ставит его первый опрос на due."""
+        self.tenants.append(tenant)
+        if self.shard is None:
+            self.schedule(tenant, due)
+
+    def schedule(self, tenant: Tenant, due: float) -> None:
+        """Ставит опрос пользователя на момент due (по time.monotonic)."""
+        counter = next(self._counter)
+        self._active[tenant.chat_id] = counter
+        heapq.heappush(self._heap, (due, counter, tenant))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def unschedule(self, tenant: Tenant) -> None:
+        """Снимает пользователя с опроса."""
+        self._active.pop(tenant.chat_id, None)
+
+    def remove_tenant(self, tenant: Tenant) -> None:
+        """Снимает пользователя с опроса и сохраняет его состояние."""
+        self.unschedule(tenant)
+        self.tenants.remove(tenant)
+        if self.journal is not None:
+            self.journal.update({tenant.chat_id: tenant.snapshot()})
+
+    def apply_records(self, records: Dict[str, dict]) -> None:
+        """Применяет новый список пользователей: только разницу со старым."""
+        tenants = {tenant.chat_id: tenant for tenant in self.tenants}
+        added = [
+            make_tenant(records[chat_id])
+            for chat_id in records.keys() - self._records.keys()]
+        removed = self._records.keys() - records.keys()
+        changed = [
+            chat_id for chat_id in records.keys() & self._records.keys()
+            if records[chat_id] != self._records[chat_id]]
+        self._records = records
+        if added and self.journal is not None:
+            restore_tenants(self.journal, added)
+        now = time.monotonic()
+        for tenant in added:
+            self.add_tenant(tenant, now)
+            if homework.COMMANDS is not None:
+                homework.COMMANDS.add_tenant(tenant)
+        for chat_id in removed:
+            self.remove_tenant(tenants[chat_id])
+            if homework.COMMANDS is not None:
+                homework.COMMANDS.remove_tenant(chat_id)
+        for chat_id in changed:
+            self.override(tenants[chat_id], tenant_overrides(records[chat_id]))
+        logging.info('Пользователи обновлены: добавлено %d, удалено %d, '
+                     'изменено %d', len(added), len(removed), len(changed))
+
+    def override(self, tenant: Tenant, overrides: dict) -> None:
+        """Подменяет настройки пользователя, но не посреди его опроса."""
+        if tenant.chat_id in self._polling:
+            self._overrides.setdefault(tenant.chat_id, {}).update(overrides)
+            return
+        for name, value in overrides.items():
+            setattr(tenant, name, value)
+
+    def apply_env(self, changes: Dict[str, Optional[str]]) -> None:
+        """Применяет изменения env-файла ко всему процессу."""
+        settings = reload_settings(changes)
+        if INTERVAL_SETTINGS.intersection(settings):
+            for tenant in self.tenants:
+                self.override(tenant, {'interval_policy': (
+                    refresh_interval_policy(tenant.interval_policy))})
+
+    def _pop_due(self) -> Optional[Tenant]:
+        _, counter, tenant = heapq.heappop(self._heap)
+        if self._active.get(tenant.chat_id) != counter:
+            return None
+        if self.shard is not None and not self.shard.owns(tenant.chat_id):
+            self.unschedule(tenant)
+            return None
+        return tenant
+
+    async def run(self) -> None:
+        """Запускает опросы, срок которых наступил, до остановки."""
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+        self.scheduler.subscribe(wake)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        background, polls = [], set()
+        if self.journal is not None:
+            background.append(asyncio.create_task(self._autosave()))
+        if self.shard is not None:
+            background.append(asyncio.create_task(self._rebalance()))
+        if self._tenants_file is not None or self.env is not None:
+            background.append(asyncio.create_task(self._watch_config()))
+        try:
+            while not self.scheduler.stopping:
+                if self.scheduler.take_trigger():
+                    self._poll_now()
+                await self._start_due(semaphore, polls)
+                await self._wait_next()
+            if polls:
+                logging.info('Ждём завершения опросов: %d', len(polls))
+                await asyncio.wait(polls, timeout=self.scheduler.remaining())
+        finally:
+            self.scheduler.unsubscribe(wake)
+            for task in background:
+                task.cancel()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _start_due(self, semaphore: asyncio.Semaphore,
+                         polls: Set[asyncio.Task]) -> None:
+        while self._heap and self._heap[0][0] <= time.monotonic():
+            tenant = self._pop_due()
+            if tenant is None:
+                continue
+            await semaphore.acquire()
+            task = asyncio.create_task(self._poll(tenant, semaphore))
+            polls.add(task)
+            task.add_done_callback(polls.discard)
+
+    async def _wait_next(self) -> None:
+        timeout = None
+        if self._heap:
+            timeout = max(self._heap[0][0] - time.monotonic(), 0)
+        self._wakeup.clear()
+        if self.scheduler.stopping:
+            return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _poll_now(self) -> None:
+        now = time.monotonic()
+        for tenant in self.tenants:
+            if tenant.chat_id in self._active:
+                self.schedule(tenant, now)
+
+    async def _autosave(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.save_interval)
+            await loop.run_in_executor(None, self.save_state)
+
+    def save_state(self) -> None:
+        """Сохраняет состояние своих пользователей в журнал."""
+        if self.shard is None:
+            save_tenants(self.journal, list(self.tenants))
+        else:
+            self._save_shard(self.shard.owned)
+
+    async def _watch_config(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.config_interval)
+            records = await loop.run_in_executor(None, self._read_records)
+            if records is not None:
+                self.apply_records(records)
+            if self.env is not None:
+                self.apply_env(
+                    await loop.run_in_executor(None, self.env.check))
+
+    def _read_records(self) -> Optional[Dict[str, dict]]:
+        if self._tenants_file is None or not self._tenants_file.changed():
+            return None
+        try:
+            return read_tenant_records(self._tenants_file.path)
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            logging.error('Файл %s не применён: %s',
+                          self._tenants_file.path, error)
+            return None
+
+    async def _rebalance(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            owned = await loop.run_in_executor(None, self._refresh_shard)
+            now = time.monotonic()
+            for tenant in self.tenants:
+                if tenant.chat_id not in owned:
+                    self.unschedule(tenant)
+                elif tenant.chat_id not in self._active:
+                    self.schedule(tenant, now)
+            await asyncio.sleep(self.shard.interval)
+
+    def _refresh_shard(self) -> Set[str]:
+        before = set(self.shard.owned)
+        owned = self.shard.refresh(
+            [tenant.chat_id for tenant in self.tenants], self._release_shard)
+        gained = owned - before
+        if gained and self.journal is not None:
+            restore_tenants(self.journal, [
+                tenant for tenant in self.tenants
+                if tenant.chat_id in gained])
+        return owned
+
+    def _release_shard(self, chat_ids: Set[str]) -> None:
+        # Снимок отдаваемого пользователя делается только после его
+        # опроса, иначе новый владелец повторит уже отправленное.
+        deadline = time.monotonic() + self.shard.store.ttl / 2
+        for chat_id in chat_ids:
+            done = self._polling.get(chat_id)
+            if done is not None and not done.wait(
+                    max(deadline - time.monotonic(), 0)):
+                logging.warning(
+                    'Опрос чата %s не завершился до передачи другому '
+                    'воркеру', chat_id)
+        self._save_shard(chat_ids)
+
+    def _save_shard(self, chat_ids: Set[str]) -> None:
+        if self.journal is not None:
+            self.journal.update({
+                tenant.chat_id: tenant.snapshot()
+                for tenant in self.tenants if tenant.chat_id in chat_ids})
+
+    def _run_poll(self, tenant: Tenant,
+                  done: threading.Event) -> Optional[list]:
+        try:
+            return self.poll(self.bot, tenant)
+        finally:
+            done.set()
+
+    async def _poll(self, tenant: Tenant,
+                    semaphore: asyncio.Semaphore) -> None:
+        loop = asyncio.get_running_loop()
+        homeworks = None
+        done = self._polling[tenant.chat_id] = threading.Event()
+        # Аренду могли отпустить, пока опрос ждал семафор.
+        if self.shard is not None and not self.shard.owns(tenant.chat_id):
+            done.set()
+            del self._polling[tenant.chat_id]
+            semaphore.release()
+            self.unschedule(tenant)
+            return
+        try:
+            homeworks = await loop.run_in_executor(
+                self._executor, self._run_poll, tenant, done)
+        except Exception as error:
+            logging.error(
+                'Опрос для чата %s завершился ошибкой: %s',
+                tenant.chat_id, error, exc_info=error)
+        finally:
+            if self.health is not None:
+                self.health.mark_cycle(homeworks is not None)
+            semaphore.release()
+            done.set()
+            del self._polling[tenant.chat_id]
+            overrides = self._overrides.pop(tenant.chat_id, None)
+            if overrides is not None:
+                self.override(tenant, overrides)
+            if tenant.chat_id in self._active:
+                self.schedule(
+                    tenant,
+                    time.monotonic() + tenant.next_interval(homeworks))
+
+
+def main() -> None:
+    """Запускает опрос всех пользователей из TENANTS_FILE."""
+    import telegram
+
+    init()
+    load_settings()
+    sharding.load_settings()
+    if not homework.TELEGRAM_TOKEN:
+        logging.critical('Отсутствует переменная окружения TELEGRAM_TOKEN')
+        sys.exit('Отсутствует TELEGRAM_TOKEN. Программа будет остановлена')
+    if sharding.SHARD_STORE and homework.COMMANDS_ENABLED:
+        logging.critical('BOT_COMMANDS несовместим с SHARD_STORE')
+        sys.exit('Команды бота не работают с несколькими воркерами. '
+                 'Программа будет остановлена')
+    if sharding.SHARD_STORE and not sharding.default_worker_id():
+        logging.critical('С SHARD_STORE нужна переменная SHARD_WORKER_ID')
+        sys.exit('Отсутствует SHARD_WORKER_ID. Программа будет остановлена')
+    tenants = load_tenants(TENANTS_FILE)
+    logging.info('Загружено пользователей: %d', len(tenants))
+    journal = StateJournal(homework.STATE_FILE)
+    restore_tenants(journal, tenants)
+    shard = None
+    outbox_file = homework.OUTBOX_FILE
+    if sharding.SHARD_STORE:
+        shard = ShardCoordinator(
+            LeaseStore(sharding.SHARD_STORE, sharding.SHARD_LEASE_TTL),
+            vnodes=sharding.SHARD_VNODES)
+        outbox_file = worker_path(homework.OUTBOX_FILE, shard.worker)
+    http = transport.configure_transport(pool_size=MAX_CONCURRENCY)
+    http.warm_up(ENDPOINT)
+    bot = telegram.Bot(
+        token=homework.TELEGRAM_TOKEN, request=http.telegram_request())
+    outbound = OutboundQueue(bot)
+    outbound.start()
+    outbox = Outbox(outbox_file, outbound)
+    outbox.start()
+    health = Health(homework.HEALTH_TIMEOUT, homework.HEALTH_TIMEOUT)
+    scheduler = Scheduler().install()
+    engine = PollingEngine(
+        outbox, tenants, concurrency=MAX_CONCURRENCY, journal=journal,
+        save_interval=STATE_SAVE_INTERVAL, health=health, shard=shard,
+        scheduler=scheduler, tenants_file=TENANTS_FILE, env=EnvReloader())
+    metrics.CURSOR_LAG.set_function(lambda: cursor_lag(
+        tenant for tenant in engine.tenants
+        if shard is None or shard.owns(tenant.chat_id)))
+    metrics.CIRCUIT_STATE.set_function(homework.BREAKER.state_code)
+    start_metrics_server(health)
+    start_profiling()
+    updater = start_commands(bot, tenants, outbound)
+    homework.HISTORY.start()
+    try:
+        asyncio.run(engine.run())
+    finally:
+        engine.save_state()
+        if shard is not None:
+            shard.close()
+        shutdown(scheduler, outbound, outbox, updater)
+
+
+if __name__ == '__main__':
+    main()
@@ -28,3 +28,7 @@ class ServerNotSentListHomeworks(TypeError):
 
 class NotDocumentedStatusHomework(KeyError):
 	pass
+
+
+class EndpointCircuitOpen(Exception):
+	pass
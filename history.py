@@ -0,0 +1,231 @@
+import argparse
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+REVIEW_OUTCOMES = ('approved', 'rejected')
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS transitions ('
+    ' chat_id TEXT NOT NULL, homework TEXT NOT NULL, name TEXT,'
+    ' previous TEXT, status TEXT NOT NULL, changed_at REAL NOT NULL);'
+    'CREATE INDEX IF NOT EXISTS transitions_timeline'
+    ' ON transitions (chat_id, homework, changed_at);'
+    'CREATE INDEX IF NOT EXISTS transitions_status'
+    ' ON transitions (status, changed_at);'
+)
+TURNAROUND_QUERY = (
+    'SELECT status, changed_at - previous_at FROM ('
+    ' SELECT status, changed_at,'
+    '  LAG(status) OVER timeline AS previous_status,'
+    '  LAG(changed_at) OVER timeline AS previous_at'
+    ' FROM transitions WHERE {where}'
+    ' WINDOW timeline AS (PARTITION BY chat_id, homework'
+    '  ORDER BY changed_at))'
+    " WHERE previous_status = 'reviewing'"
+    " AND status IN ('approved', 'rejected') AND changed_at >= ?"
+)
+
+
+@dataclass
+class Transition:
+    """Смена статуса одной работы."""
+
+    changed_at: float
+    name: Optional[str]
+    previous: Optional[str]
+    status: str
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения."""
+    global HISTORY_FILE, HISTORY_BATCH_SIZE, HISTORY_FLUSH_INTERVAL
+    HISTORY_FILE = os.getenv('HISTORY_FILE', 'history.sqlite')
+    HISTORY_BATCH_SIZE = int(os.getenv('HISTORY_BATCH_SIZE', 500))
+    HISTORY_FLUSH_INTERVAL = float(os.getenv('HISTORY_FLUSH_INTERVAL', 5))
+
+
+load_settings()
+
+
+def percentile(samples: List[float], share: float) -> float:
+    """Перцентиль share по отсортированной выборке."""
+    index = min(int(share * len(samples)), len(samples) - 1)
+    return samples[index]
+
+
+class HistoryStore:
+    """История смен статусов в SQLite с пакетной записью.
+
+    record только добавляет строку в буфер под блокировкой, а в базу
+    буфер пишет фоновый поток одной транзакцией — когда набралось
+    batch_size строк или прошло flush_interval секунд. До start
+    record ничего не делает, так что история включается явно.
+    """
+
+    def __init__(self, path: Optional[str] = None,
+                 batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None,
+                 clock: Callable[[], float] = time.time) -> None:
+        """Готовит базу истории path с пакетной записью."""
+        self.path = HISTORY_FILE if path is None else path
+        self.batch_size = (
+            HISTORY_BATCH_SIZE if batch_size is None else batch_size)
+        self.flush_interval = (
+            HISTORY_FLUSH_INTERVAL if flush_interval is None
+            else flush_interval)
+        self._clock = clock
+        self._pending: List[Tuple] = []
+        self._condition = threading.Condition()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._database_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+
+    def open(self) -> 'HistoryStore':
+        """Открывает базу и создаёт таблицу с индексами."""
+        self._connection = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False)
+        self._connection.executescript('PRAGMA journal_mode=WAL;' + SCHEMA)
+        return self
+
+    def start(self) -> 'HistoryStore':
+        """Открывает базу и запускает фоновую запись."""
+        if self._connection is None:
+            self.open()
+        self._thread = threading.Thread(
+            target=self._run, name='history', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    @property
+    def enabled(self) -> bool:
+        """Запущена ли запись истории."""
+        return self._thread is not None
+
+    def record(self, chat_id: str, homework: str, name: Optional[str],
+               previous: Optional[str], status: str,
+               changed_at: Optional[float] = None) -> None:
+        """Добавляет смену статуса в буфер записи."""
+        if not self.enabled:
+            return
+        row = (chat_id, homework, name, previous, status,
+               self._clock() if changed_at is None else changed_at)
+        with self._condition:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+
+    def flush(self) -> int:
+        """Пишет буфер в базу; возвращает число записанных строк."""
+        with self._condition:
+            rows, self._pending = self._pending, []
+        if rows:
+            with self._database_lock, self._connection:
+                self._connection.executemany(
+                    'INSERT INTO transitions VALUES (?, ?, ?, ?, ?, ?)',
+                    rows)
+        return len(rows)
+
+    def close(self) -> None:
+        """Дописывает буфер и закрывает базу."""
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._connection is not None:
+            self.flush()
+            self._connection.close()
+            self._connection = None
+
+    def timeline(self, chat_id: str, homework: str) -> List[Transition]:
+        """Все смены статуса работы по времени."""
+        rows = self._query(
+            'SELECT changed_at, name, previous, status FROM transitions '
+            'WHERE chat_id = ? AND homework = ? ORDER BY changed_at',
+            (chat_id, homework))
+        return [Transition(*row) for row in rows]
+
+    def turnaround(self, chat_id: Optional[str] = None,
+                   since: Optional[float] = None) -> Dict[str, dict]:
+        """Время от reviewing до approved/rejected: число, среднее, p50, p90.
+
+        Секунды, по исходу проверки и суммарно в ключе all.
+        """
+        where, params = '1', []
+        if chat_id is not None:
+            where, params = 'chat_id = ?', [chat_id]
+        rows = self._query(
+            TURNAROUND_QUERY.format(where=where),
+            params + [since if since is not None else float('-inf')])
+        durations = {outcome: [] for outcome in REVIEW_OUTCOMES + ('all',)}
+        for status, duration in rows:
+            durations[status].append(duration)
+            durations['all'].append(duration)
+        return {
+            outcome: self._summary(sorted(samples))
+            for outcome, samples in durations.items()
+        }
+
+    @staticmethod
+    def _summary(samples: List[float]) -> dict:
+        if not samples:
+            return {'count': 0}
+        return {
+            'count': len(samples),
+            'mean': sum(samples) / len(samples),
+            'p50': percentile(samples, 0.5),
+            'p90': percentile(samples, 0.9),
+        }
+
+    def _query(self, sql: str, params) -> list:
+        self.flush()
+        with self._database_lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._closing and len(
+                        self._pending) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                closing = self._closing
+            try:
+                self.flush()
+            except sqlite3.Error as error:
+                logging.error('Не удалось записать историю %s: %s',
+                              self.path, error)
+            if closing:
+                return
+
+
+def main(argv: List[str]) -> None:
+    """Печатает в JSON историю работы или статистику проверок."""
+    parser = argparse.ArgumentParser(description='История статусов работ')
+    parser.add_argument('--path', default=HISTORY_FILE)
+    parser.add_argument('--chat')
+    parser.add_argument('--homework', help='id работы для её истории')
+    parser.add_argument('--since', type=float, help='unix-время начала')
+    options = parser.parse_args(argv)
+    store = HistoryStore(options.path).open()
+    if options.homework:
+        result = [asdict(item) for item in store.timeline(
+            options.chat, options.homework)]
+    else:
+        result = store.turnaround(options.chat, options.since)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    store.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,77 +1,404 @@
+import atexit
+import importlib
 import logging
 import os
 import sys
-import time
+from contextlib import closing
+from dataclasses import dataclass, field
 from http import HTTPStatus
+from typing import (TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List,
+                    Optional, Tuple)
 
-import requests
-import telegram
-from dotenv import load_dotenv
-
+import config
+import metrics
+import profiling
+import templates
+import transport
+from alerts import AlertWindow, error_fingerprint
+from breaker import CircuitBreaker
+from clock import SYSTEM_CLOCK, Clock
+from config import EnvReloader
+from commands import CommandService, Revalidator, StatusCache
+from diff import (SeenIndex, diff_homeworks, homework_key, iter_changes,
+                  updated_at)
 from exceptions import (CannotSendMessageToTelegram, CannotSendRequestToServer,
-                        EndpointNotAvailable, IsNotDict,
-                        NotDocumentedStatusHomework,
+                        EndpointCircuitOpen, EndpointNotAvailable, IsNotDict,
                         NotSendInTelegram, ServerNotSentKey,
                         ServerNotSentListHomeworks)
+from history import HistoryStore
+from intervals import AdaptiveInterval, FixedInterval, IntervalPolicy
+from log_config import setup_logging
+from metrics import Health, MetricsServer
+from outbound import OutboundQueue
+from outbox import Outbox
+from profiling import SamplingProfiler, Tracer
+from scheduler import Scheduler
+from state import StateJournal
+from streaming import HomeworkStream
+from templates import TEMPLATES, MessageRenderer
 
-load_dotenv()
-
-PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
-TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
-TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+if TYPE_CHECKING:
+    import requests
+    import telegram
+    from telegram.ext import Updater
 
-RETRY_TIME = 600
+STREAM_CHUNK_SIZE = 64 * 1024
+ERROR_BODY_LIMIT = 500
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+SETTINGS_MODULES = (
+    'alerts', 'breaker', 'commands', 'config', 'diff', 'history',
+    'log_config', 'outbound', 'outbox', 'profiling', 'scheduler',
+    'templates', 'transport',
+)
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения.
+
+    Вызывается при импорте и ещё раз из init() после load_dotenv, так
+    что значения, заданные только в .env, тоже вступают в силу.
+    Настройки остальных модулей перечитывает load_all_settings.
+    """
+    global PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, HEADERS
+    global TELEGRAM_DESTINATIONS, RETRY_TIME, POLL_INTERVAL_POLICY
+    global POLL_FAST_INTERVAL, POLL_MAX_INTERVAL, POLL_JITTER, POLL_OVERLAP
+    global STATE_FILE, OUTBOX_FILE, STREAM_RESPONSES, COMMANDS_ENABLED
+    global METRICS_HOST, METRICS_PORT, HEALTH_TIMEOUT
+    PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
+    TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
+    TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+    TELEGRAM_DESTINATIONS = os.getenv('TELEGRAM_DESTINATIONS', '')
+    HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+
+    RETRY_TIME = int(os.getenv('RETRY_TIME', 600))
+    POLL_INTERVAL_POLICY = os.getenv('POLL_INTERVAL_POLICY', 'adaptive')
+    POLL_FAST_INTERVAL = int(os.getenv('POLL_FAST_INTERVAL', 60))
+    POLL_MAX_INTERVAL = int(os.getenv('POLL_MAX_INTERVAL', 3600))
+    POLL_JITTER = float(os.getenv('POLL_JITTER', 0.1))
+    POLL_OVERLAP = int(os.getenv('POLL_OVERLAP', 60))
+    STATE_FILE = os.getenv('STATE_FILE', 'state.json')
+    OUTBOX_FILE = os.getenv('OUTBOX_FILE', 'outbox.jsonl')
+    STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', '') == '1'
+    COMMANDS_ENABLED = os.getenv('BOT_COMMANDS') == '1'
+    METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+    METRICS_PORT = os.getenv('METRICS_PORT')
+    HEALTH_TIMEOUT = float(os.getenv('HEALTH_TIMEOUT', 2 * POLL_MAX_INTERVAL))
+
 
-HOMEWORK_STATUSES = {
-    'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
-    'reviewing': 'Работа взята на проверку ревьюером.',
-    'rejected': 'Работа проверена: у ревьюера есть замечания.'
+load_settings()
+
+HOMEWORK_STATUSES = TEMPLATES['ru']['statuses']
+RETRYABLE_STATUSES = (HTTPStatus.REQUEST_TIMEOUT, HTTPStatus.TOO_MANY_REQUESTS)
+RELOADABLE_SETTINGS = {
+    'PRACTICUM_TOKEN': str, 'TELEGRAM_CHAT_ID': str,
+    'TELEGRAM_DESTINATIONS': str, 'RETRY_TIME': int,
+    'POLL_INTERVAL_POLICY': str, 'POLL_FAST_INTERVAL': int,
+    'POLL_MAX_INTERVAL': int, 'POLL_JITTER': float, 'POLL_OVERLAP': int,
+}
+REQUIRED_SETTINGS = ('PRACTICUM_TOKEN', 'TELEGRAM_CHAT_ID')
+INTERVAL_SETTINGS = {
+    'RETRY_TIME', 'POLL_INTERVAL_POLICY', 'POLL_FAST_INTERVAL',
+    'POLL_MAX_INTERVAL', 'POLL_JITTER',
 }
+TRACED_STAGES = ('fetch_homework_statuses', 'check_response', 'render_status',
+                 'send_message_to', 'process_response', 'process_stream')
+CLOCK = SYSTEM_CLOCK
+COMMANDS: Optional[CommandService] = None
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s, %(levelname)s, %(message)s, %(name)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
 
+def make_components() -> None:
+    """Создаёт общие для процесса компоненты по текущим настройкам."""
+    global BREAKER, STATUS_CACHE, HISTORY, RENDERER
+    BREAKER = CircuitBreaker(clock=lambda: CLOCK.monotonic())
+    STATUS_CACHE = StatusCache()
+    HISTORY = HistoryStore()
+    RENDERER = MessageRenderer()
+
+
+make_components()
+
+
+def load_all_settings() -> None:
+    """Перечитывает настройки всех модулей из переменных окружения.
+
+    Значения по умолчанию в конструкторах берутся из модулей в момент
+    вызова, а общие компоненты создаются заново, так что после
+    load_dotenv в силу вступает всё, что задано в .env.
+    """
+    for name in SETTINGS_MODULES:
+        importlib.import_module(name).load_settings()
+    load_settings()
+    make_components()
+
+
+def init() -> None:
+    """Читает .env и настраивает логирование перед запуском бота.
+
+    Импорт модуля ничего не настраивает и не тянет telegram и requests,
+    поэтому тесты и инструменты загружают его быстро.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    load_all_settings()
+    setup_logging(secrets=(PRACTICUM_TOKEN, TELEGRAM_TOKEN))
+
+
+def parse_destinations(value: str) -> List[str]:
+    """Список чатов из строки через запятую."""
+    return [chat_id.strip() for chat_id in value.split(',') if chat_id.strip()]
+
+
+def parse_settings(changes: Dict[str, Optional[str]]) -> dict:
+    """Новые значения изменившихся настроек.
+
+    Бросает ValueError, если хоть одно значение неверно, тогда не
+    применяется ни одно.
+    """
+    settings = {}
+    for name, value in changes.items():
+        convert = RELOADABLE_SETTINGS.get(name)
+        if convert is None:
+            continue
+        if value is None:
+            if name in REQUIRED_SETTINGS:
+                raise ValueError(f'{name} удалён')
+            continue
+        if not value and name in REQUIRED_SETTINGS:
+            raise ValueError(f'{name} пуст')
+        try:
+            settings[name] = convert(value)
+        except ValueError:
+            raise ValueError(f'{name} не {convert.__name__}: {value!r}')
+    return settings
+
+
+def apply_settings(settings: dict, tenants: Iterable['Tenant'] = ()) -> None:
+    """Подменяет настройки модуля и пользователей одним шагом.
+
+    Вызывается между циклами опроса; пользователям передаются только
+    затронутые изменением поля.
+    """
+    global HEADERS
+    globals().update(settings)
+    if 'PRACTICUM_TOKEN' in settings:
+        HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+    for tenant in tenants:
+        if 'PRACTICUM_TOKEN' in settings:
+            tenant.token = PRACTICUM_TOKEN
+        if 'TELEGRAM_CHAT_ID' in settings:
+            if COMMANDS is not None:
+                COMMANDS.remove_tenant(tenant.chat_id)
+            tenant.chat_id = TELEGRAM_CHAT_ID
+            if COMMANDS is not None:
+                COMMANDS.add_tenant(tenant)
+        if 'TELEGRAM_DESTINATIONS' in settings:
+            tenant.destinations = parse_destinations(TELEGRAM_DESTINATIONS)
+        if INTERVAL_SETTINGS.intersection(settings):
+            tenant.interval_policy = refresh_interval_policy(
+                tenant.interval_policy)
+
+
+def reload_settings(changes: Dict[str, Optional[str]],
+                    tenants: Iterable['Tenant'] = ()) -> dict:
+    """Проверяет и применяет изменения env-файла; возвращает применённые."""
+    if not changes:
+        return {}
+    if 'TELEGRAM_TOKEN' in changes:
+        logging.warning('Новый TELEGRAM_TOKEN вступит в силу после '
+                        'перезапуска')
+    try:
+        settings = parse_settings(changes)
+    except ValueError as error:
+        logging.error('Новые настройки не применены: %s', error)
+        return {}
+    apply_settings(settings, tenants)
+    return settings
 
-def send_message(bot: telegram.Bot, message: str) -> None:
+
+def make_interval_policy() -> IntervalPolicy:
+    """Создаёт политику интервала опроса по POLL_INTERVAL_POLICY."""
+    if POLL_INTERVAL_POLICY == 'fixed':
+        return FixedInterval(RETRY_TIME)
+    return AdaptiveInterval(
+        HOMEWORK_STATUSES, base=RETRY_TIME, fast=POLL_FAST_INTERVAL,
+        maximum=POLL_MAX_INTERVAL, jitter=POLL_JITTER)
+
+
+def refresh_interval_policy(policy: IntervalPolicy) -> IntervalPolicy:
+    """Переносит новые настройки POLL_* в политику пользователя.
+
+    Политика того же вида обновляется на месте и не теряет накопленное
+    состояние (работы на ревью, число пустых циклов); новая создаётся,
+    только если сменился сам POLL_INTERVAL_POLICY.
+    """
+    if POLL_INTERVAL_POLICY == 'fixed' and isinstance(policy, FixedInterval):
+        policy.interval = RETRY_TIME
+        return policy
+    if POLL_INTERVAL_POLICY != 'fixed' and isinstance(
+            policy, AdaptiveInterval):
+        policy.base = RETRY_TIME
+        policy.fast = POLL_FAST_INTERVAL
+        policy.maximum = POLL_MAX_INTERVAL
+        policy.jitter = POLL_JITTER
+        return policy
+    return make_interval_policy()
+
+
+@dataclass
+class Tenant:
+    """Пара токен/чат и состояние её опроса между циклами."""
+
+    token: str
+    chat_id: str
+    current_timestamp: int = 0
+    last_message: str = ''
+    last_error: str = ''
+    statuses: Dict[str, str] = field(default_factory=dict)
+    locale: str = field(default_factory=lambda: templates.DEFAULT_LOCALE)
+    destinations: List[str] = field(default_factory=list)
+    alerts: AlertWindow = field(default_factory=AlertWindow, repr=False)
+    seen: SeenIndex = field(default_factory=SeenIndex, repr=False)
+    interval_policy: IntervalPolicy = field(
+        default_factory=make_interval_policy, repr=False)
+
+    @property
+    def headers(self) -> dict:
+        """Заголовки авторизации для запросов этого пользователя."""
+        return {'Authorization': f'OAuth {self.token}'}
+
+    @property
+    def recipients(self) -> List[str]:
+        """Чаты для уведомлений о статусе: свой и подписанные."""
+        if not self.destinations:
+            return [self.chat_id]
+        return [self.chat_id] + [
+            chat_id for chat_id in self.destinations
+            if chat_id != self.chat_id]
+
+    @property
+    def from_date(self) -> int:
+        """Начало окна запроса: курсор с перекрытием POLL_OVERLAP секунд.
+
+        Работы, изменённые незадолго до current_date, придут повторно и
+        будут отсеяны индексом seen, зато ни одна не потеряется.
+        """
+        if not self.current_timestamp:
+            return self.current_timestamp
+        return max(self.current_timestamp - POLL_OVERLAP, 1)
+
+    def snapshot(self) -> dict:
+        """Состояние опроса для StateJournal."""
+        return {
+            'cursor': self.current_timestamp,
+            'last_message': self.last_message,
+            'last_error': self.last_error,
+            'statuses': dict(self.statuses),
+            'alerts': self.alerts.snapshot(),
+            'seen': self.seen.snapshot(),
+            'interval': self.interval_policy.snapshot(),
+        }
+
+    def restore(self, snapshot: dict) -> None:
+        """Восстанавливает состояние опроса из снимка."""
+        self.current_timestamp = snapshot.get(
+            'cursor', self.current_timestamp)
+        self.last_message = snapshot.get('last_message', '')
+        self.last_error = snapshot.get('last_error', '')
+        self.statuses = dict(snapshot.get('statuses', {}))
+        self.alerts.restore(snapshot.get('alerts', {}))
+        self.seen.restore(snapshot.get('seen', []))
+        self.interval_policy.restore(snapshot.get('interval', {}))
+
+    def next_interval(self, homeworks: Optional[list]) -> float:
+        """Через сколько секунд опрашивать этого пользователя снова."""
+        return self.interval_policy.next_interval(
+            homeworks, self.current_timestamp)
+
+
+def restore_tenants(journal: StateJournal,
+                    tenants: Iterable[Tenant]) -> None:
+    """Восстанавливает состояние пользователей из журнала."""
+    snapshots = journal.load()
+    for tenant in tenants:
+        snapshot = snapshots.get(tenant.chat_id)
+        if snapshot is not None:
+            tenant.restore(snapshot)
+
+
+def save_tenants(journal: StateJournal, tenants: Iterable[Tenant]) -> None:
+    """Сохраняет состояние пользователей в журнал."""
+    journal.save({tenant.chat_id: tenant.snapshot() for tenant in tenants})
+
+
+def send_message(bot: 'telegram.Bot', message: str) -> None:
     """Отправляет сообщение в телеграм."""
-    logging.info(f'Начали отправку сообщение {message}')
+    send_message_to(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_message_to(bot: 'telegram.Bot', chat_id: str, message: str) -> None:
+    """Отправляет сообщение в указанный чат телеграма."""
+    import telegram
+
+    logging.info('Начали отправку сообщение %s', message)
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
+        bot.send_message(chat_id, message)
     except telegram.TelegramError as telegram_error:
         raise CannotSendMessageToTelegram(
             f'Сообщение в Telegram не отправлено: {telegram_error}')
     else:
-        logging.info(
-            f'Сообщение в Telegram отправлено: {message}')
+        logging.info('Сообщение в Telegram отправлено: %s', message)
 
 
 def get_api_answer(current_timestamp: int) -> dict:
     """Запрос к Яндексу, получает ответ от апи."""
-    timestamp = current_timestamp or int(time.time())
+    return fetch_homework_statuses(current_timestamp, HEADERS)
+
+
+def fetch_homework_statuses(current_timestamp: int, headers: dict) -> dict:
+    """Запрашивает статусы домашних работ с заданными заголовками."""
+    return request_homework_statuses(current_timestamp, headers).json()
+
+
+def request_homework_statuses(current_timestamp: int, headers: dict,
+                              stream: bool = False) -> 'requests.Response':
+    """Делает запрос к API и проверяет код ответа, не читая тело."""
+    timestamp = current_timestamp or int(CLOCK.time())
     params = {'from_date': timestamp}
+    if not BREAKER.allow():
+        raise EndpointCircuitOpen(
+            f'Запросы к {ENDPOINT} приостановлены после серии сбоев, '
+            f'повтор через {BREAKER.retry_in():.0f} с')
 
     try:
-        response = requests.get(ENDPOINT, headers=HEADERS, params=params)
+        with metrics.API_LATENCY.time():
+            response = transport.get(
+                ENDPOINT, headers=headers, params=params, stream=stream)
 
     except Exception as e:
+        BREAKER.record_failure()
         raise CannotSendRequestToServer(
             f'Не удалось отправить запрос {ENDPOINT}. Ошибка {e}')
     else:
+        if is_endpoint_failure(response.status_code):
+            BREAKER.record_failure()
+        else:
+            BREAKER.record_success()
         if response.status_code != HTTPStatus.OK:
             raise EndpointNotAvailable(
                 f'Эндпоинт недоступен {ENDPOINT}. '
-                f'Статус код: {response.status_code}'
-                f'Причина ответа: {response.reason}'
-                f'Текст ответа: {response.text}'
-                f'Заголовки: {HEADERS}'
+                f'Статус код: {response.status_code}. '
+                f'Причина ответа: {response.reason}. '
+                f'Текст ответа: {response.text[:ERROR_BODY_LIMIT]}. '
                 f'Параметры: {params}')
 
-        return response.json()
+        return response
+
+
+def is_endpoint_failure(status_code: int) -> bool:
+    """Говорит ли код ответа о сбое самого сервиса, а не запроса."""
+    return (status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+            or status_code in RETRYABLE_STATUSES)
 
 
 def check_response(response: dict) -> list:
@@ -99,6 +426,23 @@ def check_response(response: dict) -> list:
     return list_of_homeworks
 
 
+def check_stream(stream: HomeworkStream) -> Iterator[dict]:
+    """Проверяет потоковый ответ API так же, как check_response.
+
+    Работы отдаются по мере разбора, ключи проверяются в конце потока.
+    """
+    yield from stream
+    if 'homeworks' in stream.fields:
+        raise ServerNotSentListHomeworks(
+            'Содержимое ключа homeworks не является списком')
+    if not stream.has_homeworks:
+        raise ServerNotSentKey(
+            'В ответе сервера отсутствует ключ homeworks'
+        )
+    if stream.fields.get('current_date') is None:
+        raise ServerNotSentKey('current_date is None')
+
+
 def parse_status(homework: dict) -> str:
     """Проверяет статус домашнего задания."""
     if not isinstance(homework, dict):
@@ -106,15 +450,19 @@ def parse_status(homework: dict) -> str:
             'Response не словарь.'
         )
 
-    homework_name = homework.get('homework_name')
-    homework_status = homework.get('status')
-    if homework_status not in HOMEWORK_STATUSES:
-        raise NotDocumentedStatusHomework(
-            'недокументированный статус домашней работы: '
-            f'{homework_status}'
+    return RENDERER.render(
+        homework.get('homework_name'), homework.get('status'))
+
+
+def render_status(homework: dict, locale: Optional[str] = None) -> str:
+    """Текст уведомления о статусе работы на языке locale."""
+    if not isinstance(homework, dict):
+        raise IsNotDict(
+            'Response не словарь.'
         )
-    return ('Изменился статус проверки работы '
-            f'"{homework_name}". {HOMEWORK_STATUSES[homework_status]}')
+
+    return RENDERER.render(
+        homework.get('homework_name'), homework.get('status'), locale)
 
 
 def check_tokens() -> bool:
@@ -123,45 +471,279 @@ def check_tokens() -> bool:
     return all(tuple_of_tokens)
 
 
+def notify_change(bot: 'telegram.Bot', tenant: Tenant, homework: dict,
+                  message: str) -> None:
+    """Отправляет уведомление об изменении и запоминает новый статус.
+
+    Текст один на всех получателей: студента, ментора, канал потока.
+    """
+    for chat_id in tenant.recipients:
+        send_message_to(bot, chat_id, message)
+    key = homework_key(homework)
+    previous = tenant.statuses.get(key)
+    status = tenant.statuses[key] = homework.get('status')
+    tenant.last_message = message
+    tenant.seen.add((key, status, homework.get('date_updated')))
+    if HISTORY.enabled:
+        HISTORY.record(
+            tenant.chat_id, key, homework.get('homework_name'), previous,
+            status, updated_at(homework, CLOCK.time()))
+
+
+def process_response(bot: 'telegram.Bot', tenant: Tenant) -> Tuple[int, list]:
+    """Запрашивает ответ целиком и уведомляет об изменениях.
+
+    Все сообщения собираются до отправки, поэтому работа с
+    недокументированным статусом не оставит цикл отправленным наполовину.
+    """
+    response = fetch_homework_statuses(tenant.from_date, tenant.headers)
+    list_of_homeworks = check_response(response)
+    changes = diff_homeworks(
+        tenant.statuses, list_of_homeworks, tenant.seen,
+        tenant.current_timestamp)
+    messages = [
+        (homework, render_status(homework, tenant.locale))
+        for homework in reversed(changes)
+    ]
+    for homework, message in messages:
+        notify_change(bot, tenant, homework, message)
+    return response.get('current_date'), changes
+
+
+def process_stream(bot: 'telegram.Bot', tenant: Tenant) -> Tuple[int, list]:
+    """Разбирает ответ потоком и уведомляет об изменениях.
+
+    В памяти держатся только изменившиеся работы, а не весь ответ.
+    Уведомления уходят лишь после того, как поток дочитан и проверен,
+    и в том же порядке, что и в process_response: от давних к свежим.
+    """
+    response = request_homework_statuses(
+        tenant.from_date, tenant.headers, stream=True)
+    since = tenant.current_timestamp
+    with closing(response):
+        stream = HomeworkStream(response.iter_content(STREAM_CHUNK_SIZE))
+        messages = [
+            (homework, render_status(homework, tenant.locale))
+            for homework in iter_changes(
+                tenant.statuses, check_stream(stream), tenant.seen, since)
+        ]
+    for homework, message in reversed(messages):
+        notify_change(bot, tenant, homework, message)
+    return stream.fields['current_date'], [
+        homework for homework, _ in messages]
+
+
+def poll_tenant(bot: 'telegram.Bot', tenant: Tenant) -> Optional[list]:
+    """Один цикл опроса API и уведомления для пользователя.
+
+    Возвращает изменившиеся работы или None, если цикл не удался.
+    """
+    changes = None
+    try:
+        if STREAM_RESPONSES:
+            current_date, changes = process_stream(bot, tenant)
+        else:
+            current_date, changes = process_response(bot, tenant)
+        if not changes:
+            logging.info(
+                'Статусы работ не изменились,'
+                ' сообщение в телеграм не отправлено.')
+        tenant.current_timestamp = current_date
+        STATUS_CACHE.record(tenant.chat_id, changes)
+    except EndpointCircuitOpen as error:
+        metrics.ERRORS.inc(type(error).__name__)
+        logging.warning(error)
+    except NotSendInTelegram as error:
+        metrics.ERRORS.inc(type(error).__name__)
+        logging.error(error, exc_info=error)
+    except Exception as error:
+        metrics.ERRORS.inc(type(error).__name__)
+        report_error(bot, tenant, error)
+        logging.error(error, exc_info=error)
+    send_digest(bot, tenant)
+    return changes
+
+
+def report_error(bot: 'telegram.Bot', tenant: Tenant,
+                 error: Exception) -> None:
+    """Сообщает о сбое, если о таком же не сообщали в окне подавления."""
+    fingerprint = error_fingerprint(error)
+    if tenant.alerts.should_send(fingerprint, CLOCK.time()):
+        send_message_to(
+            bot, tenant.chat_id, f'Сбой в работе программы: {error}')
+        tenant.last_error = fingerprint
+    else:
+        logging.debug('Уведомление о повторе ошибки подавлено: %s',
+                      fingerprint)
+
+
+def send_digest(bot: 'telegram.Bot', tenant: Tenant) -> None:
+    """Отправляет сводку подавленных ошибок, когда истекло окно."""
+    digest = tenant.alerts.digest(CLOCK.time())
+    if digest is None:
+        return
+    try:
+        send_message_to(bot, tenant.chat_id, digest)
+    except NotSendInTelegram as error:
+        logging.error(error, exc_info=error)
+
+
+def fetch_all_homeworks(tenant: Tenant) -> list:
+    """Полный список работ пользователя, а не только изменения."""
+    return check_response(fetch_homework_statuses(1, tenant.headers))
+
+
+def start_commands(bot: 'telegram.Bot', tenants: Iterable[Tenant],
+                   sender) -> Optional['Updater']:
+    """Запускает приём команд /status и /history, если задан BOT_COMMANDS."""
+    global COMMANDS
+    if not COMMANDS_ENABLED:
+        return None
+    COMMANDS = CommandService(
+        STATUS_CACHE, tenants, sender,
+        Revalidator(STATUS_CACHE, fetch_all_homeworks), HOMEWORK_STATUSES)
+    return COMMANDS.start(bot)
+
+
+def start_metrics_server(health: Health) -> Optional[MetricsServer]:
+    """Запускает сервер метрик, если задан METRICS_PORT."""
+    if not METRICS_PORT:
+        return None
+    return MetricsServer(health, METRICS_HOST, int(METRICS_PORT)).start()
+
+
+def start_profiling() -> Optional[Tracer]:
+    """Включает профайлер по SIGUSR1 и трассировку этапов в TRACE_FILE."""
+    SamplingProfiler().install()
+    if not profiling.TRACE_FILE:
+        return None
+    tracer = Tracer(profiling.TRACE_FILE)
+    tracer.attach(sys.modules[__name__], TRACED_STAGES)
+    tracer.attach(OutboundQueue, ('_deliver',))
+    atexit.register(tracer.close)
+    return tracer
+
+
+def cursor_lag(tenants: Iterable[Tenant]) -> float:
+    """Наибольшее отставание курсора current_date от текущего времени."""
+    now = CLOCK.time()
+    return max(
+        (now - tenant.current_timestamp
+         for tenant in tenants if tenant.current_timestamp),
+        default=0)
+
+
+def set_clock(clock: Clock) -> Clock:
+    """Подменяет часы цикла опроса и возвращает прежние."""
+    global CLOCK
+    previous, CLOCK = CLOCK, clock
+    return previous
+
+
+def wait_next_cycle(scheduler: Scheduler, reloader: Optional[EnvReloader],
+                    tenant: Tenant, homeworks: Optional[list]) -> None:
+    """Ждёт следующего цикла, применяя изменения env-файла.
+
+    Файл проверяется не реже раза в CONFIG_CHECK_INTERVAL секунд, а
+    новые настройки подменяются только между циклами.
+    """
+    deadline = CLOCK.monotonic() + tenant.next_interval(homeworks)
+    while not scheduler.stopping:
+        remaining = deadline - CLOCK.monotonic()
+        if remaining <= 0:
+            return
+        if scheduler.wait(min(remaining, config.CONFIG_CHECK_INTERVAL)):
+            return
+        if reloader is not None and reload_settings(
+                reloader.check(), [tenant]).keys() & INTERVAL_SETTINGS:
+            deadline = CLOCK.monotonic() + tenant.next_interval(homeworks)
+
+
+def run_cycles(bot: 'telegram.Bot', tenant: Tenant, scheduler: Scheduler,
+               journal: Optional[StateJournal] = None,
+               health: Optional[Health] = None,
+               reloader: Optional[EnvReloader] = None,
+               until: Optional[Callable[[], bool]] = None) -> int:
+    """Опрашивает API по циклам до остановки или пока until не вернёт True.
+
+    Время берётся из CLOCK, а ожидание — из scheduler, поэтому с
+    VirtualClock цикл не спит. Возвращает число выполненных циклов.
+    """
+    cycles = 0
+    while not scheduler.stopping and not (until and until()):
+        homeworks = None
+        try:
+            homeworks = poll_tenant(bot, tenant)
+        finally:
+            cycles += 1
+            if health is not None:
+                health.mark_cycle(homeworks is not None)
+            if journal is not None:
+                save_tenants(journal, [tenant])
+            logging.info('Цикл закончен')
+            wait_next_cycle(scheduler, reloader, tenant, homeworks)
+    return cycles
+
+
+def shutdown(scheduler: Scheduler, outbound: OutboundQueue, outbox: Outbox,
+             updater: Optional['Updater'] = None) -> bool:
+    """Досылает очередь в пределах срока остановки и закрывает журнал.
+
+    Возвращает True, если все сообщения доставлены. Недоставленные
+    остаются в журнале и уйдут после перезапуска.
+    """
+    delivered = outbound.close(scheduler.remaining())
+    outbox.close(scheduler.remaining())
+    if delivered:
+        logging.info('Очередь сообщений отправлена, бот остановлен')
+    else:
+        logging.warning('Не отправлено сообщений: %d, они уйдут после '
+                        'перезапуска', outbox.pending())
+    if updater is not None:
+        updater.stop()
+    return delivered
+
+
 def main() -> None:
     """Основная логика работы бота."""
+    import telegram
+
+    init()
     if not check_tokens():
         logging.critical('Отсутствует одна или более переменных окружения')
         sys.exit(
             'Отсутствует одна или более переменных окружения.'
             'Программа будет остановлена')
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
-    last_message = ''
-    last_error = ''
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            list_of_homeworks = check_response(response)
-
-            if not list_of_homeworks:
-                message = 'Список homeworks пустой'
-            else:
-                message = parse_status(list_of_homeworks[0])
-            if message != last_message:
-                send_message(bot, message)
-                last_message = message
-            else:
-                logging.info(
-                    'Сообщение не изменилось'
-                    ' и не было отправлено в телеграм.')
-            current_timestamp = response.get('current_date')
-        except NotSendInTelegram as error:
-            logging.error(error, exc_info=error)
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            if error != last_error:
-                send_message(bot, message)
-                last_error = error
-            logging.error(error, exc_info=error)
-        finally:
-            logging.info('Цикл закончен')
-            time.sleep(RETRY_TIME)
+    if transport.RECORD_FILE:
+        http = transport.RecordingTransport(
+            transport.RECORD_FILE, ENDPOINT, CLOCK)
+        transport.install_transport(http)
+        atexit.register(http.close)
+    else:
+        http = transport.get_transport()
+    http.warm_up(ENDPOINT)
+    bot = telegram.Bot(token=TELEGRAM_TOKEN, request=http.telegram_request())
+    outbound = OutboundQueue(bot)
+    outbound.start()
+    outbox = Outbox(OUTBOX_FILE, outbound)
+    outbox.start()
+    tenant = Tenant(
+        PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, int(CLOCK.time()),
+        destinations=parse_destinations(TELEGRAM_DESTINATIONS))
+    journal = StateJournal(STATE_FILE)
+    restore_tenants(journal, [tenant])
+    health = Health(HEALTH_TIMEOUT, HEALTH_TIMEOUT)
+    metrics.CURSOR_LAG.set_function(lambda: cursor_lag([tenant]))
+    metrics.CIRCUIT_STATE.set_function(BREAKER.state_code)
+    start_metrics_server(health)
+    start_profiling()
+    updater = start_commands(bot, [tenant], outbound)
+    HISTORY.start()
+    scheduler = Scheduler(clock=CLOCK).install()
+    try:
+        run_cycles(outbox, tenant, scheduler, journal, health, EnvReloader())
+    finally:
+        shutdown(scheduler, outbound, outbox, updater)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,116 @@
+import random
+from abc import ABC, abstractmethod
+from typing import Callable, Container, Dict, Optional
+
+REVIEWING = 'reviewing'
+APPROVED = 'approved'
+
+
+class IntervalPolicy(ABC):
+    """Решает, через сколько секунд опрашивать API в следующий раз."""
+
+    @abstractmethod
+    def next_interval(self, homeworks: Optional[list],
+                      current_date: Optional[int]) -> float:
+        """Интервал после цикла; homeworks равен None, если цикл упал."""
+
+    def snapshot(self) -> dict:
+        """Накопленное состояние для StateJournal."""
+        return {}
+
+    def restore(self, snapshot: dict) -> None:
+        """Восстанавливает состояние из снимка."""
+
+
+class FixedInterval(IntervalPolicy):
+    """Опрос с постоянным интервалом, как раньше с RETRY_TIME."""
+
+    def __init__(self, interval: float) -> None:
+        """Запоминает постоянный интервал."""
+        self.interval = interval
+
+    def next_interval(self, homeworks: Optional[list],
+                      current_date: Optional[int]) -> float:
+        """Всегда один и тот же интервал."""
+        return self.interval
+
+
+class AdaptiveInterval(IntervalPolicy):
+    """Интервал, зависящий от статусов домашних работ.
+
+    API отдаёт только работы, изменившиеся после from_date, поэтому
+    политика помнит последние статусы. Пока какая-то работа на ревью,
+    опрос идёт с интервалом fast. Пока ничего не меняется или приходят
+    только принятые работы, интервал растёт от base в factor раз до
+    maximum. Работа считается на ревью не дольше review_horizon секунд
+    по current_date из ответа API. К интервалу добавляется случайный
+    разброс jitter, чтобы одновременно запущенные воркеры разошлись.
+    """
+
+    def __init__(self, known_statuses: Container[str], base: float,
+                 fast: float, maximum: float, factor: float = 2.0,
+                 jitter: float = 0.1, review_horizon: float = 2 * 86400,
+                 rng: Callable[[], float] = random.random) -> None:
+        """Задаёт известные статусы и границы интервала."""
+        self.known_statuses = known_statuses
+        self.base = base
+        self.fast = fast
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+        self.review_horizon = review_horizon
+        self._rng = rng
+        self._idle_cycles = 0
+        self._reviewing_since: Dict[str, int] = {}
+
+    def next_interval(self, homeworks: Optional[list],
+                      current_date: Optional[int]) -> float:
+        """Интервал по последним статусам работ."""
+        if homeworks is None:
+            return self._with_jitter(self.base)
+        statuses = self._track(homeworks, current_date or 0)
+        if self._reviewing_since:
+            self._idle_cycles = 0
+            interval = self.fast
+        elif statuses <= {APPROVED}:
+            interval = min(
+                self.base * self.factor ** self._idle_cycles, self.maximum)
+            self._idle_cycles += 1
+        else:
+            self._idle_cycles = 0
+            interval = self.base
+        return self._with_jitter(interval)
+
+    def snapshot(self) -> dict:
+        """Работы на ревью и число пустых циклов подряд."""
+        return {
+            'idle_cycles': self._idle_cycles,
+            'reviewing_since': dict(self._reviewing_since),
+        }
+
+    def restore(self, snapshot: dict) -> None:
+        """Восстанавливает работы на ревью и число пустых циклов."""
+        self._idle_cycles = snapshot.get('idle_cycles', 0)
+        self._reviewing_since = dict(snapshot.get('reviewing_since', {}))
+
+    def _track(self, homeworks: list, current_date: int) -> set:
+        statuses = set()
+        for homework in homeworks:
+            status = homework.get('status')
+            if status not in self.known_statuses:
+                continue
+            statuses.add(status)
+            name = homework.get('homework_name')
+            if status == REVIEWING:
+                self._reviewing_since.setdefault(name, current_date)
+            else:
+                self._reviewing_since.pop(name, None)
+        horizon = current_date - self.review_horizon
+        self._reviewing_since = {
+            name: since for name, since in self._reviewing_since.items()
+            if since >= horizon
+        }
+        return statuses
+
+    def _with_jitter(self, interval: float) -> float:
+        return interval * (1 + self.jitter * (2 * self._rng() - 1))
@@ -0,0 +1,252 @@
+import atexit
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+TEXT_FORMAT = '%(asctime)s, %(levelname)s, %(message)s, %(name)s'
+REDACTED = '***'
+SECRET_PATTERNS = (
+    re.compile(r'(OAuth\s+)[\w.\-]+'),
+    re.compile(r'\b\d{5,}:[\w\-]{30,}\b'),
+)
+MAX_SAMPLED_EVENTS = 10000
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения."""
+    global LOG_LEVEL, LOG_FORMAT, LOG_CONFIG, LOG_QUEUE_SIZE, LOG_MAX_LENGTH
+    global LOG_SAMPLE_BURST, LOG_SAMPLE_WINDOW
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+    LOG_CONFIG = os.getenv('LOG_CONFIG')
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    LOG_MAX_LENGTH = int(os.getenv('LOG_MAX_LENGTH', 2000))
+    LOG_SAMPLE_BURST = int(os.getenv('LOG_SAMPLE_BURST', 20))
+    LOG_SAMPLE_WINDOW = float(os.getenv('LOG_SAMPLE_WINDOW', 60))
+
+
+load_settings()
+
+
+class Redactor:
+    """Вырезает секреты и обрезает слишком длинный текст."""
+
+    def __init__(self, secrets: Iterable[Optional[str]] = (),
+                 max_length: Optional[int] = None) -> None:
+        """Запоминает секреты и предельную длину текста."""
+        self.secrets = [secret for secret in secrets if secret]
+        self.max_length = (
+            LOG_MAX_LENGTH if max_length is None else max_length)
+
+    def __call__(self, text: str) -> str:
+        """Текст без секретов не длиннее max_length символов."""
+        for secret in self.secrets:
+            text = text.replace(secret, REDACTED)
+        for pattern in SECRET_PATTERNS:
+            text = pattern.sub(
+                lambda match: (match.group(1) if match.groups() else '')
+                + REDACTED, text)
+        if len(text) > self.max_length:
+            cut = len(text) - self.max_length
+            text = f'{text[:self.max_length]}…(+{cut})'
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога одной JSON-строкой."""
+
+    def __init__(self, redactor: Redactor) -> None:
+        """Запоминает redactor для вырезания секретов."""
+        super().__init__()
+        self.redactor = redactor
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Сериализует запись, вырезав секреты."""
+        payload = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': self.redactor(record.getMessage()),
+        }
+        if record.exc_info:
+            payload['exc'] = self.redactor(
+                self.formatException(record.exc_info))
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            payload['suppressed'] = suppressed
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Прежний текстовый формат, но без секретов."""
+
+    def __init__(self, redactor: Redactor) -> None:
+        """Запоминает redactor для вырезания секретов."""
+        super().__init__(TEXT_FORMAT)
+        self.redactor = redactor
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Форматирует запись, вырезав секреты."""
+        text = self.redactor(super().format(record))
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            text += f' (пропущено похожих: {suppressed})'
+        return text
+
+
+class RedactingFilter(logging.Filter):
+    """Вырезает секреты из самой записи, до любого форматтера.
+
+    Нужен для LOG_CONFIG, где форматтеры задаёт пользователь: сообщение
+    подставляется и очищается, а трассировка исключения заранее
+    форматируется в exc_text без секретов.
+    """
+
+    def __init__(self, redactor: Redactor) -> None:
+        """Запоминает redactor для вырезания секретов."""
+        super().__init__()
+        self.redactor = redactor
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Очищает запись и всегда пропускает её."""
+        record.msg = self.redactor(record.getMessage())
+        record.args = ()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        if record.exc_text:
+            record.exc_text = self.redactor(record.exc_text)
+        return True
+
+
+def configured_handlers() -> List[logging.Handler]:
+    """Обработчики корневого и всех именованных логгеров."""
+    loggers = [logging.getLogger()] + [
+        logger for logger in logging.root.manager.loggerDict.values()
+        if isinstance(logger, logging.Logger)]
+    handlers = []
+    for logger in loggers:
+        for handler in logger.handlers:
+            if handler not in handlers:
+                handlers.append(handler)
+    return handlers
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает не больше burst одинаковых событий за window секунд.
+
+    Событие определяется логгером, уровнем и шаблоном сообщения до
+    подстановки аргументов, поэтому проверка дешёвая. Число
+    отброшенных записей добавляется к первой записи следующего окна.
+    """
+
+    def __init__(self, burst: Optional[int] = None,
+                 window: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Задаёт лимит burst событий за window секунд."""
+        super().__init__()
+        self.burst = LOG_SAMPLE_BURST if burst is None else burst
+        self.window = LOG_SAMPLE_WINDOW if window is None else window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._events: Dict[Tuple[str, int, str], List[float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """True, если запись нужно записать."""
+        key = (record.name, record.levelno, str(record.msg))
+        now = self._clock()
+        with self._lock:
+            state = self._events.get(key)
+            if state is None or now - state[0] >= self.window:
+                if len(self._events) >= MAX_SAMPLED_EVENTS:
+                    self._events.clear()
+                if state is not None and state[2]:
+                    record.suppressed = int(state[2])
+                state = [now, 0, 0]
+                self._events[key] = state
+            if state[1] >= self.burst:
+                state[2] += 1
+                return False
+            state[1] += 1
+            return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который не блокирует и не форматирует запись.
+
+    Форматирование откладывается до потока QueueListener. При
+    переполненной очереди запись отбрасывается и учитывается в dropped.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        """Создаёт обработчик поверх очереди log_queue."""
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Отдаёт запись как есть, без форматирования."""
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Кладёт запись в очередь или отбрасывает её."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(secrets: Iterable[Optional[str]] = ()) -> None:
+    """Настраивает логирование корневого логгера.
+
+    Если задан LOG_CONFIG, конфигурация читается из JSON-файла в
+    формате logging.config.dictConfig, а ко всем её обработчикам
+    добавляется RedactingFilter. Иначе записи через очередь
+    уходят в поток, который форматирует их (JSON или текст по
+    LOG_FORMAT) и пишет в stdout.
+    """
+    global _listener
+    shutdown_logging()
+    redactor = Redactor(secrets)
+    if LOG_CONFIG:
+        with open(LOG_CONFIG, encoding='utf-8') as file:
+            logging.config.dictConfig(json.load(file))
+        redacting = RedactingFilter(redactor)
+        for handler in configured_handlers():
+            handler.addFilter(redacting)
+        return
+    formatter_class = TextFormatter if LOG_FORMAT == 'text' else JsonFormatter
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter_class(redactor))
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Дописывает очередь логов и останавливает поток записи."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
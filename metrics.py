@@ -0,0 +1,298 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from http import HTTPStatus
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Metric(ABC):
+    """Общая часть метрик: имя, описание, метки и блокировка."""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str,
+                 labels: Tuple[str, ...] = ()) -> None:
+        """Создаёт метрику с именем, описанием и метками."""
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        """Строки метрики в текстовом формате Prometheus."""
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ] + self._samples()
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Строки значений метрики без HELP и TYPE."""
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик с метками."""
+
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Создаёт счётчик без значений."""
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """Увеличивает счётчик для набора меток."""
+        with self._lock:
+            self._values[label_values] = (
+                self._values.get(label_values, 0) + amount)
+
+    def value(self, *label_values: str) -> float:
+        """Текущее значение для набора меток."""
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f'{self.name}{_format_labels(self.labels, labels)} {value}'
+            for labels, value in values
+        ]
+
+
+class Gauge(Metric):
+    """Значение, которое может как расти, так и падать.
+
+    Вместо set можно задать функцию, которая вызывается при каждом
+    чтении метрики.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Создаёт шкалу без значений."""
+        super().__init__(*args, **kwargs)
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        """Задаёт значение."""
+        with self._lock:
+            self._value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Вычислять значение функцией при чтении."""
+        with self._lock:
+            self._function = function
+
+    def value(self) -> float:
+        """Текущее значение."""
+        with self._lock:
+            function, value = self._function, self._value
+        return function() if function is not None else value
+
+    def _samples(self) -> List[str]:
+        return [f'{self.name} {self.value()}']
+
+
+class Histogram(Metric):
+    """Гистограмма длительностей с фиксированными корзинами."""
+
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+                 **kwargs) -> None:
+        """Создаёт гистограмму с корзинами buckets."""
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Добавляет наблюдение."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Замеряет длительность блока with."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def count(self) -> int:
+        """Число наблюдений."""
+        with self._lock:
+            return sum(self._counts)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            label = '+Inf' if bound == float('inf') else repr(float(bound))
+            lines.append(f'{self.name}_bucket{{le="{label}"}} {cumulative}')
+        lines.append(f'{self.name}_sum {total}')
+        lines.append(f'{self.name}_count {cumulative}')
+        return lines
+
+
+class Registry:
+    """Набор метрик, отдаваемый на /metrics."""
+
+    def __init__(self) -> None:
+        """Создаёт пустой реестр."""
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Добавляет метрику в реестр."""
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class Health:
+    """Живость и готовность бота по времени последних циклов опроса.
+
+    Бот жив, пока циклы заканчиваются не реже live_timeout секунд, и
+    готов, пока последний успешный опрос был не раньше ready_timeout
+    секунд назад.
+    """
+
+    def __init__(self, live_timeout: float, ready_timeout: float,
+                 clock: Callable[[], float] = time.time) -> None:
+        """Задаёт таймауты живости и готовности."""
+        self.live_timeout = live_timeout
+        self.ready_timeout = ready_timeout
+        self._clock = clock
+        self.last_cycle = clock()
+        self.last_success: Optional[float] = None
+
+    def mark_cycle(self, success: bool) -> None:
+        """Отмечает конец цикла опроса."""
+        now = self._clock()
+        self.last_cycle = now
+        if success:
+            self.last_success = now
+            LAST_SUCCESS.set(now)
+
+    def is_live(self) -> bool:
+        """Циклы опроса идут."""
+        return self._clock() - self.last_cycle <= self.live_timeout
+
+    def is_ready(self) -> bool:
+        """Недавно был успешный опрос."""
+        return (self.last_success is not None
+                and self._clock() - self.last_success <= self.ready_timeout)
+
+
+REGISTRY = Registry()
+API_LATENCY = REGISTRY.register(Histogram(
+    'homework_api_request_seconds',
+    'Длительность запроса к API Практикума'))
+SEND_LATENCY = REGISTRY.register(Histogram(
+    'homework_telegram_send_seconds',
+    'Длительность отправки сообщения в Telegram'))
+ERRORS = REGISTRY.register(Counter(
+    'homework_errors_total', 'Ошибки цикла по классу исключения',
+    labels=('exception',)))
+CURSOR_LAG = REGISTRY.register(Gauge(
+    'homework_cursor_lag_seconds',
+    'Наибольшее отставание current_date от текущего времени'))
+LAST_SUCCESS = REGISTRY.register(Gauge(
+    'homework_last_success_timestamp_seconds',
+    'Время последнего успешного опроса API'))
+CIRCUIT_STATE = REGISTRY.register(Gauge(
+    'homework_api_circuit_state',
+    'Предохранитель API: 0 закрыт, 1 полуоткрыт, 2 открыт'))
+
+
+class MetricsServer:
+    """HTTP-сервер с /metrics, /healthz и /readyz в отдельном потоке."""
+
+    def __init__(self, health: Health, host: str = '127.0.0.1',
+                 port: int = 0, registry: Registry = REGISTRY) -> None:
+        """Открывает сокет на host и port; поток ещё не запущен."""
+        from http.server import ThreadingHTTPServer
+
+        self.health = health
+        self.registry = registry
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name='metrics', daemon=True)
+
+    @property
+    def port(self) -> int:
+        """Порт, на котором слушает сервер."""
+        return self._server.server_address[1]
+
+    def start(self) -> 'MetricsServer':
+        """Запускает сервер."""
+        self._thread.start()
+        logging.info('Метрики доступны на порту %d', self.port)
+        return self
+
+    def stop(self) -> None:
+        """Останавливает сервер."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        from http.server import BaseHTTPRequestHandler
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    status = HTTPStatus.OK
+                    body = server.registry.render()
+                elif self.path in ('/healthz', '/readyz'):
+                    check = (server.health.is_live if self.path == '/healthz'
+                             else server.health.is_ready)
+                    ok = check()
+                    status = (HTTPStatus.OK if ok
+                              else HTTPStatus.SERVICE_UNAVAILABLE)
+                    body = 'ok\n' if ok else 'fail\n'
+                else:
+                    status, body = HTTPStatus.NOT_FOUND, 'not found\n'
+                payload = body.encode()
+                self.send_response(status)
+                self.send_header(
+                    'Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,275 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import metrics
+import transport
+
+if TYPE_CHECKING:
+    import telegram
+
+MAX_MESSAGE_LENGTH = 4096
+MESSAGE_SEPARATOR = '\n\n'
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения."""
+    global PER_CHAT_RATE, GLOBAL_RATE, MERGE_WINDOW, SEND_WORKERS
+    PER_CHAT_RATE = float(os.getenv('TELEGRAM_PER_CHAT_RATE', 1))
+    GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+    MERGE_WINDOW = float(os.getenv('TELEGRAM_MERGE_WINDOW', 1))
+    SEND_WORKERS = int(os.getenv('TELEGRAM_SEND_WORKERS', 4))
+
+
+load_settings()
+
+
+class TokenBucket:
+    """Ведро токенов: не больше rate событий в секунду, всплеск до capacity."""
+
+    def __init__(self, rate: float, capacity: float,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Создаёт полное ведро на capacity токенов."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Сколько секунд ждать до появления токена."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Забирает токен; перед этим delay() должен вернуть 0."""
+        self._refill()
+        self.tokens -= 1
+
+
+@dataclass
+class OutboundMessage:
+    """Сообщение в очереди на отправку."""
+
+    chat_id: str
+    text: str
+    enqueued_at: float
+    on_done: Optional[Callable[[bool, bool], None]] = field(default=None)
+
+
+class OutboundQueue:
+    """Очередь исходящих сообщений Telegram с учётом лимитов.
+
+    Повторяет интерфейс bot.send_message, поэтому её можно передать в
+    poll_tenant вместо бота: постановка в очередь не блокирует цикл
+    опроса. Отдельные потоки отправляют сообщения, соблюдая лимиты на
+    чат и на бота целиком, выдерживают паузу из RetryAfter и склеивают
+    сообщения одному чату, накопившиеся за merge_window секунд.
+
+    Потоков workers, и каждый чат в любой момент отправляет только один
+    из них, так что порядок сообщений в чате сохраняется, а медленный
+    чат занимает один поток и не задерживает остальные.
+    """
+
+    def __init__(self, bot: 'telegram.Bot',
+                 per_chat_rate: Optional[float] = None,
+                 global_rate: Optional[float] = None,
+                 merge_window: Optional[float] = None,
+                 workers: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Создаёт отправку через бота с лимитами и склейкой."""
+        if global_rate is None:
+            global_rate = GLOBAL_RATE
+        self.bot = bot
+        self.per_chat_rate = (
+            PER_CHAT_RATE if per_chat_rate is None else per_chat_rate)
+        self.merge_window = (
+            MERGE_WINDOW if merge_window is None else merge_window)
+        self.workers = SEND_WORKERS if workers is None else workers
+        self._clock = clock
+        self._global_bucket = TokenBucket(global_rate, global_rate, clock)
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._pending: 'OrderedDict[str, List[OutboundMessage]]' = (
+            OrderedDict())
+        self._condition = threading.Condition()
+        self._in_flight: Dict[str, int] = {}
+        self._closing = False
+        self._threads: List[threading.Thread] = []
+
+    def send_message(self, chat_id: str, text: str,
+                     on_done: Optional[Callable[[bool, bool], None]] = None
+                     ) -> None:
+        """Ставит сообщение в очередь.
+
+        После попытки отправки вызывается on_done(ok, permanent), где
+        permanent означает, что повтор не поможет: Telegram отверг само
+        сообщение или чат.
+        """
+        message = OutboundMessage(str(chat_id), text, self._clock(), on_done)
+        with self._condition:
+            self._pending.setdefault(message.chat_id, []).append(message)
+            self._condition.notify()
+
+    def pending(self) -> int:
+        """Сколько сообщений ещё не отправлено."""
+        with self._condition:
+            return sum(self._in_flight.values()) + sum(
+                len(messages) for messages in self._pending.values())
+
+    def start(self) -> None:
+        """Запускает потоки отправки."""
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, name=f'outbound-queue-{number}',
+                daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Ждёт отправки очереди не дольше timeout и останавливает потоки.
+
+        Возвращает True, если все сообщения отправлены.
+        """
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        deadline = None if timeout is None else self._clock() + timeout
+        for thread in self._threads:
+            thread.join(
+                None if deadline is None
+                else max(deadline - self._clock(), 0))
+        return self.pending() == 0
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                batch = self._next_batch()
+                while batch is None:
+                    if (self._closing and not self._pending
+                            and not self._in_flight):
+                        return
+                    self._condition.wait(self._wait_time())
+                    batch = self._next_batch()
+                chat_id, messages = batch
+                self._in_flight[chat_id] = len(messages)
+            try:
+                self._deliver(chat_id, messages)
+            finally:
+                with self._condition:
+                    del self._in_flight[chat_id]
+                    self._condition.notify_all()
+
+    def _ready_at(self, chat_id: str,
+                  messages: List[OutboundMessage]) -> float:
+        merge_until = messages[0].enqueued_at + self.merge_window
+        if self._closing:
+            merge_until = 0
+        return max(merge_until, self._blocked_until.get(chat_id, 0))
+
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.per_chat_rate, 1, self._clock)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _wait_time(self) -> Optional[float]:
+        now = self._clock()
+        waits = [
+            max(self._ready_at(chat_id, messages) - now,
+                self._chat_bucket(chat_id).delay())
+            for chat_id, messages in self._pending.items()
+            if chat_id not in self._in_flight
+        ]
+        if not waits:
+            return None
+        return max(min(waits), self._global_bucket.delay(), 0.001)
+
+    def _next_batch(self) -> Optional[Tuple[str, List[OutboundMessage]]]:
+        if self._global_bucket.delay() > 0:
+            return None
+        now = self._clock()
+        for chat_id, messages in self._pending.items():
+            if (chat_id in self._in_flight
+                    or self._ready_at(chat_id, messages) > now):
+                continue
+            bucket = self._chat_bucket(chat_id)
+            if bucket.delay() > 0:
+                continue
+            bucket.take()
+            self._global_bucket.take()
+            batch = self._take_merged(chat_id, messages)
+            return chat_id, batch
+        return None
+
+    def _take_merged(self, chat_id: str,
+                     messages: List[OutboundMessage]) -> List[OutboundMessage]:
+        length = len(messages[0].text)
+        count = 1
+        for message in messages[1:]:
+            length += len(MESSAGE_SEPARATOR) + len(message.text)
+            if length > MAX_MESSAGE_LENGTH:
+                break
+            count += 1
+        batch = messages[:count]
+        del messages[:count]
+        if not messages:
+            del self._pending[chat_id]
+        return batch
+
+    def _requeue(self, chat_id: str, messages: List[OutboundMessage],
+                 retry_after: float) -> None:
+        with self._condition:
+            self._blocked_until[chat_id] = self._clock() + retry_after
+            pending = self._pending.setdefault(chat_id, [])
+            pending[:0] = messages
+            self._pending.move_to_end(chat_id, last=False)
+
+    def _deliver(self, chat_id: str, messages: List[OutboundMessage]) -> None:
+        import telegram
+
+        text = MESSAGE_SEPARATOR.join(message.text for message in messages)
+        started = time.perf_counter()
+        try:
+            self.bot.send_message(chat_id, text)
+        except telegram.error.RetryAfter as error:
+            logging.warning(
+                'Telegram просит подождать %s с перед отправкой в чат %s',
+                error.retry_after, chat_id)
+            self._requeue(chat_id, messages, error.retry_after)
+            return
+        except Exception as error:
+            metrics.ERRORS.inc('CannotSendMessageToTelegram')
+            logging.error(
+                'Сообщение в Telegram не отправлено в чат %s: %s',
+                chat_id, error, exc_info=error)
+            self._finish(messages, False, isinstance(error, (
+                telegram.error.BadRequest, telegram.error.Unauthorized,
+                telegram.error.ChatMigrated)))
+            return
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.SEND_LATENCY.observe(elapsed)
+            transport.get_transport().record_latency('telegram', elapsed)
+        logging.info('Сообщение в Telegram отправлено: %s', text)
+        self._finish(messages, True)
+
+    @staticmethod
+    def _finish(messages: List[OutboundMessage], ok: bool,
+                permanent: bool = False) -> None:
+        for message in messages:
+            if message.on_done is not None:
+                message.on_done(ok, permanent)
@@ -0,0 +1,245 @@
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+COMPACT_THRESHOLD = 1000
+MAX_BACKOFF_STEP = 32
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения."""
+    global OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_DELAY, OUTBOX_MAX_RETRY_DELAY
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 10))
+    OUTBOX_RETRY_DELAY = float(os.getenv('OUTBOX_RETRY_DELAY', 5))
+    OUTBOX_MAX_RETRY_DELAY = float(os.getenv('OUTBOX_MAX_RETRY_DELAY', 600))
+
+
+load_settings()
+
+
+@dataclass
+class OutboxRecord:
+    """Сообщение, ожидающее подтверждения доставки."""
+
+    record_id: int
+    chat_id: str
+    text: str
+    attempts: int = 0
+
+
+class Outbox:
+    """Журнал исходящих сообщений на диске с фоновой доставкой.
+
+    send_message дописывает строку в журнал и сразу возвращает
+    управление, поэтому цикл опроса не ждёт Telegram. Доставкой
+    занимается sender (обычно OutboundQueue): после успешной отправки
+    в журнал пишется подтверждение, после неудачной сообщение
+    повторяется с растущей, но не больше max_retry_delay, задержкой,
+    пока не уйдёт: сбой сети или Telegram любой длины не теряет
+    уведомлений. Удаляются только сообщения, которые Telegram отверг
+    окончательно (BadRequest, Unauthorized, ChatMigrated). После
+    max_attempts неудач подряд в лог пишется ошибка. Неподтверждённые
+    сообщения переотправляются после перезапуска, то есть доставка хотя
+    бы один раз. Журнал периодически сжимается до неподтверждённых
+    записей.
+    """
+
+    def __init__(self, path: str, sender,
+                 max_attempts: Optional[int] = None,
+                 retry_delay: Optional[float] = None,
+                 max_retry_delay: Optional[float] = None,
+                 fsync: bool = False,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Запоминает журнал path; отправка начнётся в start()."""
+        self.path = path
+        self.sender = sender
+        self.max_attempts = (
+            OUTBOX_MAX_ATTEMPTS if max_attempts is None else max_attempts)
+        self.retry_delay = (
+            OUTBOX_RETRY_DELAY if retry_delay is None else retry_delay)
+        self.max_retry_delay = (
+            OUTBOX_MAX_RETRY_DELAY if max_retry_delay is None
+            else max_retry_delay)
+        self.fsync = fsync
+        self._clock = clock
+        self._records: Dict[int, OutboxRecord] = {}
+        self._retries: List[Tuple[float, int]] = []
+        self._next_id = 1
+        self._acked = 0
+        self._file = None
+        self._condition = threading.Condition()
+        self._closing = False
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self) -> None:
+        """Восстанавливает неподтверждённые сообщения и сжимает журнал."""
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                for line in file:
+                    self._replay(line)
+        except FileNotFoundError:
+            pass
+        if self._records:
+            self._next_id = max(self._records) + 1
+            logging.info(
+                'В журнале %s неотправленных сообщений: %d',
+                self.path, len(self._records))
+        self._compact()
+
+    def _replay(self, line: str) -> None:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            logging.warning('Пропущена битая строка журнала %s', self.path)
+            return
+        record_id = entry['id']
+        self._next_id = max(self._next_id, record_id + 1)
+        if entry['op'] == 'add':
+            self._records[record_id] = OutboxRecord(
+                record_id, entry['chat_id'], entry['text'])
+        else:
+            self._records.pop(record_id, None)
+
+    def _append(self, entry: dict) -> None:
+        if self._file is None:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                self._write(file, entry)
+            return
+        self._write(self._file, entry)
+
+    def _write(self, file, entry: dict) -> None:
+        file.write(
+            json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+            + '\n')
+        file.flush()
+        if self.fsync:
+            os.fsync(file.fileno())
+
+    def _compact(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            for record in self._records.values():
+                file.write(json.dumps(
+                    {'op': 'add', 'id': record.record_id,
+                     'chat_id': record.chat_id, 'text': record.text},
+                    ensure_ascii=False, separators=(',', ':')) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._acked = 0
+
+    def start(self) -> None:
+        """Открывает журнал, отправляет хвост и запускает поток повторов."""
+        self.open()
+        self._thread = threading.Thread(
+            target=self._run, name='outbox', daemon=True)
+        self._thread.start()
+        with self._condition:
+            records = list(self._records.values())
+        for record in records:
+            self._dispatch(record)
+
+    def send_message(self, chat_id: str, text: str) -> None:
+        """Сохраняет сообщение в журнал и передаёт его на доставку.
+
+        После close сообщение только дописывается в журнал и уйдёт
+        после перезапуска; до start журнал ещё не прочитан, и запись в
+        него считается ошибкой.
+        """
+        with self._condition:
+            if self._file is None and not self._closing:
+                raise RuntimeError(
+                    f'Журнал {self.path} ещё не открыт, вызовите start')
+            record = OutboxRecord(self._next_id, str(chat_id), text)
+            self._next_id += 1
+            self._records[record.record_id] = record
+            self._append({
+                'op': 'add', 'id': record.record_id,
+                'chat_id': record.chat_id, 'text': text})
+            if self._file is None:
+                logging.warning(
+                    'Журнал %s уже закрыт, сообщение в чат %s отправится '
+                    'после перезапуска', self.path, record.chat_id)
+                return
+        self._dispatch(record)
+
+    def pending(self) -> int:
+        """Сколько сообщений ещё не подтверждено."""
+        with self._condition:
+            return len(self._records)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Останавливает поток повторов и закрывает журнал."""
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._condition:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _dispatch(self, record: OutboxRecord) -> None:
+        self.sender.send_message(
+            record.chat_id, record.text,
+            on_done=partial(self._on_done, record.record_id))
+
+    def _on_done(self, record_id: int, ok: bool,
+                 permanent: bool = False) -> None:
+        with self._condition:
+            record = self._records.get(record_id)
+            if record is None or self._file is None:
+                return
+            if not ok and permanent:
+                logging.error(
+                    'Telegram отверг сообщение в чат %s, оно удалено '
+                    'из журнала', record.chat_id)
+            elif not ok:
+                self._retry(record)
+                return
+            del self._records[record_id]
+            self._append({'op': 'ack', 'id': record_id})
+            self._acked += 1
+            if self._acked >= COMPACT_THRESHOLD:
+                self._compact()
+
+    def _retry(self, record: OutboxRecord) -> None:
+        record.attempts += 1
+        if record.attempts == self.max_attempts:
+            logging.error(
+                'Сообщение в чат %s не доставлено после %d попыток, '
+                'повторы продолжаются', record.chat_id, record.attempts)
+        delay = min(
+            self.retry_delay * 2 ** min(record.attempts - 1, MAX_BACKOFF_STEP),
+            self.max_retry_delay)
+        heapq.heappush(
+            self._retries, (self._clock() + delay, record.record_id))
+        self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closing and not self._due():
+                    timeout = None
+                    if self._retries:
+                        timeout = self._retries[0][0] - self._clock()
+                    self._condition.wait(timeout)
+                if self._closing:
+                    return
+                _, record_id = heapq.heappop(self._retries)
+                record = self._records.get(record_id)
+            if record is not None:
+                self._dispatch(record)
+
+    def _due(self) -> bool:
+        return bool(self._retries) and self._retries[0][0] <= self._clock()
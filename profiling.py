@@ -0,0 +1,170 @@
+import functools
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Iterable, List, Optional, Tuple
+
+PROFILE_SIGNAL = signal.SIGUSR1
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения."""
+    global TRACE_FILE, PROFILE_DIR, PROFILE_INTERVAL
+    TRACE_FILE = os.getenv('TRACE_FILE')
+    PROFILE_DIR = os.getenv('PROFILE_DIR', '.')
+    PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.005))
+
+
+load_settings()
+
+
+class Tracer:
+    """Запись длительности этапов цикла в файл трассировки.
+
+    attach подменяет функции на обёртки, которые пишут событие на каждый
+    вызов, а close возвращает исходные функции, так что без трассировки
+    лишних вызовов нет вовсе. Файл в формате Chrome Trace Event
+    (JSON-массив без закрывающей скобки) открывается в ui.perfetto.dev.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Запоминает файл трассировки path."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        if self._file.tell() == 0:
+            self._file.write('[\n')
+        self._originals: List[Tuple[object, str, Callable]] = []
+        self._pid = os.getpid()
+
+    def attach(self, owner: object, names: Iterable[str]) -> 'Tracer':
+        """Оборачивает функции names модуля или класса owner."""
+        for name in names:
+            original = getattr(owner, name)
+            self._originals.append((owner, name, original))
+            setattr(owner, name, self._wrap(original, name))
+        return self
+
+    def record(self, name: str, started: float, duration: float) -> None:
+        """Пишет событие: этап name длился duration секунд с started."""
+        event = json.dumps({
+            'name': name, 'ph': 'X', 'pid': self._pid,
+            'tid': threading.get_ident(),
+            'ts': round(started * 1e6), 'dur': round(duration * 1e6),
+        })
+        with self._lock:
+            if self._file is not None:
+                self._file.write(event + ',\n')
+
+    def close(self) -> None:
+        """Возвращает исходные функции и закрывает файл."""
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals = []
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _wrap(self, func: Callable, name: str) -> Callable:
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            started = time.time()
+            counter = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, started, time.perf_counter() - counter)
+        return traced
+
+
+def frame_stack(frame) -> str:
+    """Стек кадра от корня в формате collapsed stacks."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} '
+                     f'({os.path.basename(code.co_filename)}:'
+                     f'{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """Сэмплирующий профайлер всех потоков, включаемый на лету.
+
+    Пока он выключен, процесс ничего не платит. Включённый, он раз в
+    interval секунд снимает стеки всех потоков из отдельного потока и
+    считает одинаковые. stop пишет их в PROFILE_DIR в формате collapsed
+    stacks (flamegraph.pl, speedscope). install вешает toggle на
+    SIGUSR1: первый сигнал начинает запись, второй сохраняет её.
+    """
+
+    def __init__(self, directory: Optional[str] = None,
+                 interval: Optional[float] = None) -> None:
+        """Создаёт выключенный профайлер с выводом в directory."""
+        self.directory = PROFILE_DIR if directory is None else directory
+        self.interval = PROFILE_INTERVAL if interval is None else interval
+        self._stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        """Идёт ли запись."""
+        return self._thread is not None
+
+    def install(self) -> 'SamplingProfiler':
+        """Включает и выключает запись по SIGUSR1."""
+        signal.signal(PROFILE_SIGNAL, self.toggle)
+        return self
+
+    def toggle(self, signum: Optional[int] = None,
+               frame=None) -> Optional[str]:
+        """Начинает запись или сохраняет её; возвращает путь к файлу."""
+        if self.running:
+            return self.stop()
+        self.start()
+        return None
+
+    def start(self) -> None:
+        """Начинает снимать стеки."""
+        self._stacks = Counter()
+        self._stopped.clear()
+        self._started_at = time.time()
+        self._thread = threading.Thread(
+            target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+        logging.info('Профилирование запущено, раз в %.3f с',
+                     self.interval)
+
+    def stop(self) -> str:
+        """Останавливает запись и сохраняет стеки в файл."""
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        path = os.path.join(
+            self.directory,
+            f'profile-{os.getpid()}-{int(self._started_at)}.folded')
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self._stacks.most_common():
+                file.write(f'{stack} {count}\n')
+        logging.info('Профиль за %.0f с сохранён в %s',
+                     time.time() - self._started_at, path)
+        return path
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {
+                thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self._stacks[
+                        f'{names.get(ident, ident)};{frame_stack(frame)}'] += 1
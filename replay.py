@@ -0,0 +1,149 @@
+"""Запись ответов ENDPOINT и их ускоренное воспроизведение.
+
+Записать ответы API во время обычной работы бота:
+    RECORD_FILE=responses.jsonl.gz python homework.py
+
+Прогнать записанный лог через настоящий цикл опроса по виртуальным
+часам и напечатать уведомления, которые отправил бы бот:
+    python replay.py responses.jsonl.gz
+"""
+import json
+import logging
+import sys
+import time
+from http import HTTPStatus
+from typing import Iterator, List, Optional
+
+import homework
+import transport
+from clock import Clock, VirtualClock
+from scheduler import Scheduler
+from transport import open_log
+
+
+def read_log(path: str) -> Iterator[dict]:
+    """Записи лога по порядку."""
+    with open_log(path, 'r') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+class RecordedResponse:
+    """Ответ из лога с тем подмножеством API requests.Response, что нужно."""
+
+    def __init__(self, status_code: int, body: str) -> None:
+        """Запоминает код и тело ответа."""
+        self.status_code = status_code
+        self.text = body
+        self.content = body.encode('utf-8')
+
+    @property
+    def reason(self) -> str:
+        """Текстовое описание кода ответа."""
+        try:
+            return HTTPStatus(self.status_code).phrase
+        except ValueError:
+            return ''
+
+    def json(self):
+        """Тело ответа как JSON."""
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        """Тело ответа частями по chunk_size байт."""
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self) -> None:
+        """Ничего не держит, закрывать нечего."""
+
+
+class ReplayTransport:
+    """Отдаёт записанные ответы по порядку вместо запросов в сеть.
+
+    С clock перед каждым ответом виртуальные часы догоняют момент,
+    когда ответ был записан, так что курсор и отметки времени в
+    уведомлениях совпадают с записью, а ожидания между ними не длятся.
+    """
+
+    def __init__(self, path: str, clock: Optional[VirtualClock] = None):
+        """Загружает записанные ответы из лога path."""
+        self.clock = clock
+        self._entries = iter(read_log(path))
+        self._next: Optional[dict] = next(self._entries, None)
+        self.replayed = 0
+
+    @property
+    def exhausted(self) -> bool:
+        """Отданы ли все ответы из лога."""
+        return self._next is None
+
+    @property
+    def next_at(self) -> Optional[float]:
+        """Когда был записан следующий ответ."""
+        return None if self._next is None else self._next['at']
+
+    def get(self, url: str, **kwargs) -> RecordedResponse:
+        """Следующий записанный ответ."""
+        entry = self._next
+        if entry is None:
+            raise ConnectionError('Записанные ответы закончились')
+        self._next = next(self._entries, None)
+        self.replayed += 1
+        if self.clock is not None:
+            self.clock.advance(entry['at'] - self.clock.time())
+        if not entry['status']:
+            raise ConnectionError(entry['body'])
+        return RecordedResponse(entry['status'], entry['body'])
+
+    def close(self) -> None:
+        """Закрывать нечего."""
+
+
+class PrintingBot:
+    """Вместо отправки в Telegram запоминает и печатает сообщения."""
+
+    def __init__(self, clock: Clock) -> None:
+        """Создаёт бота, печатающего время по часам clock."""
+        self.clock = clock
+        self.sent: List[tuple] = []
+
+    def send_message(self, chat_id: str, text: str) -> None:
+        """Запоминает сообщение с виртуальным временем отправки."""
+        self.sent.append((self.clock.time(), chat_id, text))
+        print(time.strftime('%Y-%m-%d %H:%M:%S',
+                            time.gmtime(self.clock.time())), text)
+
+
+def replay(path: str, bot=None, tenant: Optional[homework.Tenant] = None,
+           clock: Optional[VirtualClock] = None) -> int:
+    """Прогоняет лог через цикл опроса по виртуальным часам.
+
+    Возвращает число выполненных циклов. Транспорт и часы модуля
+    homework подменяются на время прогона и затем возвращаются.
+    """
+    replayer = ReplayTransport(path)
+    if replayer.exhausted:
+        return 0
+    clock = clock or VirtualClock(epoch=replayer.next_at)
+    replayer.clock = clock
+    bot = bot or PrintingBot(clock)
+    tenant = tenant or homework.Tenant('replay', 'replay')
+    previous = homework.set_clock(clock)
+    http = transport.install_transport(replayer)
+    try:
+        return homework.run_cycles(
+            bot, tenant, Scheduler(clock=clock),
+            until=lambda: replayer.exhausted)
+    finally:
+        transport.install_transport(http)
+        homework.set_clock(previous)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    started = time.perf_counter()
+    cycles = replay(sys.argv[1])
+    print(f'Циклов: {cycles}, '
+          f'за {time.perf_counter() - started:.2f} с', file=sys.stderr)
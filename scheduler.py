@@ -0,0 +1,106 @@
+import logging
+import os
+import signal
+import threading
+from typing import Callable, List, Optional
+
+from clock import SYSTEM_CLOCK, Clock
+
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+TRIGGER_SIGNAL = signal.SIGUSR2
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения."""
+    global SHUTDOWN_TIMEOUT
+    SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 20))
+
+
+load_settings()
+
+
+class Scheduler:
+    """Ожидание следующего цикла опроса, которое можно прервать.
+
+    wait спит не дольше заданного времени, но просыпается сразу после
+    trigger (внеочередной опрос) или stop. После stop начинается отсчёт
+    shutdown_timeout секунд, за которые нужно дослать сообщения и
+    выйти; remaining говорит, сколько из них осталось. install вешает
+    stop на SIGTERM и SIGINT, а trigger — на SIGUSR2. Сроки и само
+    ожидание идут по clock, так что с VirtualClock wait не спит.
+    """
+
+    def __init__(self, shutdown_timeout: Optional[float] = None,
+                 clock: Clock = SYSTEM_CLOCK) -> None:
+        """Создаёт планировщик без назначенного ожидания."""
+        self.shutdown_timeout = (
+            SHUTDOWN_TIMEOUT if shutdown_timeout is None
+            else shutdown_timeout)
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._triggered = False
+        self._deadline: Optional[float] = None
+        self._listeners: List[Callable[[], None]] = []
+
+    @property
+    def stopping(self) -> bool:
+        """Запрошена ли остановка."""
+        return self._deadline is not None
+
+    def install(self) -> 'Scheduler':
+        """Подписывается на сигналы остановки и внеочередного опроса."""
+        for signum in STOP_SIGNALS:
+            signal.signal(signum, self.stop)
+        signal.signal(TRIGGER_SIGNAL, self.trigger)
+        return self
+
+    def subscribe(self, listener: Callable[[], None]) -> None:
+        """Вызывает listener при каждом trigger и stop."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[], None]) -> None:
+        """Больше не вызывает listener."""
+        self._listeners.remove(listener)
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """Ждёт timeout секунд; True, если разбудили раньше."""
+        with self._condition:
+            woken = self._clock.wait(
+                self._condition, lambda: self._triggered or self.stopping,
+                timeout)
+            self._triggered = False
+        return woken
+
+    def take_trigger(self) -> bool:
+        """Был ли trigger с прошлого вызова."""
+        with self._condition:
+            triggered, self._triggered = self._triggered, False
+        return triggered
+
+    def trigger(self, signum: Optional[int] = None, frame=None) -> None:
+        """Будит ожидание ради внеочередного опроса."""
+        with self._condition:
+            self._triggered = True
+            self._condition.notify_all()
+        self._notify()
+
+    def stop(self, signum: Optional[int] = None, frame=None) -> None:
+        """Запрашивает остановку и начинает отсчёт shutdown_timeout."""
+        with self._condition:
+            if self.stopping:
+                return
+            self._deadline = self._clock.monotonic() + self.shutdown_timeout
+            self._condition.notify_all()
+        logging.info('Остановка по сигналу %s, на завершение %.0f с',
+                     signum, self.shutdown_timeout)
+        self._notify()
+
+    def remaining(self) -> float:
+        """Сколько секунд осталось на завершение после stop."""
+        if self._deadline is None:
+            return self.shutdown_timeout
+        return max(self._deadline - self._clock.monotonic(), 0.0)
+
+    def _notify(self) -> None:
+        for listener in self._listeners:
+            listener()
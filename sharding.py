@@ -0,0 +1,210 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect
+from typing import Callable, Iterable, List, Optional, Set
+
+
+def load_settings() -> None:
+    """Читает настройки шардирования из переменных окружения.
+
+    engine.main вызывает её повторно после init(), чтобы учесть .env;
+    значения по умолчанию в конструкторах берутся в момент вызова.
+    """
+    global SHARD_STORE, SHARD_WORKER_ID, SHARD_LEASE_TTL, SHARD_VNODES
+    SHARD_STORE = os.getenv('SHARD_STORE')
+    SHARD_WORKER_ID = os.getenv('SHARD_WORKER_ID') or os.getenv('DYNO')
+    SHARD_LEASE_TTL = float(os.getenv('SHARD_LEASE_TTL', 30))
+    SHARD_VNODES = int(os.getenv('SHARD_VNODES', 64))
+
+
+load_settings()
+
+
+def default_worker_id() -> Optional[str]:
+    """Имя воркера из SHARD_WORKER_ID или DYNO.
+
+    Имя должно переживать перезапуск: по нему воркер находит свой
+    журнал исходящих сообщений и досылает то, что не успел до падения.
+    """
+    return SHARD_WORKER_ID
+
+
+def worker_path(path: str, worker: str) -> str:
+    """Отдельный файл воркера: outbox.jsonl -> outbox.w1.jsonl."""
+    root, extension = os.path.splitext(path)
+    return f'{root}.{worker}{extension}'
+
+
+def stable_hash(key: str) -> int:
+    """Хэш строки, одинаковый во всех процессах."""
+    return int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Кольцо согласованного хэширования с виртуальными узлами.
+
+    При добавлении или уходе воркера меняют владельца только ключи
+    соседних с ним участков кольца, примерно 1/N всех пользователей.
+    """
+
+    def __init__(self, workers: Iterable[str],
+                 vnodes: Optional[int] = None) -> None:
+        """Строит кольцо из воркеров workers."""
+        if vnodes is None:
+            vnodes = SHARD_VNODES
+        points = sorted(
+            (stable_hash(f'{worker}#{number}'), worker)
+            for worker in workers for number in range(vnodes))
+        self._hashes = [point for point, _ in points]
+        self._workers = [worker for _, worker in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        """Воркер, которому принадлежит ключ."""
+        if not self._hashes:
+            return None
+        index = bisect(self._hashes, stable_hash(key)) % len(self._hashes)
+        return self._workers[index]
+
+
+class LeaseStore:
+    """Аренды воркеров и пользователей в общей базе SQLite.
+
+    Воркер жив, пока продлевает свою запись в workers. Пользователя
+    опрашивает только держатель непросроченной аренды в leases, поэтому
+    два процесса не опрашивают одного пользователя одновременно, а
+    аренды упавшего воркера освобождаются сами через ttl секунд.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.time) -> None:
+        """Готовит базу аренд path."""
+        if ttl is None:
+            ttl = SHARD_LEASE_TTL
+        self.path = path
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=ttl, isolation_level=None,
+            check_same_thread=False)
+        self._connection.executescript(
+            'PRAGMA journal_mode=WAL;'
+            'CREATE TABLE IF NOT EXISTS workers ('
+            ' worker TEXT PRIMARY KEY, expires REAL NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS leases ('
+            ' tenant TEXT PRIMARY KEY, owner TEXT NOT NULL,'
+            ' expires REAL NOT NULL);')
+
+    def heartbeat(self, worker: str) -> List[str]:
+        """Продлевает жизнь воркера и возвращает всех живых воркеров."""
+        now = self._clock()
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO workers VALUES (?, ?)',
+                (worker, now + self.ttl))
+            rows = self._connection.execute(
+                'SELECT worker FROM workers WHERE expires > ? '
+                'ORDER BY worker', (now,)).fetchall()
+        return [row[0] for row in rows]
+
+    def acquire(self, worker: str, tenants: Iterable[str]) -> Set[str]:
+        """Берёт или продлевает аренды; возвращает полученные."""
+        now = self._clock()
+        acquired = set()
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                for tenant in tenants:
+                    cursor = self._connection.execute(
+                        'INSERT INTO leases VALUES (?, ?, ?) '
+                        'ON CONFLICT(tenant) DO UPDATE SET '
+                        'owner = excluded.owner, expires = excluded.expires '
+                        'WHERE leases.owner = excluded.owner '
+                        'OR leases.expires <= ?',
+                        (tenant, worker, now + self.ttl, now))
+                    if cursor.rowcount:
+                        acquired.add(tenant)
+                self._connection.execute('COMMIT')
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+        return acquired
+
+    def release(self, worker: str,
+                tenants: Optional[Iterable[str]] = None) -> None:
+        """Отпускает аренды; без tenants — все аренды и запись воркера."""
+        with self._lock:
+            if tenants is None:
+                self._connection.execute(
+                    'DELETE FROM leases WHERE owner = ?', (worker,))
+                self._connection.execute(
+                    'DELETE FROM workers WHERE worker = ?', (worker,))
+                return
+            self._connection.executemany(
+                'DELETE FROM leases WHERE tenant = ? AND owner = ?',
+                [(tenant, worker) for tenant in tenants])
+
+    def close(self) -> None:
+        """Закрывает соединение с базой."""
+        self._connection.close()
+
+
+class ShardCoordinator:
+    """Решает, каких пользователей опрашивает этот воркер.
+
+    refresh продлевает жизнь воркера, строит кольцо из живых воркеров и
+    берёт аренды своих по кольцу пользователей. Чужих по кольцу
+    пользователей он отпускает, предварительно вызвав on_release, чтобы
+    сохранить их состояние для нового владельца.
+    """
+
+    def __init__(self, store: LeaseStore, worker: Optional[str] = None,
+                 vnodes: Optional[int] = None) -> None:
+        """Создаёт координатора для воркера worker."""
+        self.store = store
+        self.worker = worker or default_worker_id()
+        if not self.worker:
+            raise ValueError(
+                'Для шардирования нужно постоянное имя воркера: '
+                'SHARD_WORKER_ID или DYNO')
+        self.vnodes = SHARD_VNODES if vnodes is None else vnodes
+        self.owned: Set[str] = set()
+
+    @property
+    def interval(self) -> float:
+        """Как часто вызывать refresh, чтобы аренды не истекли."""
+        return self.store.ttl / 3
+
+    def refresh(self, tenants: Iterable[str],
+                on_release: Optional[Callable[[Set[str]], None]] = None
+                ) -> Set[str]:
+        """Пересчитывает свою долю пользователей и продлевает аренды."""
+        ring = HashRing(self.store.heartbeat(self.worker), self.vnodes)
+        wanted = {
+            tenant for tenant in tenants if ring.owner(tenant) == self.worker}
+        lost = self.owned - wanted
+        if lost:
+            self.owned = self.owned - lost
+            if on_release is not None:
+                on_release(lost)
+            self.store.release(self.worker, lost)
+        owned = self.store.acquire(self.worker, wanted)
+        if owned != self.owned:
+            logging.info('Воркер %s опрашивает пользователей: %d',
+                         self.worker, len(owned))
+        self.owned = owned
+        return owned
+
+    def owns(self, tenant: str) -> bool:
+        """Держит ли воркер аренду пользователя."""
+        return tenant in self.owned
+
+    def close(self) -> None:
+        """Отпускает все аренды при остановке воркера."""
+        self.store.release(self.worker)
+        self.owned = set()
@@ -0,0 +1,70 @@
+import fcntl
+import json
+import logging
+import os
+import tempfile
+from typing import Dict
+
+STATE_VERSION = 1
+
+
+class StateJournal:
+    """Снимок состояния опроса на диске для тёплого перезапуска.
+
+    Хранит по каждому чату курсор current_date, последние отправленные
+    статусы и отпечаток последней ошибки. Файл перезаписывается
+    атомарно: сначала временный файл рядом, затем os.replace, поэтому
+    при падении посреди записи остаётся предыдущий снимок.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Запоминает путь к файлу снимка."""
+        self.path = path
+
+    def load(self) -> Dict[str, dict]:
+        """Читает снимки пользователей; без файла возвращает пустой словарь."""
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as error:
+            logging.warning(
+                'Не удалось прочитать состояние %s: %s', self.path, error)
+            return {}
+        if data.get('version') != STATE_VERSION:
+            logging.warning('Неизвестная версия состояния в %s', self.path)
+            return {}
+        return data.get('tenants', {})
+
+    def save(self, tenants: Dict[str, dict]) -> None:
+        """Атомарно записывает снимки пользователей."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        data = {'version': STATE_VERSION, 'tenants': tenants}
+        temp_path = None
+        try:
+            descriptor, temp_path = tempfile.mkstemp(
+                dir=directory, prefix='.state-', suffix='.tmp')
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                json.dump(
+                    data, file, ensure_ascii=False, separators=(',', ':'))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+        except OSError as error:
+            logging.error(
+                'Не удалось сохранить состояние %s: %s', self.path, error)
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def update(self, tenants: Dict[str, dict]) -> None:
+        """Обновляет снимки части пользователей, не трогая остальных.
+
+        Нужен воркерам, которые делят один файл состояния: чтение и
+        запись идут под файловой блокировкой.
+        """
+        with open(f'{self.path}.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            snapshots = self.load()
+            snapshots.update(tenants)
+            self.save(snapshots)
@@ -0,0 +1,108 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Union
+
+WHITESPACE = ' \t\n\r'
+TRIM_THRESHOLD = 64 * 1024
+
+
+class HomeworkStream:
+    """Потоковый разбор ответа API Практикума.
+
+    Читает тело ответа кусками и отдаёт элементы списка homeworks по
+    одному, не собирая ни всё тело, ни весь список в памяти. Остальные
+    ключи верхнего уровня (current_date) после прохода лежат в fields.
+    """
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]) -> None:
+        """Запоминает источник кусков ответа."""
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self.fields: dict = {}
+        self.has_homeworks = False
+
+    def __iter__(self) -> Iterator[dict]:
+        """Отдаёт работы по мере разбора."""
+        return self._parse()
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        if self._pos > TRIM_THRESHOLD:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._utf8.decode(chunk)
+            if chunk:
+                self._buffer += chunk
+                return True
+        self._buffer += self._utf8.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def _peek(self) -> str:
+        while True:
+            while (self._pos < len(self._buffer)
+                   and self._buffer[self._pos] in WHITESPACE):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise self._error('Неожиданный конец ответа')
+
+    def _expect(self, allowed: str) -> str:
+        char = self._peek()
+        if char not in allowed:
+            raise self._error(f'Ожидался один из символов {allowed!r}')
+        self._pos += 1
+        return char
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(
+                    self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                value, end = self._decoder.raw_decode(
+                    self._buffer, self._pos)
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _parse(self) -> Iterator[dict]:
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == 'homeworks' and self._peek() == '[':
+                self.has_homeworks = True
+                yield from self._parse_array()
+            else:
+                self.fields[key] = self._value()
+            if self._expect(',}') == '}':
+                return
+
+    def _parse_array(self) -> Iterator[Any]:
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',]') == ']':
+                return
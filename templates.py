@@ -0,0 +1,105 @@
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+from exceptions import NotDocumentedStatusHomework
+
+PLACEHOLDER = '{homework_name}'
+
+TEMPLATES = {
+    'ru': {
+        'message': ('Изменился статус проверки работы '
+                    '"{homework_name}". {verdict}'),
+        'statuses': {
+            'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
+            'reviewing': 'Работа взята на проверку ревьюером.',
+            'rejected': 'Работа проверена: у ревьюера есть замечания.',
+        },
+    },
+    'en': {
+        'message': ('Review status of "{homework_name}" has changed. '
+                    '{verdict}'),
+        'statuses': {
+            'approved': 'The reviewer approved the work. Hooray!',
+            'reviewing': 'The work has been taken for review.',
+            'rejected': 'The reviewer left some remarks.',
+        },
+    },
+}
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения."""
+    global DEFAULT_LOCALE, TEMPLATES_FILE
+    DEFAULT_LOCALE = os.getenv('NOTIFICATION_LOCALE', 'ru')
+    TEMPLATES_FILE = os.getenv('TEMPLATES_FILE')
+
+
+load_settings()
+
+
+def load_templates(path: Optional[str] = None) -> dict:
+    """Шаблоны по умолчанию, дополненные локалями из JSON-файла.
+
+    Без path берётся TEMPLATES_FILE.
+    """
+    if path is None:
+        path = TEMPLATES_FILE
+    templates = {locale: dict(texts) for locale, texts in TEMPLATES.items()}
+    if path:
+        with open(path, encoding='utf-8') as file:
+            for locale, texts in json.load(file).items():
+                merged = templates.setdefault(locale, {})
+                merged.update(texts)
+    return templates
+
+
+class MessageRenderer:
+    """Собирает тексты уведомлений по заранее скомпилированным шаблонам.
+
+    Каждый шаблон статуса и локали один раз разбивается на части до и
+    после названия работы, так что сборка сообщения сводится к двум
+    поискам в словарях и одной склейке строк. Готовые тексты не
+    кэшируются: поиск в LRU по (работа, статус, локаль) обходится
+    дороже самой склейки, а каждое изменение статуса и так рендерится
+    один раз и рассылается всем получателям.
+    """
+
+    def __init__(self, templates: Optional[dict] = None,
+                 default_locale: Optional[str] = None) -> None:
+        """Компилирует шаблоны всех локалей."""
+        self.default_locale = (
+            DEFAULT_LOCALE if default_locale is None else default_locale)
+        self._compiled = self._compile(templates or load_templates())
+        self._default = self._compiled.get(self.default_locale, {})
+
+    def _compile(self, templates: dict
+                 ) -> Dict[str, Dict[str, Tuple[str, str]]]:
+        compiled = {}
+        for locale, texts in templates.items():
+            parts = compiled[locale] = {}
+            for status, verdict in texts['statuses'].items():
+                text = texts['message'].replace('{verdict}', verdict)
+                prefix, _, suffix = text.partition(PLACEHOLDER)
+                parts[status] = prefix, suffix
+        default = compiled.get(self.default_locale, {})
+        for parts in compiled.values():
+            for status, default_parts in default.items():
+                parts.setdefault(status, default_parts)
+        return compiled
+
+    def render(self, homework_name: str, status: str,
+               locale: Optional[str] = None) -> str:
+        """Текст уведомления о новом статусе работы в локали locale.
+
+        Без locale или для неизвестной локали берётся default_locale.
+        """
+        parts = self._default
+        if locale:
+            parts = self._compiled.get(locale, parts)
+        try:
+            prefix, suffix = parts[status]
+        except KeyError:
+            raise NotDocumentedStatusHomework(
+                f'недокументированный статус домашней работы: {status}')
+        return f'{prefix}{homework_name}{suffix}'
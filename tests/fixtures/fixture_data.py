@@ -19,3 +19,23 @@ def current_timestamp():
 @pytest.fixture
 def api_url():
     return 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+
+
+@pytest.fixture
+def homeworks_factory(random_timestamp):
+    statuses = ('approved', 'reviewing', 'rejected')
+
+    def make_homeworks(count):
+        return [
+            {
+                "id": number,
+                "status": statuses[number % len(statuses)],
+                "homework_name": f'{random_timestamp}_{number}.zip',
+                "reviewer_comment": "Всё нравится",
+                "date_updated": "2020-02-13T14:40:57Z",
+                "lesson_name": "Итоговый проект"
+            }
+            for number in range(count)
+        ]
+
+    return make_homeworks
@@ -0,0 +1,76 @@
+import homework
+from alerts import AlertWindow, error_fingerprint, normalize_cause
+from exceptions import CannotSendRequestToServer, EndpointNotAvailable
+from utils import RecordingBot
+
+
+def test_fingerprint_ignores_volatile_details():
+    first = EndpointNotAvailable(
+        'Статус код: 503. Параметры: {"from_date": 1650000000}')
+    second = EndpointNotAvailable(
+        'Статус код: 503. Параметры: {"from_date": 1650000600}')
+    other = EndpointNotAvailable(
+        'Статус код: 500. Параметры: {"from_date": 1650000000}')
+
+    assert error_fingerprint(first) == error_fingerprint(second)
+    assert error_fingerprint(first) != error_fingerprint(other)
+
+
+def test_fingerprint_includes_cause_class():
+    try:
+        try:
+            raise ConnectionError('<object at 0x7f3a2b>')
+        except ConnectionError as error:
+            raise CannotSendRequestToServer(f'Ошибка {error}')
+    except CannotSendRequestToServer as error:
+        fingerprint = error_fingerprint(error)
+
+    assert fingerprint == (
+        'CannotSendRequestToServer(ConnectionError): '
+        'Ошибка <object at 0x#>')
+
+
+def test_normalize_cause_caps_length():
+    assert len(normalize_cause('x' * 1000)) == 200
+
+
+def test_window_suppresses_repeats_and_reports_digest():
+    alerts = AlertWindow(window=3600)
+
+    sent = [alerts.should_send('EndpointNotAvailable: 503', minute * 60)
+            for minute in range(38)]
+
+    assert sent == [True] + [False] * 37
+    assert alerts.digest(3000) is None
+    assert alerts.digest(3660) == (
+        'Повторы ошибок за последние 60 мин:\nEndpointNotAvailable ×37')
+    assert alerts.digest(7200) is None
+    assert alerts.should_send('EndpointNotAvailable: 503', 3600)
+
+
+def test_window_survives_snapshot():
+    alerts = AlertWindow(window=60)
+    alerts.should_send('Error: x', 0)
+    alerts.should_send('Error: x', 1)
+
+    restored = AlertWindow(window=60)
+    restored.restore(alerts.snapshot())
+
+    assert not restored.should_send('Error: x', 2)
+    assert restored.digest(61) == 'Повторы ошибок за последние 1 мин:\nError ×2'
+
+
+def test_poll_tenant_reports_outage_once(monkeypatch):
+    def failing_fetch(timestamp, headers):
+        raise EndpointNotAvailable(f'Статус код: 503. {timestamp}1234')
+
+    monkeypatch.setattr(homework, 'fetch_homework_statuses', failing_fetch)
+    bot = RecordingBot()
+    tenant = homework.Tenant('token', '1', current_timestamp=1650000000)
+
+    for _ in range(5):
+        homework.poll_tenant(bot, tenant)
+
+    assert len(bot.texts) == 1
+    assert bot.texts[0].startswith('Сбой в работе программы')
+    assert tenant.alerts.suppressed == {tenant.last_error: 4}
@@ -0,0 +1,124 @@
+from http import HTTPStatus
+
+import pytest
+
+import homework
+import transport
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from exceptions import EndpointCircuitOpen
+
+
+class FakeResponse:
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.reason = ''
+        self.text = ''
+
+    def json(self):
+        return {'homeworks': [], 'current_date': 1}
+
+
+def make_breaker(now):
+    return CircuitBreaker(failure_threshold=3, recovery_timeout=10,
+                          max_recovery_timeout=40, clock=lambda: now[0])
+
+
+def test_breaker_opens_after_threshold():
+    now = [0.0]
+    breaker = make_breaker(now)
+
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in() == 10
+
+
+def test_success_resets_failure_count():
+    breaker = make_breaker([0.0])
+
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_single_probe_through():
+    now = [0.0]
+    breaker = make_breaker(now)
+    for _ in range(3):
+        breaker.record_failure()
+
+    now[0] = 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_doubles_recovery_timeout():
+    now = [0.0]
+    breaker = make_breaker(now)
+    for _ in range(3):
+        breaker.record_failure()
+
+    for expected in (20, 40, 40):
+        now[0] += breaker.retry_in()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.retry_in() == expected
+
+
+def test_open_breaker_skips_network(monkeypatch):
+    now = [0.0]
+    breaker = make_breaker(now)
+    calls = []
+
+    def failing_get(url, **kwargs):
+        calls.append(url)
+        return FakeResponse(HTTPStatus.SERVICE_UNAVAILABLE)
+
+    monkeypatch.setattr(homework, 'BREAKER', breaker)
+    monkeypatch.setattr(transport, 'get', failing_get)
+    tenant = homework.Tenant('token', '1', current_timestamp=1)
+    sent = []
+    bot = type('Bot', (), {
+        'send_message': lambda self, chat_id, text: sent.append(text)})()
+
+    results = [homework.poll_tenant(bot, tenant) for _ in range(5)]
+
+    assert results == [None] * 5
+    assert len(calls) == 3
+    assert len(sent) == 1
+
+
+def test_client_errors_do_not_open_breaker(monkeypatch):
+    breaker = make_breaker([0.0])
+    monkeypatch.setattr(homework, 'BREAKER', breaker)
+    monkeypatch.setattr(
+        transport, 'get',
+        lambda url, **kwargs: FakeResponse(HTTPStatus.UNAUTHORIZED))
+
+    for _ in range(5):
+        with pytest.raises(homework.EndpointNotAvailable):
+            homework.get_api_answer(1)
+
+    assert breaker.state == CLOSED
+
+
+def test_circuit_open_is_raised_without_request(monkeypatch):
+    breaker = make_breaker([0.0])
+    for _ in range(3):
+        breaker.record_failure()
+    monkeypatch.setattr(homework, 'BREAKER', breaker)
+
+    with pytest.raises(EndpointCircuitOpen, match='через 10 с'):
+        homework.get_api_answer(1)
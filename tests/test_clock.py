@@ -0,0 +1,83 @@
+import json
+import time
+
+import homework
+import replay
+import transport
+from clock import VirtualClock
+from intervals import FixedInterval
+from scheduler import Scheduler
+from utils import RecordingBot
+
+
+class FakeResponse:
+
+    def __init__(self, body, status_code=200):
+        self.status_code = status_code
+        self.text = json.dumps(body)
+
+
+def test_virtual_clock_wait_advances_time():
+    clock = VirtualClock(epoch=1000)
+    scheduler = Scheduler(clock=clock)
+
+    assert not scheduler.wait(600)
+    assert clock.monotonic() == 600
+    assert clock.time() == 1600
+
+
+def test_run_cycles_day_of_polling_in_virtual_time(monkeypatch):
+    clock = VirtualClock(epoch=1_600_000_000)
+    monkeypatch.setattr(homework, 'CLOCK', clock)
+    requested = []
+
+    def fake_fetch(timestamp, headers):
+        requested.append(timestamp)
+        return {'homeworks': [], 'current_date': int(clock.time())}
+
+    monkeypatch.setattr(homework, 'fetch_homework_statuses', fake_fetch)
+    tenant = homework.Tenant(
+        'token', '1', interval_policy=FixedInterval(600))
+    day = 24 * 60 * 60
+    started = time.perf_counter()
+
+    cycles = homework.run_cycles(
+        RecordingBot(), tenant, Scheduler(clock=clock),
+        until=lambda: clock.monotonic() >= day)
+
+    assert cycles == day // 600
+    assert time.perf_counter() - started < 5
+    assert requested[1] == 1_600_000_000 - homework.POLL_OVERLAP
+    assert tenant.current_timestamp == 1_600_000_000 + day - 600
+
+
+def test_record_then_replay_reproduces_notifications(tmp_path, monkeypatch):
+    path = str(tmp_path / 'responses.jsonl.gz')
+    homeworks = [{'homework_name': 'hw1', 'status': 'reviewing'}]
+    responses = [
+        FakeResponse({'homeworks': homeworks, 'current_date': 100}),
+        FakeResponse({'homeworks': [], 'current_date': 700}),
+        FakeResponse({'homeworks': [dict(homeworks[0], status='approved')],
+                      'current_date': 1300}),
+    ]
+    monkeypatch.setattr(
+        transport.HttpTransport, 'get',
+        lambda self, url, **kwargs: responses.pop(0))
+    recorder = transport.RecordingTransport(
+        path, homework.ENDPOINT, clock=VirtualClock(epoch=100))
+    for _ in range(3):
+        recorder.get(homework.ENDPOINT, params={})
+        recorder.clock.advance(600)
+    recorder.close()
+
+    bot = RecordingBot()
+    tenant = homework.Tenant('token', '1', interval_policy=FixedInterval(60))
+    cycles = replay.replay(path, bot, tenant)
+
+    assert cycles == 3
+    assert [text for _, text in bot.sent] == [
+        homework.parse_status(homeworks[0]),
+        homework.parse_status(dict(homeworks[0], status='approved')),
+    ]
+    assert tenant.current_timestamp == 1300
+    assert homework.CLOCK is homework.SYSTEM_CLOCK
@@ -0,0 +1,154 @@
+import threading
+
+import homework
+from commands import CommandService, Revalidator, StatusCache
+from utils import RecordingBot
+
+
+class ManualRevalidator:
+
+    def __init__(self):
+        self.requested = []
+
+    def request(self, tenant):
+        self.requested.append(tenant.chat_id)
+
+
+def make_service(cache, revalidator=None, max_age=60):
+    sender = RecordingBot()
+    service = CommandService(
+        cache, [homework.Tenant('token', '1')], sender,
+        revalidator or ManualRevalidator(), homework.HOMEWORK_STATUSES,
+        max_age=max_age)
+    return service, sender
+
+
+def test_status_is_served_from_cache():
+    now = [1000.0]
+    cache = StatusCache(clock=lambda: now[0])
+    cache.record('1', [{'id': 1, 'homework_name': 'hw1',
+                        'status': 'approved'}])
+    service, sender = make_service(cache)
+
+    service.reply('1', 'status')
+
+    chat_id, text = sender.sent[0]
+    assert chat_id == '1'
+    assert text.endswith(
+        'hw1: ' + homework.HOMEWORK_STATUSES['approved'])
+    assert service.revalidator.requested == []
+
+
+def test_stale_cache_is_served_and_revalidated():
+    now = [1000.0]
+    cache = StatusCache(clock=lambda: now[0])
+    cache.record('1', [{'id': 1, 'homework_name': 'hw1',
+                        'status': 'reviewing'}])
+    service, sender = make_service(cache, max_age=60)
+    now[0] += 61
+
+    service.reply('1', 'status')
+
+    assert 'hw1' in sender.sent[0][1]
+    assert service.revalidator.requested == ['1']
+
+
+def test_history_lists_changes_newest_first():
+    now = [1000.0]
+    cache = StatusCache(clock=lambda: now[0])
+    cache.record('1', [{'id': 1, 'homework_name': 'hw1',
+                        'status': 'reviewing'}])
+    cache.record('1', [{'id': 1, 'homework_name': 'hw1',
+                        'status': 'approved'}])
+    service, sender = make_service(cache)
+
+    service.reply('1', 'history')
+
+    lines = sender.sent[0][1].split('\n')
+    assert lines[1].endswith(homework.HOMEWORK_STATUSES['approved'])
+    assert lines[2].endswith(homework.HOMEWORK_STATUSES['reviewing'])
+
+
+def test_unknown_chat_gets_no_data():
+    service, sender = make_service(StatusCache())
+
+    service.reply('2', 'status')
+
+    assert sender.sent == [('2', 'Этот чат не подключён к боту.')]
+
+
+def test_complete_refresh_does_not_fill_history():
+    cache = StatusCache()
+    cache.record('1', [{'id': 1, 'homework_name': 'hw1',
+                        'status': 'approved'}], complete=True)
+
+    assert not cache.get('1').history
+    assert cache.get('1').homeworks == {'1': ('hw1', 'approved')}
+
+
+def test_burst_of_commands_makes_single_request():
+    release = threading.Event()
+    calls = []
+
+    def slow_fetch(tenant):
+        calls.append(tenant.chat_id)
+        release.wait(5)
+        return [{'id': 1, 'homework_name': 'hw1', 'status': 'approved'}]
+
+    cache = StatusCache()
+    revalidator = Revalidator(cache, slow_fetch, min_interval=60)
+    service, sender = make_service(cache, revalidator)
+
+    for _ in range(50):
+        service.reply('1', 'status')
+    release.set()
+    revalidator.close()
+
+    assert calls == ['1']
+    assert len(sender.sent) == 50
+    assert cache.get('1').homeworks == {'1': ('hw1', 'approved')}
+
+
+def test_poll_tenant_fills_cache(monkeypatch):
+    cache = StatusCache()
+    monkeypatch.setattr(homework, 'STATUS_CACHE', cache)
+    monkeypatch.setattr(
+        homework, 'fetch_homework_statuses',
+        lambda timestamp, headers: {
+            'homeworks': [{'id': 5, 'homework_name': 'hw5',
+                           'status': 'rejected'}],
+            'current_date': 1})
+
+    homework.poll_tenant(RecordingBot(), homework.Tenant('token', '1'))
+
+    assert cache.get('1').homeworks == {'5': ('hw5', 'rejected')}
+    assert len(cache.get('1').history) == 1
+
+
+def test_empty_polls_keep_requesting_revalidation():
+    now = [1000.0]
+    cache = StatusCache(clock=lambda: now[0])
+    service, sender = make_service(cache)
+
+    for _ in range(3):
+        cache.record('1', [])
+        service.reply('1', 'status')
+
+    assert service.revalidator.requested == ['1', '1', '1']
+    assert cache.age('1') == float('inf')
+
+
+def test_seeded_statuses_are_served_after_restart():
+    now = [1000.0]
+    cache = StatusCache(clock=lambda: now[0])
+    cache.seed('1', {'hw1': 'reviewing'}, 990)
+    service, sender = make_service(cache)
+
+    service.reply('1', 'status')
+    cache.record('1', [{'homework_name': 'hw1', 'status': 'reviewing'}],
+                 complete=True)
+
+    assert sender.sent[0][1].endswith(
+        'hw1: ' + homework.HOMEWORK_STATUSES['reviewing'])
+    assert service.revalidator.requested == []
+    assert not cache.get('1').history
@@ -0,0 +1,123 @@
+import json
+import threading
+
+import engine
+import homework
+from commands import CommandService, StatusCache
+from config import EnvReloader, WatchedFile
+from intervals import FixedInterval
+
+
+def test_env_reloader_returns_only_changed_keys(tmp_path):
+    path = tmp_path / '.env'
+    path.write_text('RETRY_TIME=600\nPOLL_JITTER=0.1\n')
+    reloader = EnvReloader(str(path))
+
+    assert reloader.check() == {}
+    path.write_text('RETRY_TIME=300\nPOLL_JITTER=0.1\nNEW=1\n')
+
+    assert reloader.check() == {'RETRY_TIME': '300', 'NEW': '1'}
+    assert reloader.check() == {}
+
+
+def test_watched_file_notices_appearance(tmp_path):
+    path = tmp_path / 'tenants.json'
+    watched = WatchedFile(str(path))
+
+    assert not watched.changed()
+    path.write_text('[]')
+    assert watched.changed()
+    assert not watched.changed()
+
+
+def test_reload_settings_swaps_all_or_nothing(monkeypatch):
+    for name in ('RETRY_TIME', 'POLL_INTERVAL_POLICY', 'POLL_JITTER',
+                 'PRACTICUM_TOKEN', 'HEADERS'):
+        monkeypatch.setattr(homework, name, getattr(homework, name))
+    monkeypatch.setattr(homework, 'POLL_INTERVAL_POLICY', 'fixed')
+    tenant = homework.Tenant('old', '1')
+
+    assert homework.reload_settings(
+        {'RETRY_TIME': 'soon', 'PRACTICUM_TOKEN': 'new'}, [tenant]) == {}
+    assert tenant.token == 'old'
+
+    applied = homework.reload_settings(
+        {'RETRY_TIME': '120', 'PRACTICUM_TOKEN': 'new'}, [tenant])
+
+    assert applied == {'RETRY_TIME': 120, 'PRACTICUM_TOKEN': 'new'}
+    assert homework.HEADERS == {'Authorization': 'OAuth new'}
+    assert tenant.token == 'new'
+    assert tenant.next_interval([]) == 120
+
+
+def test_engine_applies_only_changed_tenants(tmp_path):
+    path = tmp_path / 'tenants.json'
+    records = [
+        {'token': 'first', 'chat_id': 1},
+        {'token': 'second', 'chat_id': 2},
+    ]
+    path.write_text(json.dumps(records))
+    tenants = engine.load_tenants(str(path))
+    polling = engine.PollingEngine(
+        None, tenants, poll=lambda bot, tenant: [],
+        tenants_file=str(path))
+    first, second = tenants
+    first.interval_policy = FixedInterval(60)
+
+    records[1]['locale'] = 'en'
+    records.append({'token': 'third', 'chat_id': 3})
+    del records[0]
+    polling.apply_records(
+        {str(record['chat_id']): record for record in records})
+
+    assert [tenant.chat_id for tenant in polling.tenants] == ['2', '3']
+    assert '1' not in polling._active
+    assert second.locale == 'en'
+    assert polling.tenants[1].token == 'third'
+
+
+def test_override_waits_for_running_poll():
+    tenant = homework.Tenant('old', '1')
+    polling = engine.PollingEngine(None, [tenant])
+    polling._polling['1'] = threading.Event()
+
+    polling.override(tenant, {'token': 'new'})
+    assert tenant.token == 'old'
+
+    del polling._polling['1']
+    polling.override(tenant, polling._overrides.pop('1'))
+    assert tenant.token == 'new'
+
+
+def test_poll_settings_keep_adaptive_policy_state(monkeypatch):
+    for name in ('RETRY_TIME', 'POLL_FAST_INTERVAL'):
+        monkeypatch.setattr(homework, name, getattr(homework, name))
+    monkeypatch.setattr(homework, 'POLL_INTERVAL_POLICY', 'adaptive')
+    monkeypatch.setattr(homework, 'POLL_JITTER', 0)
+    tenant = homework.Tenant('token', '1')
+    policy = tenant.interval_policy
+    policy.next_interval(
+        [{'homework_name': 'hw1', 'status': 'reviewing'}], 100)
+
+    homework.reload_settings({'POLL_FAST_INTERVAL': '30'}, [tenant])
+
+    assert tenant.interval_policy is policy
+    assert tenant.next_interval([]) == 30
+
+    homework.reload_settings({'POLL_INTERVAL_POLICY': 'fixed'}, [tenant])
+
+    assert isinstance(tenant.interval_policy, FixedInterval)
+
+
+def test_added_tenants_answer_commands(tmp_path, monkeypatch):
+    path = tmp_path / 'tenants.json'
+    path.write_text(json.dumps([{'token': 'first', 'chat_id': 1}]))
+    service = CommandService(
+        StatusCache(), [], None, None, homework.HOMEWORK_STATUSES)
+    monkeypatch.setattr(homework, 'COMMANDS', service)
+    polling = engine.PollingEngine(
+        None, engine.load_tenants(str(path)), tenants_file=str(path))
+
+    polling.apply_records({'2': {'token': 'second', 'chat_id': 2}})
+
+    assert list(service.tenants) == ['2']
@@ -0,0 +1,136 @@
+import homework
+from diff import SeenIndex, diff_homeworks, homework_key, updated_at
+from utils import RecordingBot
+
+
+def test_homework_key_prefers_id():
+    assert homework_key({'id': 7, 'homework_name': 'hw'}) == '7'
+    assert homework_key({'homework_name': 'hw'}) == 'hw'
+
+
+def test_diff_reports_every_changed_homework():
+    known = {'1': 'reviewing', '2': 'reviewing', '3': 'approved'}
+    homeworks = [
+        {'id': 3, 'status': 'approved'},
+        {'id': 2, 'status': 'rejected'},
+        {'id': 1, 'status': 'approved'},
+        {'id': 4, 'status': 'reviewing'},
+    ]
+
+    changes = diff_homeworks(known, homeworks)
+
+    assert [change['id'] for change in changes] == [2, 1, 4]
+
+
+def test_diff_ignores_order_and_duplicates():
+    known = {'1': 'approved', '2': 'rejected'}
+    homeworks = [
+        {'id': 2, 'status': 'rejected'},
+        {'id': 1, 'status': 'approved'},
+        {'id': 1, 'status': 'reviewing'},
+    ]
+
+    assert diff_homeworks(known, homeworks) == []
+
+
+def test_poll_tenant_sends_only_real_changes(monkeypatch):
+    responses = iter([
+        [{'id': 1, 'homework_name': 'a', 'status': 'reviewing'},
+         {'id': 2, 'homework_name': 'b', 'status': 'reviewing'}],
+        [{'id': 2, 'homework_name': 'b', 'status': 'reviewing'},
+         {'id': 1, 'homework_name': 'a', 'status': 'approved'}],
+    ])
+    monkeypatch.setattr(
+        homework, 'fetch_homework_statuses',
+        lambda timestamp, headers: {
+            'homeworks': next(responses), 'current_date': 1})
+    bot = RecordingBot()
+    tenant = homework.Tenant('token', '100')
+
+    homework.poll_tenant(bot, tenant)
+    homework.poll_tenant(bot, tenant)
+
+    assert len(bot.texts) == 3
+    assert '"a"' in bot.texts[-1] and bot.texts[-1].endswith('Ура!')
+    assert tenant.statuses == {'1': 'approved', '2': 'reviewing'}
+
+
+def test_updated_at_parses_api_date():
+    assert updated_at({'date_updated': '2020-02-13T14:40:57Z'}, 0) == (
+        1581604857)
+    assert updated_at({}, 7) == 7
+
+
+def test_seen_index_is_bounded():
+    index = SeenIndex(size=2)
+    for number in range(3):
+        index.add((str(number), 'approved', None))
+
+    assert len(index) == 2
+    assert ('0', 'approved', None) not in index
+    assert ('2', 'approved', None) in index
+
+
+def test_overlap_window_is_deduplicated(monkeypatch):
+    record = {'id': 1, 'homework_name': 'a', 'status': 'approved',
+              'date_updated': '2020-02-13T14:40:57Z'}
+    requested = []
+
+    def fetch(timestamp, headers):
+        requested.append(timestamp)
+        return {'homeworks': [record], 'current_date': 1581604860}
+
+    monkeypatch.setattr(homework, 'fetch_homework_statuses', fetch)
+    monkeypatch.setattr(homework, 'POLL_OVERLAP', 60)
+    bot = RecordingBot()
+    tenant = homework.Tenant('token', '100', current_timestamp=1581604800)
+
+    homework.poll_tenant(bot, tenant)
+    homework.poll_tenant(bot, tenant)
+
+    assert requested == [1581604740, 1581604800]
+    assert len(bot.texts) == 1
+
+
+def test_status_that_returned_between_polls_is_reported():
+    known = {'1': 'reviewing'}
+    index = SeenIndex()
+    index.add(('1', 'reviewing', '2020-02-13T14:00:00Z'))
+    old = {'id': 1, 'status': 'reviewing',
+           'date_updated': '2020-02-13T13:00:00Z'}
+    returned = {'id': 1, 'status': 'reviewing',
+                'date_updated': '2020-02-13T14:40:57Z'}
+
+    assert diff_homeworks(known, [old], index, since=1581604800) == []
+    assert diff_homeworks(known, [returned], index, since=1581604800) == [
+        returned]
+
+
+def test_seen_index_survives_restart():
+    tenant = homework.Tenant('token', '1')
+    tenant.seen.add(('1', 'approved', '2020-02-13T14:40:57Z'))
+    restored = homework.Tenant('token', '1')
+
+    restored.restore(tenant.snapshot())
+
+    assert ('1', 'approved', '2020-02-13T14:40:57Z') in restored.seen
+
+
+def test_status_change_is_sent_to_every_destination(monkeypatch):
+    monkeypatch.setattr(
+        homework, 'fetch_homework_statuses',
+        lambda timestamp, headers: {'homeworks': [
+            {'id': 1, 'homework_name': 'a', 'status': 'approved'}],
+            'current_date': 1})
+    sent = []
+    monkeypatch.setattr(
+        homework, 'send_message_to',
+        lambda bot, chat_id, message: sent.append((chat_id, message)))
+    tenant = homework.Tenant(
+        'token', '100', destinations=['200', '-300', '100'])
+
+    homework.poll_tenant(None, tenant)
+
+    assert [chat_id for chat_id, _ in sent] == ['100', '200', '-300']
+    assert len({message for _, message in sent}) == 1
+    assert homework.parse_destinations(' 200, -300 ,') == ['200', '-300']
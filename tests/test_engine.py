@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+import engine
+import homework
+import log_config
+import transport
+from alerts import AlertWindow
+from intervals import FixedInterval
+from outbox import Outbox
+from utils import RecordingBot
+
+
+def test_load_tenants(tmp_path):
+    path = tmp_path / 'tenants.json'
+    path.write_text(json.dumps([
+        {'token': 'first', 'chat_id': 1},
+        {'token': 'second', 'chat_id': '2'},
+    ]))
+
+    tenants = engine.load_tenants(str(path))
+
+    assert [tenant.chat_id for tenant in tenants] == ['1', '2']
+    assert tenants[0].headers == {'Authorization': 'OAuth first'}
+
+
+def test_poll_tenant_uses_tenant_token_and_chat(monkeypatch):
+    seen = {}
+
+    def fake_fetch(timestamp, headers):
+        seen['headers'] = headers
+        return {
+            'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+            'current_date': 42,
+        }
+
+    monkeypatch.setattr(homework, 'fetch_homework_statuses', fake_fetch)
+    bot = RecordingBot()
+    tenant = homework.Tenant('token', '100')
+
+    homework.poll_tenant(bot, tenant)
+
+    assert seen['headers'] == {'Authorization': 'OAuth token'}
+    assert bot.sent[0][0] == '100'
+    assert tenant.current_timestamp == 42
+
+
+def test_engine_polls_every_tenant_repeatedly():
+    calls = []
+    tenants = [
+        homework.Tenant(
+            f'token{i}', str(i), interval_policy=FixedInterval(0.05))
+        for i in range(50)
+    ]
+    polling = engine.PollingEngine(
+        RecordingBot(), tenants, concurrency=8,
+        poll=lambda bot, tenant: calls.append(tenant))
+
+    async def run_briefly():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(polling.run(), 0.2)
+
+    asyncio.run(run_briefly())
+
+    assert {tenant.chat_id for tenant in calls} == {
+        tenant.chat_id for tenant in tenants}
+    assert len(calls) >= 2 * len(tenants)
+
+
+def test_load_settings_picks_up_values_set_after_import(monkeypatch):
+    monkeypatch.setenv('STATE_FILE', 'late-state.json')
+    monkeypatch.setenv('POLL_MAX_INTERVAL', '120')
+    monkeypatch.setenv('TENANTS_FILE', 'late-tenants.json')
+    try:
+        homework.load_settings()
+        engine.load_settings()
+
+        assert homework.STATE_FILE == 'late-state.json'
+        assert homework.HEALTH_TIMEOUT == 240
+        assert engine.TENANTS_FILE == 'late-tenants.json'
+    finally:
+        monkeypatch.undo()
+        homework.load_settings()
+        engine.load_settings()
+
+
+def test_load_all_settings_reaches_every_module(monkeypatch, tmp_path):
+    monkeypatch.setenv('LOG_LEVEL', 'WARNING')
+    monkeypatch.setenv('HTTP_READ_TIMEOUT', '99')
+    monkeypatch.setenv('ALERT_WINDOW', '5')
+    monkeypatch.setenv('OUTBOX_MAX_ATTEMPTS', '3')
+    monkeypatch.setenv('BREAKER_FAILURE_THRESHOLD', '2')
+    monkeypatch.setenv('RECORD_FILE', 'responses.jsonl.gz')
+    try:
+        homework.load_all_settings()
+
+        assert log_config.LOG_LEVEL == 'WARNING'
+        assert transport.READ_TIMEOUT == 99
+        assert AlertWindow().window == 5
+        assert Outbox(str(tmp_path / 'outbox.jsonl'), None).max_attempts == 3
+        assert homework.BREAKER.failure_threshold == 2
+        assert transport.RECORD_FILE == 'responses.jsonl.gz'
+    finally:
+        monkeypatch.undo()
+        homework.load_all_settings()
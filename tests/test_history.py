@@ -0,0 +1,81 @@
+import homework
+from history import HistoryStore
+
+
+def make_store(tmp_path, **kwargs):
+    return HistoryStore(str(tmp_path / 'history.sqlite'), **kwargs).start()
+
+
+def test_timeline_and_turnaround(tmp_path):
+    store = make_store(tmp_path)
+    for homework_id, outcome, reviewed in (('1', 'approved', 3600),
+                                           ('2', 'rejected', 7200),
+                                           ('3', 'approved', 600)):
+        store.record('100', homework_id, f'hw{homework_id}', None,
+                     'reviewing', 1000)
+        store.record('100', homework_id, f'hw{homework_id}', 'reviewing',
+                     outcome, 1000 + reviewed)
+    store.record('100', '2', 'hw2', 'rejected', 'reviewing', 9000)
+
+    timeline = store.timeline('100', '2')
+    stats = store.turnaround()
+    store.close()
+
+    assert [item.status for item in timeline] == [
+        'reviewing', 'rejected', 'reviewing']
+    assert stats['approved'] == {
+        'count': 2, 'mean': 2100, 'p50': 3600, 'p90': 3600}
+    assert stats['rejected']['count'] == 1
+    assert stats['all']['count'] == 3
+
+
+def test_turnaround_filters_by_chat_and_time(tmp_path):
+    store = make_store(tmp_path)
+    store.record('1', 'a', 'a', None, 'reviewing', 0)
+    store.record('1', 'a', 'a', 'reviewing', 'approved', 100)
+    store.record('2', 'b', 'b', None, 'reviewing', 0)
+    store.record('2', 'b', 'b', 'reviewing', 'approved', 500)
+
+    assert store.turnaround(chat_id='2')['all']['mean'] == 500
+    assert store.turnaround(since=200)['all']['count'] == 1
+    store.close()
+
+
+def test_writes_are_batched(tmp_path):
+    store = make_store(tmp_path, batch_size=1000, flush_interval=60)
+
+    for number in range(10):
+        store.record('1', str(number), None, None, 'reviewing')
+
+    assert len(store._pending) == 10
+    assert store.flush() == 10
+    store.close()
+
+
+def test_records_survive_reopen(tmp_path):
+    store = make_store(tmp_path)
+    store.record('1', 'a', 'a', None, 'approved', 5)
+    store.close()
+
+    reopened = HistoryStore(str(tmp_path / 'history.sqlite')).open()
+
+    assert [item.changed_at for item in reopened.timeline('1', 'a')] == [5]
+    reopened.close()
+
+
+def test_notify_change_records_transition(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    monkeypatch.setattr(homework, 'HISTORY', store)
+    monkeypatch.setattr(homework, 'send_message_to', lambda *args: None)
+    tenant = homework.Tenant('token', '1')
+    tenant.statuses['7'] = 'reviewing'
+
+    homework.notify_change(None, tenant, {
+        'id': 7, 'homework_name': 'hw7', 'status': 'approved',
+        'date_updated': '2020-02-13T14:40:57Z'}, 'message')
+
+    [transition] = store.timeline('1', '7')
+    store.close()
+    assert (transition.previous, transition.status) == (
+        'reviewing', 'approved')
+    assert transition.changed_at == 1581604857
@@ -0,0 +1,58 @@
+import pytest
+
+from intervals import AdaptiveInterval, FixedInterval, IntervalPolicy
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+def make_policy(**kwargs):
+    options = dict(base=600, fast=60, maximum=3600, jitter=0, rng=lambda: 1)
+    options.update(kwargs)
+    return AdaptiveInterval(STATUSES, **options)
+
+
+def test_fixed_interval():
+    assert FixedInterval(600).next_interval([], 0) == 600
+
+
+def test_reviewing_polls_fast_until_status_changes():
+    policy = make_policy()
+    reviewing = [{'homework_name': 'hw1', 'status': 'reviewing'}]
+    approved = [{'homework_name': 'hw1', 'status': 'approved'}]
+
+    assert policy.next_interval(reviewing, 100) == 60
+    assert policy.next_interval([], 200) == 60
+    assert policy.next_interval(approved, 300) == 600
+
+
+def test_idle_backs_off_exponentially_up_to_maximum():
+    policy = make_policy()
+
+    intervals = [policy.next_interval([], 0) for _ in range(5)]
+
+    assert intervals == [600, 1200, 2400, 3600, 3600]
+    rejected = [{'homework_name': 'hw1', 'status': 'rejected'}]
+    assert policy.next_interval(rejected, 0) == 600
+
+
+def test_stale_review_stops_fast_polling():
+    policy = make_policy(review_horizon=1000)
+    reviewing = [{'homework_name': 'hw1', 'status': 'reviewing'}]
+
+    policy.next_interval(reviewing, 0)
+
+    assert policy.next_interval([], 5000) == 600
+
+
+def test_jitter_spreads_interval():
+    policy = make_policy(jitter=0.1, rng=lambda: 0)
+
+    assert policy.next_interval(None, 0) == 540
+
+
+def test_policy_without_next_interval_cannot_be_created():
+    class Incomplete(IntervalPolicy):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
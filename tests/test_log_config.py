@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+import queue
+
+import homework
+import log_config
+from log_config import (DroppingQueueHandler, JsonFormatter, Redactor,
+                        SamplingFilter)
+
+
+def make_record(msg, *args, level=logging.INFO):
+    return logging.LogRecord(
+        'root', level, __file__, 1, msg, args, None)
+
+
+def test_redactor_hides_secrets():
+    redactor = Redactor(['secret-token'])
+
+    text = redactor(
+        'token secret-token, header OAuth abc.def, '
+        'bot 123456789:AAHdqTcvCH1vGWJxfSeofSAs0K5PALDsaw')
+
+    assert 'secret-token' not in text
+    assert 'abc.def' not in text
+    assert 'AAHdqTcvCH1vGWJxfSeofSAs0K5PALDsaw' not in text
+    assert text == 'token ***, header OAuth ***, bot ***'
+
+
+def test_redactor_caps_length():
+    assert Redactor(max_length=5)('x' * 12) == 'xxxxx…(+7)'
+
+
+def test_json_formatter_renders_redacted_message():
+    formatter = JsonFormatter(Redactor(['secret']))
+
+    payload = json.loads(formatter.format(
+        make_record('Ответ %s', 'secret')))
+
+    assert payload['message'] == 'Ответ ***'
+    assert payload['level'] == 'INFO'
+
+
+def test_sampling_filter_limits_and_counts_repeated_events():
+    now = [0.0]
+    sampling = SamplingFilter(burst=2, window=10, clock=lambda: now[0])
+
+    passed = [sampling.filter(make_record('Сбой %s', n)) for n in range(5)]
+    other = sampling.filter(make_record('Другое событие'))
+    now[0] = 11
+    record = make_record('Сбой %s', 6)
+
+    assert passed == [True, True, False, False, False]
+    assert other
+    assert sampling.filter(record)
+    assert record.suppressed == 3
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    record = make_record('Сообщение %s', object())
+
+    handler.handle(record)
+    handler.handle(make_record('Второе'))
+
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait() is record
+
+
+def test_log_config_file_still_redacts_secrets(tmp_path, monkeypatch):
+    log_file = tmp_path / 'bot.log'
+    config = tmp_path / 'logging.json'
+    config.write_text(json.dumps({
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {'file': {
+            'class': 'logging.FileHandler', 'filename': str(log_file)}},
+        'root': {'level': 'INFO', 'handlers': ['file']},
+    }))
+    monkeypatch.setattr(log_config, 'LOG_CONFIG', str(config))
+    root = logging.getLogger()
+    previous = list(root.handlers), root.level
+    try:
+        log_config.setup_logging(secrets=['topsecret'])
+        logging.info('GET /?token=%s', 'topsecret')
+        try:
+            raise ValueError('bad token topsecret')
+        except ValueError:
+            logging.exception('Сбой')
+    finally:
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+        for handler in previous[0]:
+            root.addHandler(handler)
+        root.setLevel(previous[1])
+
+    text = log_file.read_text(encoding='utf-8')
+    assert 'topsecret' not in text
+    assert 'token=***' in text and 'ValueError' in text
+
+
+def restore_root(previous):
+    log_config.shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in previous[0]:
+        root.addHandler(handler)
+    root.setLevel(previous[1])
+
+
+def test_setup_logging_without_log_config(monkeypatch, capsys):
+    monkeypatch.setattr(log_config, 'LOG_CONFIG', None)
+    monkeypatch.setattr(log_config, 'LOG_FORMAT', 'text')
+    root = logging.getLogger()
+    previous = list(root.handlers), root.level
+    try:
+        log_config.setup_logging(secrets=['topsecret'])
+        logging.warning('token %s', 'topsecret')
+    finally:
+        restore_root(previous)
+
+    assert 'token ***' in capsys.readouterr().out
+
+
+def test_init_without_log_config(monkeypatch):
+    monkeypatch.delenv('LOG_CONFIG', raising=False)
+    environ = dict(os.environ)
+    root = logging.getLogger()
+    previous = list(root.handlers), root.level
+    try:
+        homework.init()
+        assert log_config.LOG_CONFIG is None
+        assert any(isinstance(handler, DroppingQueueHandler)
+                   for handler in root.handlers)
+    finally:
+        restore_root(previous)
+        os.environ.clear()
+        os.environ.update(environ)
+        homework.load_all_settings()
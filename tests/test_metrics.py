@@ -0,0 +1,62 @@
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+import homework
+import metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram('latency_seconds', 'Задержка',
+                                  buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value)
+
+    lines = histogram.render()
+
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'latency_seconds_count 3' in lines
+
+
+def test_poll_errors_are_counted_by_exception_class(monkeypatch):
+    def failing_fetch(timestamp, headers):
+        raise homework.EndpointNotAvailable('500')
+
+    monkeypatch.setattr(homework, 'fetch_homework_statuses', failing_fetch)
+    before = metrics.ERRORS.value('EndpointNotAvailable')
+
+    class NullBot:
+        def send_message(self, chat_id, text):
+            pass
+
+    homework.poll_tenant(NullBot(), homework.Tenant('token', '1'))
+
+    assert metrics.ERRORS.value('EndpointNotAvailable') == before + 1
+
+
+def test_health_tracks_successful_polls():
+    now = [1000.0]
+    health = metrics.Health(60, 120, clock=lambda: now[0])
+
+    assert health.is_live() and not health.is_ready()
+    health.mark_cycle(success=True)
+    now[0] += 90
+    assert not health.is_live() and health.is_ready()
+
+
+def test_server_exposes_metrics_and_health():
+    health = metrics.Health(60, 60)
+    server = metrics.MetricsServer(health).start()
+    base = f'http://127.0.0.1:{server.port}'
+    try:
+        body = urlopen(f'{base}/metrics').read().decode()
+        assert '# TYPE homework_api_request_seconds histogram' in body
+        assert urlopen(f'{base}/healthz').status == 200
+        with pytest.raises(HTTPError) as error:
+            urlopen(f'{base}/readyz')
+        assert error.value.code == 503
+    finally:
+        server.stop()
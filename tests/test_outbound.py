@@ -0,0 +1,119 @@
+import threading
+import time
+
+import telegram
+
+from outbound import OutboundQueue, TokenBucket
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingBot:
+
+    def __init__(self, failures=()):
+        self.sent = []
+        self.failures = list(failures)
+        self.delivered = threading.Event()
+
+    def send_message(self, chat_id, text):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((chat_id, text))
+        self.delivered.set()
+
+
+def test_token_bucket_limits_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=1, clock=clock)
+
+    assert bucket.delay() == 0
+    bucket.take()
+    assert bucket.delay() == 0.5
+    clock.now = 0.5
+    assert bucket.delay() == 0
+
+
+def test_messages_for_one_chat_are_merged():
+    bot = RecordingBot()
+    queue = OutboundQueue(bot, merge_window=0.05)
+    results = []
+    for number in range(3):
+        queue.send_message(
+            '1', f'message {number}', lambda *done: results.append(done))
+    queue.send_message('2', 'other chat')
+    queue.start()
+
+    assert queue.close(timeout=2)
+    assert sorted(bot.sent) == [
+        ('1', 'message 0\n\nmessage 1\n\nmessage 2'),
+        ('2', 'other chat'),
+    ]
+    assert results == [(True, False)] * 3
+
+
+def test_retry_after_is_honoured():
+    bot = RecordingBot(failures=[telegram.error.RetryAfter(0.05)])
+    queue = OutboundQueue(bot, merge_window=0)
+    queue.start()
+
+    queue.send_message('1', 'hello')
+
+    assert bot.delivered.wait(2)
+    assert bot.sent == [('1', 'hello')]
+    queue.close(timeout=1)
+
+
+def test_failed_delivery_is_reported_with_its_kind():
+    bot = RecordingBot(failures=[
+        telegram.error.BadRequest('chat not found'),
+        telegram.error.TimedOut()])
+    queue = OutboundQueue(bot, merge_window=0)
+    results = []
+    queue.send_message('1', 'hello', lambda *done: results.append(done))
+    queue.send_message('2', 'hello', lambda *done: results.append(done))
+    queue.start()
+
+    assert queue.close(timeout=2)
+    assert results == [(False, True), (False, False)]
+
+
+class SlowChatBot(RecordingBot):
+
+    def __init__(self, slow_chat, release):
+        super().__init__()
+        self.slow_chat = slow_chat
+        self.release = release
+
+    def send_message(self, chat_id, text):
+        if chat_id == self.slow_chat:
+            self.release.wait(2)
+        super().send_message(chat_id, text)
+
+
+def test_slow_chat_does_not_delay_others():
+    release = threading.Event()
+    bot = SlowChatBot('channel', release)
+    queue = OutboundQueue(
+        bot, merge_window=0, global_rate=100, workers=2)
+    queue.start()
+
+    for chat_id in ('channel', 'student', 'mentor'):
+        queue.send_message(chat_id, 'approved')
+
+    assert bot.delivered.wait(1)
+    for _ in range(50):
+        if len(bot.sent) == 2:
+            break
+        time.sleep(0.01)
+    assert sorted(bot.sent) == [('mentor', 'approved'),
+                                ('student', 'approved')]
+    release.set()
+    assert queue.close(timeout=2)
+    assert len(bot.sent) == 3
@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from outbox import Outbox
+
+
+class ManualSender:
+
+    def __init__(self):
+        self.calls = []
+
+    def send_message(self, chat_id, text, on_done):
+        self.calls.append((chat_id, text, on_done))
+
+
+def test_unacknowledged_messages_survive_restart(tmp_path):
+    path = str(tmp_path / 'outbox.jsonl')
+    sender = ManualSender()
+    outbox = Outbox(path, sender)
+    outbox.start()
+    outbox.send_message('1', 'first')
+    outbox.send_message('1', 'second')
+    sender.calls[0][2](True)
+    outbox.close()
+
+    restarted_sender = ManualSender()
+    restarted = Outbox(path, restarted_sender)
+    restarted.start()
+
+    assert [call[1] for call in restarted_sender.calls] == ['second']
+    assert restarted.pending() == 1
+    restarted.close()
+
+
+def test_message_after_close_is_kept_for_restart(tmp_path):
+    path = str(tmp_path / 'outbox.jsonl')
+    sender = ManualSender()
+    outbox = Outbox(path, sender)
+    with pytest.raises(RuntimeError):
+        outbox.send_message('1', 'too early')
+    outbox.start()
+    outbox.close()
+
+    outbox.send_message('1', 'late')
+
+    assert sender.calls == []
+    restarted_sender = ManualSender()
+    restarted = Outbox(path, restarted_sender)
+    restarted.start()
+    assert [call[1] for call in restarted_sender.calls] == ['late']
+    restarted.close()
+
+
+def test_failed_delivery_is_retried(tmp_path):
+    sender = ManualSender()
+    outbox = Outbox(str(tmp_path / 'outbox.jsonl'), sender, retry_delay=0)
+    outbox.start()
+    outbox.send_message('1', 'hello')
+
+    sender.calls[0][2](False)
+    deadline = time.monotonic() + 2
+    while len(sender.calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert len(sender.calls) == 2
+    sender.calls[1][2](True)
+    assert outbox.pending() == 0
+    outbox.close()
+
+
+def test_transient_failures_are_retried_past_max_attempts(tmp_path):
+    path = tmp_path / 'outbox.jsonl'
+    sender = ManualSender()
+    outbox = Outbox(str(path), sender, max_attempts=1, retry_delay=0)
+    outbox.start()
+    outbox.send_message('1', 'hello')
+
+    for attempt in range(1, 4):
+        deadline = time.monotonic() + 2
+        while len(sender.calls) < attempt and time.monotonic() < deadline:
+            time.sleep(0.01)
+        sender.calls[-1][2](False, False)
+
+    assert len(sender.calls) >= 3
+    assert outbox.pending() == 1
+    outbox.close()
+    assert '"ack"' not in path.read_text()
+
+
+def test_permanent_failure_drops_message(tmp_path):
+    sender = ManualSender()
+    outbox = Outbox(str(tmp_path / 'outbox.jsonl'), sender)
+    outbox.start()
+    outbox.send_message('1', 'hello')
+
+    sender.calls[0][2](False, True)
+
+    assert outbox.pending() == 0
+    outbox.close()
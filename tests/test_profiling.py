@@ -0,0 +1,62 @@
+import json
+import threading
+import time
+
+import homework
+from profiling import SamplingProfiler, Tracer
+
+
+def read_trace(path):
+    return json.loads(path.read_text().rstrip().rstrip(',') + ']')
+
+
+def test_tracer_records_stages_and_restores_functions(tmp_path, monkeypatch):
+    original = homework.check_response
+    path = tmp_path / 'trace.json'
+    tracer = Tracer(str(path)).attach(homework, ['check_response'])
+    monkeypatch.setattr(
+        homework, 'fetch_homework_statuses',
+        lambda timestamp, headers: {'homeworks': [], 'current_date': 1})
+
+    homework.process_response(None, homework.Tenant('token', '1'))
+    tracer.close()
+
+    [event] = read_trace(path)
+    assert event['name'] == 'check_response'
+    assert event['ph'] == 'X' and event['dur'] >= 0
+    assert homework.check_response is original
+
+
+def test_tracer_appends_to_existing_file(tmp_path):
+    path = tmp_path / 'trace.json'
+    for _ in range(2):
+        tracer = Tracer(str(path))
+        tracer.record('stage', 0, 0.5)
+        tracer.close()
+
+    assert [event['dur'] for event in read_trace(path)] == [500000, 500000]
+
+
+def test_profiler_toggle_dumps_stacks(tmp_path):
+    stop = threading.Event()
+
+    def busy_loop():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_loop, name='busy')
+    worker.start()
+    profiler = SamplingProfiler(str(tmp_path), interval=0.001)
+
+    assert profiler.toggle() is None
+    assert profiler.running
+    time.sleep(0.1)
+    path = profiler.toggle()
+    stop.set()
+    worker.join()
+
+    assert not profiler.running
+    lines = open(path, encoding='utf-8').read().splitlines()
+    assert any(line.startswith('busy;') and 'busy_loop' in line
+               for line in lines)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
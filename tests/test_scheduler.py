@@ -0,0 +1,118 @@
+import asyncio
+import os
+import signal
+import threading
+import time
+
+import engine
+import homework
+from intervals import FixedInterval
+from outbound import OutboundQueue
+from outbox import Outbox
+from scheduler import Scheduler
+
+
+class SlowSender:
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.sent = []
+
+    def send_message(self, chat_id, text, on_done=None):
+        time.sleep(self.delay)
+        self.sent.append((chat_id, text))
+        if on_done is not None:
+            on_done(True)
+
+
+def test_wait_returns_early_on_trigger():
+    scheduler = Scheduler()
+    threading.Timer(0.05, scheduler.trigger).start()
+    started = time.monotonic()
+
+    assert scheduler.wait(10)
+    assert time.monotonic() - started < 5
+    assert not scheduler.wait(0.01)
+
+
+def test_stop_signal_wakes_wait():
+    previous = {
+        signum: signal.getsignal(signum)
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR2)}
+    scheduler = Scheduler(shutdown_timeout=5).install()
+    try:
+        threading.Timer(
+            0.05, os.kill, (os.getpid(), signal.SIGTERM)).start()
+
+        assert scheduler.wait(10)
+        assert scheduler.stopping
+        assert 0 < scheduler.remaining() <= 5
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+
+def test_engine_finishes_polls_and_exits_after_stop():
+    scheduler = Scheduler()
+    finished = []
+
+    def slow_poll(bot, tenant):
+        time.sleep(0.1)
+        finished.append(tenant.chat_id)
+        return []
+
+    tenants = [
+        homework.Tenant('token', str(number),
+                        interval_policy=FixedInterval(60))
+        for number in range(3)
+    ]
+    polling = engine.PollingEngine(
+        None, tenants, poll=slow_poll, scheduler=scheduler)
+
+    async def run_and_stop():
+        asyncio.get_running_loop().call_later(0.05, scheduler.stop)
+        await asyncio.wait_for(polling.run(), 5)
+
+    asyncio.run(run_and_stop())
+
+    assert sorted(finished) == ['0', '1', '2']
+
+
+def test_engine_trigger_polls_everyone_now():
+    scheduler = Scheduler()
+    calls = []
+    tenants = [
+        homework.Tenant('token', str(number),
+                        interval_policy=FixedInterval(60))
+        for number in range(2)
+    ]
+    polling = engine.PollingEngine(
+        None, tenants, poll=lambda bot, tenant: calls.append(tenant),
+        scheduler=scheduler)
+
+    async def trigger_then_stop():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, scheduler.trigger)
+        loop.call_later(0.2, scheduler.stop)
+        await asyncio.wait_for(polling.run(), 5)
+
+    asyncio.run(trigger_then_stop())
+
+    assert len(calls) == 4
+
+
+def test_shutdown_drains_queue_before_deadline(tmp_path):
+    outbound = OutboundQueue(
+        SlowSender(0.01), per_chat_rate=1000, global_rate=1000,
+        merge_window=0)
+    outbound.start()
+    outbox = Outbox(str(tmp_path / 'outbox.jsonl'), outbound)
+    outbox.start()
+    for number in range(5):
+        outbox.send_message(str(number), 'text')
+    scheduler = Scheduler(shutdown_timeout=5)
+    scheduler.stop()
+
+    assert homework.shutdown(scheduler, outbound, outbox)
+    assert outbox.pending() == 0
+    assert len(outbound.bot.sent) == 5
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+
+import pytest
+
+import engine
+import homework
+import sharding
+from intervals import FixedInterval
+from sharding import HashRing, LeaseStore, ShardCoordinator, worker_path
+from state import StateJournal
+
+TENANTS = [str(number) for number in range(1000)]
+
+
+def make_store(tmp_path, now):
+    return LeaseStore(
+        str(tmp_path / 'shards.sqlite'), ttl=30, clock=lambda: now[0])
+
+
+def test_ring_spreads_and_moves_few_keys():
+    two = HashRing(['w1', 'w2'])
+    three = HashRing(['w1', 'w2', 'w3'])
+
+    shares = [
+        sum(two.owner(key) == worker for key in TENANTS)
+        for worker in ('w1', 'w2')]
+    moved = sum(two.owner(key) != three.owner(key) for key in TENANTS)
+
+    assert min(shares) > 350
+    assert all(three.owner(key) == 'w3'
+               for key in TENANTS if two.owner(key) != three.owner(key))
+    assert 200 < moved < 450
+
+
+def test_lease_is_exclusive_until_expired(tmp_path):
+    now = [0.0]
+    store = make_store(tmp_path, now)
+
+    assert store.acquire('w1', ['1', '2']) == {'1', '2'}
+    assert store.acquire('w2', ['1', '2']) == set()
+    store.release('w1', ['2'])
+    assert store.acquire('w2', ['1', '2']) == {'2'}
+    now[0] = 31
+    assert store.acquire('w2', ['1']) == {'1'}
+
+
+def test_workers_split_tenants_and_rebalance_on_death(tmp_path):
+    now = [0.0]
+    first = ShardCoordinator(make_store(tmp_path, now), 'w1')
+    second = ShardCoordinator(make_store(tmp_path, now), 'w2')
+
+    first.refresh(TENANTS)
+    second.refresh(TENANTS)
+    first.refresh(TENANTS)
+    second.refresh(TENANTS)
+
+    assert first.owned.isdisjoint(second.owned)
+    assert first.owned | second.owned == set(TENANTS)
+
+    now[0] = 31
+    assert second.refresh(TENANTS) == set(TENANTS)
+
+
+def test_released_tenants_are_handed_over(tmp_path):
+    now = [0.0]
+    first = ShardCoordinator(make_store(tmp_path, now), 'w1')
+    second = ShardCoordinator(make_store(tmp_path, now), 'w2')
+    first.refresh(TENANTS)
+    handed_over = []
+
+    second.refresh(TENANTS)
+    first.refresh(TENANTS, handed_over.extend)
+    second.refresh(TENANTS)
+
+    assert set(handed_over) == second.owned
+    assert first.owned | second.owned == set(TENANTS)
+
+
+def test_journal_update_keeps_other_tenants(tmp_path):
+    journal = StateJournal(str(tmp_path / 'state.json'))
+    journal.save({'1': {'cursor': 1}, '2': {'cursor': 2}})
+
+    journal.update({'2': {'cursor': 20}, '3': {'cursor': 3}})
+
+    assert journal.load() == {
+        '1': {'cursor': 1}, '2': {'cursor': 20}, '3': {'cursor': 3}}
+
+
+def test_worker_path():
+    assert worker_path('data/outbox.jsonl', 'worker.1') == (
+        'data/outbox.worker.1.jsonl')
+
+
+def test_engine_polls_only_owned_tenants(tmp_path):
+    now = [0.0]
+    other = ShardCoordinator(make_store(tmp_path, now), 'w2')
+    shard = ShardCoordinator(make_store(tmp_path, now), 'w1')
+    other.refresh(TENANTS[:20])
+    shard.refresh(TENANTS[:20])
+    other.refresh(TENANTS[:20])
+    tenants = [
+        homework.Tenant('token', chat_id,
+                        interval_policy=FixedInterval(0.05))
+        for chat_id in TENANTS[:20]]
+    polled = set()
+    polling = engine.PollingEngine(
+        None, tenants, concurrency=4, shard=shard,
+        poll=lambda bot, tenant: polled.add(tenant.chat_id))
+
+    async def run_briefly():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(polling.run(), 0.2)
+
+    asyncio.run(run_briefly())
+
+    assert polled == shard.owned
+    assert polled and polled.isdisjoint(other.owned)
+
+
+def test_coordinator_requires_stable_worker_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(sharding, 'SHARD_WORKER_ID', None)
+
+    with pytest.raises(ValueError):
+        ShardCoordinator(make_store(tmp_path, [0.0]))
+
+
+def test_release_waits_for_running_poll(tmp_path):
+    journal = StateJournal(str(tmp_path / 'state.json'))
+    shard = ShardCoordinator(make_store(tmp_path, [0.0]), 'w1')
+    tenant = homework.Tenant('token', '1')
+    polling = engine.PollingEngine(
+        None, [tenant], journal=journal, shard=shard)
+    done = polling._polling['1'] = threading.Event()
+
+    def finish_poll():
+        tenant.current_timestamp = 42
+        done.set()
+
+    threading.Timer(0.05, finish_poll).start()
+    polling._release_shard({'1'})
+
+    assert journal.load()['1']['cursor'] == 42
@@ -0,0 +1,51 @@
+import os
+
+import homework
+from intervals import AdaptiveInterval
+from state import StateJournal
+
+
+def test_missing_journal_loads_empty(tmp_path):
+    assert StateJournal(str(tmp_path / 'state.json')).load() == {}
+
+
+def test_corrupted_journal_loads_empty(tmp_path):
+    path = tmp_path / 'state.json'
+    path.write_text('{"version": 1, "tenan')
+
+    assert StateJournal(str(path)).load() == {}
+
+
+def test_tenants_resume_from_saved_cursor(tmp_path):
+    journal = StateJournal(str(tmp_path / 'state.json'))
+    tenant = homework.Tenant('token', '100', current_timestamp=1234)
+    tenant.last_message = 'message'
+    tenant.last_error = 'EndpointNotAvailable: 500'
+    tenant.statuses['hw1'] = 'reviewing'
+
+    homework.save_tenants(journal, [tenant])
+    restored = homework.Tenant('token', '100', current_timestamp=9999)
+    homework.restore_tenants(journal, [restored])
+
+    assert restored.current_timestamp == 1234
+    assert restored.snapshot() == tenant.snapshot()
+    assert os.listdir(tmp_path) == ['state.json']
+
+
+def test_warm_restart_keeps_fast_polling_for_review(tmp_path):
+    journal = StateJournal(str(tmp_path / 'state.json'))
+
+    def make_tenant():
+        return homework.Tenant('token', '100', interval_policy=(
+            AdaptiveInterval(homework.HOMEWORK_STATUSES, base=600, fast=60,
+                             maximum=3600, jitter=0)))
+
+    tenant = make_tenant()
+    tenant.current_timestamp = 1000
+    tenant.next_interval([{'homework_name': 'hw1', 'status': 'reviewing'}])
+
+    homework.save_tenants(journal, [tenant])
+    restored = make_tenant()
+    homework.restore_tenants(journal, [restored])
+
+    assert restored.next_interval([]) == 60
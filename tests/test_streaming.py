@@ -0,0 +1,123 @@
+import json
+import tracemalloc
+
+import pytest
+
+import homework
+from streaming import HomeworkStream
+from utils import RecordingBot
+
+
+def chunked(data, size):
+    return (data[start:start + size] for start in range(0, len(data), size))
+
+
+def make_payload(count):
+    return {
+        'homeworks': [
+            {'id': number, 'homework_name': f'работа {number}',
+             'status': 'approved', 'reviewer_comment': 'Всё нравится' * 10}
+            for number in range(count)
+        ],
+        'current_date': 1234567890,
+    }
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_stream_yields_same_homeworks_as_json(chunk_size):
+    payload = make_payload(50)
+    body = json.dumps(payload, ensure_ascii=False, indent=1).encode()
+
+    stream = HomeworkStream(chunked(body, chunk_size))
+
+    assert list(stream) == payload['homeworks']
+    assert stream.fields == {'current_date': 1234567890}
+    assert stream.has_homeworks
+
+
+def test_stream_rejects_truncated_body():
+    body = json.dumps(make_payload(3)).encode()[:-20]
+
+    with pytest.raises(ValueError):
+        list(HomeworkStream(chunked(body, 16)))
+
+
+def test_check_stream_requires_keys():
+    body = json.dumps({'homeworks': []}).encode()
+
+    with pytest.raises(KeyError):
+        list(homework.check_stream(HomeworkStream([body])))
+
+
+def test_stream_memory_does_not_grow_with_history():
+    def peak_memory(count):
+        body = json.dumps(make_payload(count)).encode()
+        chunks = list(chunked(body, 64 * 1024))
+        tracemalloc.start()
+        for _ in HomeworkStream(iter(chunks)):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    assert peak_memory(10000) < 2 * peak_memory(1000)
+
+
+class StreamedResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        return chunked(self.body, chunk_size)
+
+    def close(self):
+        self.closed = True
+
+
+def test_poll_tenant_in_stream_mode(monkeypatch):
+    response = StreamedResponse(json.dumps(make_payload(3)).encode())
+    monkeypatch.setattr(homework, 'STREAM_RESPONSES', True)
+    monkeypatch.setattr(
+        homework.transport, 'get', lambda url, **kwargs: response)
+    bot = RecordingBot()
+    tenant = homework.Tenant('token', '100')
+
+    changes = homework.poll_tenant(bot, tenant)
+
+    assert len(changes) == len(bot.texts) == 3
+    assert tenant.current_timestamp == 1234567890
+    assert response.closed
+
+
+def test_stream_mode_sends_nothing_from_truncated_body(monkeypatch):
+    body = json.dumps(make_payload(3)).encode()[:-20]
+    monkeypatch.setattr(homework, 'STREAM_RESPONSES', True)
+    monkeypatch.setattr(
+        homework.transport, 'get',
+        lambda url, **kwargs: StreamedResponse(body))
+    bot = RecordingBot()
+    tenant = homework.Tenant('token', '100')
+
+    assert homework.poll_tenant(bot, tenant) is None
+    assert tenant.statuses == {}
+    assert not any(text.startswith('Изменился статус') for text in bot.texts)
+
+
+def test_stream_mode_sends_in_same_order_as_full_response(monkeypatch):
+    payload = make_payload(3)
+    monkeypatch.setattr(
+        homework, 'fetch_homework_statuses',
+        lambda timestamp, headers: payload)
+    monkeypatch.setattr(
+        homework.transport, 'get',
+        lambda url, **kwargs: StreamedResponse(json.dumps(payload).encode()))
+    full, streamed = RecordingBot(), RecordingBot()
+
+    homework.process_response(full, homework.Tenant('token', '100'))
+    homework.process_stream(streamed, homework.Tenant('token', '100'))
+
+    assert streamed.texts == full.texts
+    assert 'работа 2' in full.texts[0]
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+import homework
+from exceptions import NotDocumentedStatusHomework
+from templates import MessageRenderer, load_templates
+
+
+def test_render_uses_tenant_locale():
+    renderer = MessageRenderer()
+
+    assert renderer.render('hw.zip', 'approved', 'en') == (
+        'Review status of "hw.zip" has changed. '
+        'The reviewer approved the work. Hooray!')
+    assert renderer.render('hw.zip', 'approved', 'ru') == (
+        'Изменился статус проверки работы "hw.zip". '
+        f'{homework.HOMEWORK_STATUSES["approved"]}')
+
+
+def test_unknown_locale_falls_back_to_default():
+    renderer = MessageRenderer(default_locale='ru')
+
+    assert renderer.render('hw.zip', 'reviewing', 'de') == (
+        renderer.render('hw.zip', 'reviewing', 'ru'))
+    assert renderer.render('hw.zip', 'reviewing') == (
+        renderer.render('hw.zip', 'reviewing', 'ru'))
+
+
+def test_unknown_status_raises():
+    with pytest.raises(NotDocumentedStatusHomework):
+        MessageRenderer().render('hw.zip', 'unknown', 'ru')
+
+
+def test_templates_file_adds_locale(tmp_path):
+    path = tmp_path / 'templates.json'
+    path.write_text(json.dumps({'uk': {
+        'message': 'Робота "{homework_name}": {verdict}',
+        'statuses': {'approved': 'прийнято'},
+    }}))
+
+    renderer = MessageRenderer(load_templates(str(path)))
+
+    assert renderer.render('hw', 'approved', 'uk') == 'Робота "hw": прийнято'
+    assert renderer.render('hw', 'rejected', 'uk') == (
+        renderer.render('hw', 'rejected', 'ru'))
+
+
+def test_process_response_renders_in_tenant_locale(monkeypatch):
+    sent = []
+    monkeypatch.setattr(
+        homework, 'fetch_homework_statuses',
+        lambda timestamp, headers: {
+            'homeworks': [{'homework_name': 'hw', 'status': 'rejected'}],
+            'current_date': 1})
+    monkeypatch.setattr(
+        homework, 'send_message_to',
+        lambda bot, chat_id, message: sent.append(message))
+    tenant = homework.Tenant('token', '1', locale='en')
+
+    homework.process_response(None, tenant)
+
+    assert sent == [MessageRenderer().render('hw', 'rejected', 'en')]
@@ -0,0 +1,32 @@
+import transport
+
+
+def test_get_applies_default_timeout_and_records_latency(monkeypatch):
+    http = transport.HttpTransport(connect_timeout=1, read_timeout=2)
+    seen = {}
+
+    def fake_get(url, **kwargs):
+        seen.update(kwargs)
+        return 'response'
+
+    monkeypatch.setattr(http.session, 'get', fake_get)
+
+    assert http.get('https://example.com/api/') == 'response'
+    assert seen['timeout'] == (1, 2)
+    assert http.latency_summary('example.com')['count'] == 1
+
+
+def test_latency_summary_without_samples():
+    assert transport.HttpTransport().latency_summary('telegram') == {
+        'count': 0}
+
+
+def test_configure_transport_replaces_shared_instance():
+    previous = transport.install_transport(None)
+    try:
+        http = transport.configure_transport(pool_size=3)
+
+        assert transport.get_transport() is http
+        assert http.telegram_request()._con_pool_size == 3
+    finally:
+        transport.install_transport(previous).close()
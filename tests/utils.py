@@ -37,3 +37,16 @@ def check_default_var_exists(scope: ModuleType, var_name: str) -> None:
         f'{var_name} должна быть переменной, а не функцией.'
     )
 
+
+class RecordingBot:
+    """Fake telegram.Bot that keeps sent messages instead of sending them"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, text):
+        self.sent.append((chat_id, text))
+
+    @property
+    def texts(self):
+        return [text for _, text in self.sent]
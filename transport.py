@@ -0,0 +1,238 @@
+import gzip
+import json
+import logging
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from typing import IO, TYPE_CHECKING, Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+from clock import SYSTEM_CLOCK, Clock
+
+if TYPE_CHECKING:
+    import requests
+    from telegram.utils.request import Request
+
+LATENCY_WINDOW = 1000
+
+
+def load_settings() -> None:
+    """Читает настройки модуля из переменных окружения."""
+    global CONNECT_TIMEOUT, READ_TIMEOUT, POOL_SIZE, RECORD_FILE
+    CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+    READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+    POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+    RECORD_FILE = os.getenv('RECORD_FILE')
+
+
+load_settings()
+
+
+class HttpTransport:
+    """Общая HTTP-сессия с пулом соединений, таймаутами и замером задержек.
+
+    При reuse_connections=False каждый запрос идёт через новую сессию,
+    то есть с новым TCP+TLS соединением, как при вызове requests.get.
+    Это нужно только для сравнения задержек. requests загружается при
+    создании первого транспорта, а не при импорте модуля.
+    """
+
+    def __init__(self, pool_size: Optional[int] = None,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 reuse_connections: bool = True) -> None:
+        """Создаёт сессию с пулом на pool_size соединений."""
+        self.pool_size = POOL_SIZE if pool_size is None else pool_size
+        self.connect_timeout = (
+            CONNECT_TIMEOUT if connect_timeout is None else connect_timeout)
+        self.read_timeout = (
+            READ_TIMEOUT if read_timeout is None else read_timeout)
+        self.reuse_connections = reuse_connections
+        self.latencies: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=LATENCY_WINDOW))
+        self.session = self._make_session()
+
+    @property
+    def timeout(self) -> tuple:
+        """Таймауты (соединение, чтение) для requests."""
+        return self.connect_timeout, self.read_timeout
+
+    def _make_session(self) -> 'requests.Session':
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def get(self, url: str, **kwargs) -> 'requests.Response':
+        """GET-запрос с таймаутами по умолчанию и замером задержки."""
+        kwargs.setdefault('timeout', self.timeout)
+        started = time.perf_counter()
+        try:
+            if self.reuse_connections:
+                return self.session.get(url, **kwargs)
+            with self._make_session() as session:
+                return session.get(url, **kwargs)
+        finally:
+            self.record_latency(
+                urlsplit(url).netloc, time.perf_counter() - started)
+
+    def record_latency(self, name: str, seconds: float) -> None:
+        """Запоминает задержку запроса к сервису name."""
+        self.latencies[name].append(seconds)
+
+    def latency_summary(self, name: str) -> dict:
+        """Сводка задержек запросов к сервису name в секундах."""
+        samples = sorted(self.latencies.get(name, ()))
+        if not samples:
+            return {'count': 0}
+        return {
+            'count': len(samples),
+            'p50': statistics.median(samples),
+            'p95': samples[int(0.95 * (len(samples) - 1))],
+            'max': samples[-1],
+        }
+
+    def warm_up(self, *urls: str) -> None:
+        """Заранее резолвит DNS и открывает соединения к хостам urls."""
+        import requests
+
+        for url in urls:
+            parts = urlsplit(url)
+            try:
+                socket.getaddrinfo(parts.hostname, parts.port or 443)
+                self.get(f'{parts.scheme}://{parts.netloc}/')
+            except (OSError, requests.RequestException) as error:
+                logging.warning(
+                    'Не удалось прогреть соединение %s: %s', url, error)
+
+    def telegram_request(self) -> 'Request':
+        """Пул соединений для telegram.Bot с теми же таймаутами."""
+        from telegram.utils.request import Request
+
+        return Request(
+            con_pool_size=self.pool_size,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout)
+
+    def close(self) -> None:
+        """Закрывает все соединения пула."""
+        self.session.close()
+
+
+def open_log(path: str, mode: str) -> IO[str]:
+    """Открывает лог ответов; .gz сжимается на лету."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class RecordingTransport(HttpTransport):
+    """Транспорт, который дописывает ответы на запросы к url в лог.
+
+    Пишутся только время, код и тело ответа: заголовки с токенами в
+    лог не попадают. Сбой соединения записывается как код 0 с текстом
+    ошибки и при воспроизведении (replay.py) повторится тем же
+    исключением.
+    """
+
+    def __init__(self, path: str, url: str, clock: Clock = SYSTEM_CLOCK,
+                 **kwargs) -> None:
+        """Создаёт транспорт, пишущий ответы с url в лог path."""
+        super().__init__(**kwargs)
+        self.url = url
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._file = open_log(path, 'a')
+
+    def get(self, url: str, **kwargs) -> 'requests.Response':
+        """GET-запрос, ответ на который попадает в лог."""
+        if not url.startswith(self.url):
+            return super().get(url, **kwargs)
+        try:
+            response = super().get(url, **kwargs)
+        except Exception as error:
+            self.record(0, str(error))
+            raise
+        self.record(response.status_code, response.text)
+        return response
+
+    def record(self, status: int, body: str) -> None:
+        """Дописывает ответ в лог."""
+        line = json.dumps(
+            {'at': round(self.clock.time(), 3), 'status': status,
+             'body': body},
+            ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self) -> None:
+        """Закрывает соединения и лог."""
+        super().close()
+        with self._lock:
+            self._file.close()
+
+
+_transport: Optional[HttpTransport] = None
+
+
+def get_transport() -> HttpTransport:
+    """Возвращает общий для процесса транспорт, создавая его при нужде."""
+    global _transport
+    if _transport is None:
+        _transport = HttpTransport()
+    return _transport
+
+
+def configure_transport(**kwargs) -> HttpTransport:
+    """Заменяет общий транспорт новым с заданными параметрами."""
+    global _transport
+    if _transport is not None:
+        _transport.close()
+    _transport = HttpTransport(**kwargs)
+    return _transport
+
+
+def install_transport(
+        instance: Optional[HttpTransport]) -> Optional[HttpTransport]:
+    """Ставит instance общим транспортом и возвращает прежний."""
+    global _transport
+    previous, _transport = _transport, instance
+    return previous
+
+
+def get(url: str, **kwargs) -> 'requests.Response':
+    """GET-запрос через общий транспорт."""
+    return get_transport().get(url, **kwargs)
+
+
+def measure_latency(url: str, count: int = 20, reuse: bool = True) -> dict:
+    """Делает count запросов к url и возвращает сводку задержек."""
+    import requests
+
+    transport = HttpTransport(reuse_connections=reuse)
+    name = urlsplit(url).netloc
+    for _ in range(count):
+        try:
+            transport.get(url)
+        except requests.RequestException as error:
+            logging.warning('Запрос к %s не удался: %s', url, error)
+    transport.close()
+    return transport.latency_summary(name)
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else (
+        'https://practicum.yandex.ru/api/user_api/homework_statuses/')
+    for reuse in (True, False):
+        summary = measure_latency(target, reuse=reuse)
+        print(f'reuse_connections={reuse}: {summary}')